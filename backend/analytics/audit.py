@@ -0,0 +1,202 @@
+"""
+Batched audit logging for admin actions.
+
+AdminActivityMiddleware queues ActivityLog rows with queue_activity() instead
+of inserting them on the response path. Entries are queued once the request's
+transaction commits (so rolled-back actions are never logged) and a daemon
+writer thread inserts them with bulk_create, at most ACTIVITY_LOG_BATCH_SIZE
+rows at a time and at least every ACTIVITY_LOG_FLUSH_INTERVAL seconds.
+
+The queue is bounded. When it is full the caller writes a batch itself, which
+slows the request down instead of dropping audit entries. If a batch insert
+fails, its rows are inserted one by one and only the rows that still fail are
+dropped (and logged). At exit the writer is stopped after finishing its
+current batch, and anything still queued is written.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+# Queued after everything else to make the writer thread finish and exit
+_STOP = object()
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+class ActivityLogBuffer:
+    """Bounded queue of ActivityLog rows drained by a daemon writer thread."""
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(
+            maxsize=_setting("ACTIVITY_LOG_BUFFER_SIZE", 5000)
+        )
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def batch_size(self) -> int:
+        return _setting("ACTIVITY_LOG_BATCH_SIZE", 200)
+
+    def put(self, entry: ActivityLog) -> None:
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Backpressure: write on the caller's thread rather than drop entries
+            self._write([entry] + self._drain(self.batch_size))
+
+    def flush(self) -> int:
+        """Write everything queued on the calling thread."""
+        written = 0
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def stop(self, timeout: float) -> int:
+        """
+        Let the writer thread write what it holds and exit, then flush the rest.
+
+        Returns:
+            Number of entries written on the calling thread
+        """
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+                thread.join(timeout)
+            except queue.Full:
+                pass
+            if thread.is_alive():
+                logger.warning("Activity log writer did not finish before exit")
+        return self.flush()
+
+    def _drain(self, limit: int) -> List[ActivityLog]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _STOP:
+                batch.append(entry)
+        return batch
+
+    def _write(self, batch: List[ActivityLog]) -> int:
+        try:
+            with transaction.atomic():
+                ActivityLog.objects.bulk_create(batch, batch_size=self.batch_size)
+            return len(batch)
+        except Exception as e:
+            logger.warning(
+                f"Bulk insert of {len(batch)} activity log entries failed ({e}); "
+                "inserting them one by one"
+            )
+
+        written = 0
+        for entry in batch:
+            # A rolled-back bulk_create may have assigned primary keys
+            entry.pk = None
+            entry._state.adding = True
+            try:
+                with transaction.atomic():
+                    entry.save(force_insert=True)
+                written += 1
+            except Exception:
+                logger.exception(
+                    f"Dropping activity log entry ({entry.activity_type}, "
+                    f"object {entry.object_id}, user {entry.user_id})"
+                )
+        return written
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="activity-log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        interval = _setting("ACTIVITY_LOG_FLUSH_INTERVAL", 1.0)
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            if entry is _STOP:
+                return
+            batch = [entry]
+            # Collect a full batch, or whatever arrives within the interval
+            deadline = time.monotonic() + interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            # The thread keeps its own connection; drop it if it has gone stale
+            close_old_connections()
+            self._write(batch)
+
+
+activity_buffer = ActivityLogBuffer()
+
+
+def queue_activity(**fields) -> None:
+    """
+    Queue an ActivityLog row to be written in the background.
+
+    The timestamp is taken now, so entries keep the time of the action rather
+    than the time they are written. With ACTIVITY_LOG_ASYNC disabled the row
+    is written immediately.
+
+    Args:
+        **fields: ActivityLog field values
+    """
+    entry = ActivityLog(created_at=timezone.now(), **fields)
+    if not _setting("ACTIVITY_LOG_ASYNC", True):
+        entry.save()
+        return
+    transaction.on_commit(lambda: activity_buffer.put(entry))
+
+
+def flush_activity_logs() -> int:
+    """
+    Write every queued activity log entry.
+
+    Returns:
+        Number of entries written
+    """
+    return activity_buffer.flush()
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    activity_buffer.stop(_setting("ACTIVITY_LOG_SHUTDOWN_TIMEOUT", 10))
@@ -0,0 +1,169 @@
+"""
+Page-view classification: traffic source, device class and public-page flag.
+
+New page views are classified once when they are written (analytics.ingest)
+and the results stored as indexed PageView columns, so dashboards group by
+plain columns. The SQL expressions below apply the same rules in the
+database; they are used to backfill rows written before classification
+existed (see the ``classify_pageviews`` management command).
+"""
+
+from typing import Optional
+
+from django.db.models import BooleanField, Case, CharField, Q, QuerySet, Value, When
+
+SOURCE_DIRECT = "Direct"
+SOURCE_SEARCH = "Search"
+SOURCE_SOCIAL = "Social"
+SOURCE_EMAIL = "Email"
+SOURCE_REFERRAL = "Referral"
+
+DEVICE_DESKTOP = "Desktop"
+DEVICE_MOBILE = "Mobile"
+DEVICE_TABLET = "Tablet"
+DEVICE_UNKNOWN = "Unknown"
+
+SEARCH_DOMAINS = ["google", "bing", "yahoo", "duckduckgo"]
+SOCIAL_DOMAINS = ["facebook", "instagram", "linkedin", "twitter", "t.co", "x.com"]
+TABLET_KEYWORDS = ["ipad", "tablet"]
+MOBILE_KEYWORDS = ["mobile", "iphone", "android"]
+
+# Admin/internal pages, auth routes and static files - excluded from "top pages"
+NON_PUBLIC_PAGE_PREFIXES = [
+    # Admin routes
+    "/admin/",
+    "/api/",
+    "/django-admin/",
+    "/super-admin/",
+    "/cms/",
+    "/backup/",
+    "/theming/",
+    # Auth routes
+    "/auth/",
+    # System/hidden files (security concern - should not be accessible)
+    "/.",
+    # Other internal/system paths
+    "/static/",
+    "/media/",
+    "/assets/",
+    "/fonts/",
+]
+NON_PUBLIC_PAGE_SUFFIXES = [
+    ".svg",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".webp",
+    ".ico",
+    ".css",
+    ".js",
+    ".txt",
+    ".xml",
+]
+
+
+def _build_keyword_query(field: str, keywords: list[str]) -> Q:
+    matcher = Q(pk__in=[])
+    for keyword in keywords:
+        matcher |= Q(**{f"{field}__icontains": keyword})
+    return matcher
+
+
+def build_referrer_case() -> Case:
+    search_q = _build_keyword_query("referrer", SEARCH_DOMAINS)
+    social_q = _build_keyword_query("referrer", SOCIAL_DOMAINS)
+
+    return Case(
+        When(
+            Q(referrer__isnull=True) | Q(referrer__exact=""), then=Value(SOURCE_DIRECT)
+        ),
+        When(search_q, then=Value(SOURCE_SEARCH)),
+        When(social_q, then=Value(SOURCE_SOCIAL)),
+        When(Q(referrer__icontains="email"), then=Value(SOURCE_EMAIL)),
+        default=Value(SOURCE_REFERRAL),
+        output_field=CharField(),
+    )
+
+
+def build_device_case() -> Case:
+    tablet_q = _build_keyword_query("user_agent", TABLET_KEYWORDS)
+    mobile_q = _build_keyword_query("user_agent", MOBILE_KEYWORDS)
+
+    return Case(
+        When(
+            Q(user_agent__isnull=True) | Q(user_agent__exact=""),
+            then=Value(DEVICE_UNKNOWN),
+        ),
+        When(tablet_q, then=Value(DEVICE_TABLET)),
+        When(mobile_q, then=Value(DEVICE_MOBILE)),
+        default=Value(DEVICE_DESKTOP),
+        output_field=CharField(),
+    )
+
+
+def build_non_public_page_query() -> Q:
+    matcher = Q(pk__in=[])
+    for prefix in NON_PUBLIC_PAGE_PREFIXES:
+        matcher |= Q(page_path__startswith=prefix)
+    for suffix in NON_PUBLIC_PAGE_SUFFIXES:
+        matcher |= Q(page_path__endswith=suffix)
+    return matcher
+
+
+def classify_referrer(referrer: Optional[str]) -> str:
+    if not referrer:
+        return SOURCE_DIRECT
+    referrer = referrer.lower()
+    if any(domain in referrer for domain in SEARCH_DOMAINS):
+        return SOURCE_SEARCH
+    if any(domain in referrer for domain in SOCIAL_DOMAINS):
+        return SOURCE_SOCIAL
+    if "email" in referrer:
+        return SOURCE_EMAIL
+    return SOURCE_REFERRAL
+
+
+def classify_device(user_agent: Optional[str]) -> str:
+    if not user_agent:
+        return DEVICE_UNKNOWN
+    user_agent = user_agent.lower()
+    if any(keyword in user_agent for keyword in TABLET_KEYWORDS):
+        return DEVICE_TABLET
+    if any(keyword in user_agent for keyword in MOBILE_KEYWORDS):
+        return DEVICE_MOBILE
+    return DEVICE_DESKTOP
+
+
+def is_public_page(page_path: str) -> bool:
+    return not (
+        page_path.startswith(tuple(NON_PUBLIC_PAGE_PREFIXES))
+        or page_path.endswith(tuple(NON_PUBLIC_PAGE_SUFFIXES))
+    )
+
+
+def classify_pageview(page_path: str, referrer: str, user_agent: str) -> dict:
+    """Return the PageView classification columns for one page view."""
+    return {
+        "traffic_source": classify_referrer(referrer),
+        "device_type": classify_device(user_agent),
+        "is_public_page": is_public_page(page_path),
+    }
+
+
+def classify_unclassified(pageviews_qs: QuerySet) -> int:
+    """
+    Classify rows of ``pageviews_qs`` that have no classification yet, in SQL.
+
+    Returns:
+        Number of rows updated
+    """
+    return pageviews_qs.filter(traffic_source="").update(
+        traffic_source=build_referrer_case(),
+        device_type=build_device_case(),
+        is_public_page=Case(
+            When(build_non_public_page_query(), then=Value(False)),
+            default=Value(True),
+            output_field=BooleanField(),
+        ),
+    )
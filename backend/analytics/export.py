@@ -0,0 +1,294 @@
+"""
+Columnar export of analytics tables for offline analysis.
+
+Each exportable table is streamed with a server-side cursor (QuerySet.iterator)
+in timestamp order and written as Hive-style date partitions:
+
+    <ANALYTICS_EXPORT_DIR>/<table>/date=YYYY-MM-DD/part-<run>.parquet
+
+Only one record batch is held in memory at a time, so exports run in fixed
+memory however large the table is. Exports are incremental: every table keeps
+an ExportWatermark, and a run exports rows with a timestamp after the
+watermark and before ``now - settle``. The settle delay leaves room for
+buffered writes (page views) and for sessions that are still active.
+
+Mutable rows (sessions, conversations) are exported again whenever their
+timestamp moves past the watermark; consumers should keep the latest row per
+``id``. IP addresses and visitor contact details are never exported.
+
+Requires pyarrow (Parquet or Arrow IPC output).
+"""
+
+import logging
+import os
+import uuid
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.utils import timezone
+
+from chatbot.models import Conversation, ConversationMessage
+
+from .models import ActivityLog, ExportWatermark, PageView, VisitorSession
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+DEFAULT_BATCH_SIZE = 10000
+
+
+class ExportTable:
+    """An exportable table: model, timestamp column and excluded fields."""
+
+    def __init__(
+        self,
+        model,
+        timestamp_field: str,
+        exclude: Tuple[str, ...] = (),
+        settle_seconds: int = 0,
+    ):
+        self.model = model
+        self.timestamp_field = timestamp_field
+        self.settle = timedelta(seconds=settle_seconds)
+        self.fields = [
+            field
+            for field in model._meta.concrete_fields
+            if field.name not in exclude
+            and not isinstance(field, (models.BinaryField, models.JSONField))
+        ]
+
+    @property
+    def columns(self) -> List[str]:
+        return [field.attname for field in self.fields]
+
+    def schema(self):
+        return pa.schema(
+            [
+                pa.field(field.attname, _arrow_type(field), nullable=True)
+                for field in self.fields
+            ]
+        )
+
+
+EXPORT_TABLES: Dict[str, ExportTable] = {
+    "page_views": ExportTable(
+        PageView, "viewed_at", exclude=("ip_address",), settle_seconds=300
+    ),
+    "visitor_sessions": ExportTable(
+        VisitorSession,
+        "last_activity",
+        exclude=("ip_address",),
+        settle_seconds=1800,
+    ),
+    "activity_logs": ExportTable(
+        ActivityLog, "created_at", exclude=("ip_address",), settle_seconds=60
+    ),
+    "chatbot_conversations": ExportTable(
+        Conversation,
+        "last_activity",
+        exclude=("ip_address", "user_email", "user_name", "user_phone"),
+        settle_seconds=1800,
+    ),
+    "chatbot_messages": ExportTable(
+        ConversationMessage, "timestamp", settle_seconds=60
+    ),
+}
+
+
+def _arrow_type(field):
+    if isinstance(field, models.ForeignKey):
+        return _arrow_type(field.target_field)
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, models.IntegerField):
+        return pa.int64()
+    if isinstance(field, (models.FloatField, models.DecimalField)):
+        return pa.float64()
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    return pa.string()
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImproperlyConfigured(
+            "Analytics export requires pyarrow; install it with 'pip install pyarrow'"
+        )
+
+
+def _export_dir() -> str:
+    return getattr(
+        settings,
+        "ANALYTICS_EXPORT_DIR",
+        os.path.join(settings.BASE_DIR, "exports", "analytics"),
+    )
+
+
+class _PartitionWriter:
+    """Writes record batches for one date partition to a temporary file."""
+
+    def __init__(self, path: str, schema, file_format: str):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._sink = None
+        if file_format == "parquet":
+            self._writer = pq.ParquetWriter(self.tmp_path, schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(self.tmp_path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, schema)
+
+    def write(self, batch) -> None:
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+    def commit(self) -> None:
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self) -> None:
+        for path in (self.tmp_path, self.path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _batches(table: ExportTable, start, end, batch_size: int) -> Iterator[tuple]:
+    """Yield (partition date, rows), each batch within a single date partition."""
+    timestamp = table.timestamp_field
+    queryset = table.model.objects.filter(**{f"{timestamp}__lte": end})
+    if start is not None:
+        queryset = queryset.filter(**{f"{timestamp}__gt": start})
+    queryset = queryset.order_by(timestamp, "pk").values_list(*table.columns)
+
+    ts_index = table.columns.index(timestamp)
+    rows, partition = [], None
+    # iterator() streams through a server-side cursor on PostgreSQL
+    for row in queryset.iterator(chunk_size=batch_size):
+        row_partition = row[ts_index].astimezone(dt_timezone.utc).date().isoformat()
+        if rows and (row_partition != partition or len(rows) >= batch_size):
+            yield partition, rows
+            rows = []
+        partition = row_partition
+        rows.append(row)
+    if rows:
+        yield partition, rows
+
+
+def _to_record_batch(schema, rows: list):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(column, type=schema.field(index).type)
+            for index, column in enumerate(columns)
+        ],
+        schema=schema,
+    )
+
+
+def export_table(
+    name: str,
+    file_format: str = "parquet",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    full: bool = False,
+    output_dir: Optional[str] = None,
+) -> Dict[str, object]:
+    """
+    Export new rows of one table and advance its watermark.
+
+    Args:
+        name: Key of EXPORT_TABLES
+        file_format: 'parquet' or 'arrow' (Arrow IPC file)
+        batch_size: Rows per record batch (bounds memory use)
+        full: Ignore the watermark and export everything
+        output_dir: Root directory (default: settings.ANALYTICS_EXPORT_DIR)
+
+    Returns:
+        Summary with the row count, files written and the new watermark
+    """
+    _require_pyarrow()
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    table = EXPORT_TABLES[name]
+    schema = table.schema()
+
+    watermark = ExportWatermark.objects.filter(table=name).first()
+    start = None if full or watermark is None else watermark.exported_through
+    end = timezone.now() - table.settle
+
+    run_id = f"{timezone.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    root = os.path.join(output_dir or _export_dir(), name)
+
+    writers: List[_PartitionWriter] = []
+    writer, partition, rows_written = None, None, 0
+    try:
+        for batch_partition, rows in _batches(table, start, end, batch_size):
+            if batch_partition != partition:
+                if writer is not None:
+                    writer.close()
+                partition = batch_partition
+                writer = _PartitionWriter(
+                    os.path.join(
+                        root,
+                        f"date={partition}",
+                        f"part-{run_id}{FORMATS[file_format]}",
+                    ),
+                    schema,
+                    file_format,
+                )
+                writers.append(writer)
+            writer.write(_to_record_batch(schema, rows))
+            rows_written += len(rows)
+        if writer is not None:
+            writer.close()
+    except Exception:
+        for partial in writers:
+            try:
+                partial.close()
+            except Exception:
+                pass
+            partial.discard()
+        raise
+
+    # Publish files only once every partition has been written
+    for finished in writers:
+        finished.commit()
+
+    ExportWatermark.objects.update_or_create(
+        table=name,
+        defaults={
+            "exported_through": end,
+            "rows_exported": (watermark.rows_exported if watermark else 0)
+            + rows_written,
+        },
+    )
+    logger.info(
+        f"Exported {rows_written} {name} row(s) to {len(writers)} file(s) "
+        f"through {end.isoformat()}"
+    )
+    return {
+        "table": name,
+        "rows": rows_written,
+        "files": [finished.path for finished in writers],
+        "exported_through": end.isoformat(),
+    }
+
+
+def export_all(**options) -> List[Dict[str, object]]:
+    """Run export_table() for every table in EXPORT_TABLES."""
+    return [export_table(name, **options) for name in EXPORT_TABLES]
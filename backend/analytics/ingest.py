@@ -0,0 +1,429 @@
+"""
+Buffered page-view ingestion.
+
+AnalyticsMiddleware records each page view as a compact event and returns
+immediately; nothing is written to the database on the request path. Events
+are persisted in batches by flush_page_views(), which bulk-creates PageView
+rows and upserts the matching VisitorSession counters.
+
+With Redis, events are appended to a capped stream and drained by the
+flush_page_view_events Celery task through a consumer group, so a crashed
+flush is retried (delivery is at-least-once). Without Redis (LocMemCache in
+development) events go to a bounded in-process ring buffer drained by a
+daemon thread.
+
+An event that cannot be stored (malformed, or rejected by the database) must
+not block the ones behind it. When a batch fails with such an error its
+events are written one at a time; those that still fail are moved to a
+capped dead-letter stream (or logged and dropped without Redis) and the
+batch is acknowledged. Other errors, such as the database being down, leave
+the batch queued for the next flush.
+
+Session expiry (30 minutes of inactivity) is tracked with a per-session
+"last seen" key instead of a VisitorSession lookup.
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+
+from utils.redis_client import get_redis_client
+
+from .classification import classify_pageview
+from .models import PageView, VisitorSession
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "aaa:analytics:pageviews"
+DEAD_LETTER_KEY = "aaa:analytics:pageviews:dead"
+DEAD_LETTER_MAXLEN = 10000
+CONSUMER_GROUP = "pageview-flusher"
+CONSUMER_NAME = "flusher"
+SESSION_SEEN_PREFIX = "aaa:analytics:seen:"
+
+SESSION_TIMEOUT_SECONDS = 1800  # 30 minutes of inactivity
+
+# Errors caused by the events themselves; retrying them can never succeed
+EVENT_ERRORS = (DataError, IntegrityError, KeyError, TypeError, ValueError)
+
+
+def _setting(name: str, default: int) -> int:
+    return getattr(settings, name, default)
+
+
+def build_event(
+    session_id: str,
+    page_path: str,
+    page_title: str = "",
+    ip_address: Optional[str] = None,
+    user_agent: str = "",
+    referrer: str = "",
+    user_id: Optional[int] = None,
+    timestamp: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Build a compact page-view event (short keys keep the stream small)."""
+    return {
+        "s": session_id,
+        "p": page_path[:500],
+        "t": page_title[:200],
+        "i": ip_address,
+        "a": user_agent,
+        "r": referrer[:500],
+        "u": user_id,
+        "ts": timestamp or time.time(),
+    }
+
+
+class LocalEventBuffer:
+    """Bounded in-process ring buffer drained by a daemon thread."""
+
+    def __init__(self):
+        self._events = deque(maxlen=_setting("ANALYTICS_BUFFER_SIZE", 10000))
+        self._last_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def touch_session(self, session_id: str, now: float) -> Optional[float]:
+        """Record activity for ``session_id`` and return its previous timestamp."""
+        with self._lock:
+            previous = self._last_seen.get(session_id)
+            self._last_seen[session_id] = now
+        return previous
+
+    def push(self, event: Dict[str, Any]) -> None:
+        # A full buffer drops its oldest events rather than blocking requests
+        self._events.append(event)
+        self._ensure_flusher()
+
+    def drain(self, limit: int) -> List[Dict[str, Any]]:
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._events.popleft())
+            except IndexError:
+                break
+        return events
+
+    def restore(self, events: List[Dict[str, Any]]) -> None:
+        self._events.extendleft(reversed(events))
+
+    def prune_sessions(self, now: float) -> None:
+        cutoff = now - SESSION_TIMEOUT_SECONDS
+        with self._lock:
+            self._last_seen = {
+                sid: seen for sid, seen in self._last_seen.items() if seen >= cutoff
+            }
+
+    def _ensure_flusher(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="pageview-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        interval = _setting("ANALYTICS_FLUSH_INTERVAL", 5)
+        while True:
+            time.sleep(interval)
+            try:
+                flush_page_views()
+            except Exception:
+                logger.exception("Page view flush failed")
+
+
+local_buffer = LocalEventBuffer()
+
+
+def record_page_view(
+    session_id: Optional[str], new_session: str, **fields
+) -> Tuple[str, bool]:
+    """
+    Queue a page view for ``session_id``.
+
+    Args:
+        session_id: Session from the visitor's cookie, if any
+        new_session: Session ID to use if ``session_id`` is missing or expired
+        **fields: Event fields accepted by build_event()
+
+    Returns:
+        (session_id used, whether the session was rotated)
+    """
+    now = time.time()
+    client = get_redis_client()
+
+    if client is None:
+        rotated = True
+        if session_id:
+            previous = local_buffer.touch_session(session_id, now)
+            rotated = previous is None or now - previous > SESSION_TIMEOUT_SECONDS
+        if rotated:
+            session_id = new_session
+            local_buffer.touch_session(session_id, now)
+        local_buffer.push(build_event(session_id, timestamp=now, **fields))
+        return session_id, rotated
+
+    # A missing "last seen" key means the session expired (or was never seen)
+    rotated = not session_id
+    if session_id and not client.exists(f"{SESSION_SEEN_PREFIX}{session_id}"):
+        rotated = True
+    if rotated:
+        session_id = new_session
+
+    pipe = client.pipeline(transaction=False)
+    pipe.set(f"{SESSION_SEEN_PREFIX}{session_id}", 1, ex=SESSION_TIMEOUT_SECONDS)
+    pipe.xadd(
+        STREAM_KEY,
+        {"e": json.dumps(build_event(session_id, timestamp=now, **fields))},
+        maxlen=_setting("ANALYTICS_STREAM_MAXLEN", 100000),
+        approximate=True,
+    )
+    pipe.execute()
+    return session_id, rotated
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+def write_events(events: List[Dict[str, Any]]) -> int:
+    """
+    Persist a batch of events.
+
+    Creates one PageView per event and updates VisitorSession counters with
+    one query per kind of change, inside a single transaction.
+
+    Returns:
+        Number of page views written
+    """
+    if not events:
+        return 0
+
+    page_views = []
+    sessions: Dict[str, Dict[str, Any]] = {}
+    for event in sorted(events, key=lambda e: e["ts"]):
+        viewed_at = _to_datetime(event["ts"])
+        page_views.append(
+            PageView(
+                page_path=event["p"],
+                page_title=event.get("t") or "",
+                ip_address=event.get("i") or None,
+                user_agent=event.get("a") or "",
+                referrer=event.get("r") or "",
+                session_id=event["s"],
+                user_id=event.get("u"),
+                viewed_at=viewed_at,
+                **classify_pageview(event["p"], event.get("r"), event.get("a")),
+            )
+        )
+
+        session = sessions.setdefault(
+            event["s"],
+            {
+                "first": viewed_at,
+                "count": 0,
+                "ip_address": event.get("i") or None,
+                "user_agent": event.get("a") or "",
+                "user_id": None,
+            },
+        )
+        session["count"] += 1
+        session["last"] = viewed_at
+        session["user_id"] = event.get("u") or session["user_id"]
+
+    with transaction.atomic():
+        PageView.objects.bulk_create(page_views, batch_size=500)
+
+        existing = {
+            session.session_id: session
+            for session in VisitorSession.objects.filter(session_id__in=list(sessions))
+        }
+
+        to_create = []
+        for session_id, data in sessions.items():
+            session = existing.get(session_id)
+            if session is None:
+                to_create.append(
+                    VisitorSession(
+                        session_id=session_id,
+                        ip_address=data["ip_address"],
+                        user_agent=data["user_agent"],
+                        user_id=data["user_id"],
+                        first_visit=data["first"],
+                        last_activity=data["last"],
+                        page_views_count=data["count"],
+                        # Like a session that has seen a single page view so
+                        # far, leave the duration unset rather than 0
+                        duration_seconds=(
+                            int((data["last"] - data["first"]).total_seconds())
+                            if data["count"] > 1
+                            else None
+                        ),
+                    )
+                )
+                continue
+
+            session.page_views_count += data["count"]
+            session.last_activity = max(session.last_activity, data["last"])
+            session.duration_seconds = int(
+                (session.last_activity - session.first_visit).total_seconds()
+            )
+            # Update user if they logged in during this session
+            if data["user_id"] and not session.user_id:
+                session.user_id = data["user_id"]
+
+        VisitorSession.objects.bulk_create(to_create, batch_size=500)
+        VisitorSession.objects.bulk_update(
+            existing.values(),
+            ["page_views_count", "last_activity", "duration_seconds", "user"],
+            batch_size=500,
+        )
+
+    return len(page_views)
+
+
+def write_events_isolating(
+    events: List[Dict[str, Any]],
+) -> Tuple[int, List[Tuple[Dict[str, Any], Exception]]]:
+    """
+    Persist a batch of events, setting aside the ones that cannot be stored.
+
+    The batch is written with write_events(); if that fails because of the
+    data, each event is written on its own.
+
+    Returns:
+        (number of page views written, [(rejected event, error), ...])
+    """
+    try:
+        return write_events(events), []
+    except EVENT_ERRORS as e:
+        logger.warning(
+            f"Writing {len(events)} page view events failed ({e}); "
+            "retrying them one by one"
+        )
+
+    written, rejected = 0, []
+    for event in events:
+        try:
+            written += write_events([event])
+        except EVENT_ERRORS as e:
+            rejected.append((event, e))
+    return written, rejected
+
+
+def _dead_letter(pipe, entry_id, payload, error: Exception) -> None:
+    logger.error(f"Moving page view event {entry_id} to {DEAD_LETTER_KEY}: {error}")
+    pipe.xadd(
+        DEAD_LETTER_KEY,
+        {
+            "id": entry_id,
+            "e": payload,
+            "error": f"{type(error).__name__}: {error}"[:500],
+        },
+        maxlen=DEAD_LETTER_MAXLEN,
+        approximate=True,
+    )
+
+
+def _ensure_group(client) -> None:
+    try:
+        client.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id="0", mkstream=True)
+    except Exception as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _flush_stream(client, batch_size: int) -> int:
+    _ensure_group(client)
+    written = 0
+    # Re-deliver entries read by a flush that never acknowledged them first
+    stream_id = "0"
+    while True:
+        response = client.xreadgroup(
+            CONSUMER_GROUP, CONSUMER_NAME, {STREAM_KEY: stream_id}, count=batch_size
+        )
+        entries = response[0][1] if response else []
+        if not entries:
+            if stream_id == "0":
+                stream_id = ">"
+                continue
+            return written
+
+        pipe = client.pipeline(transaction=False)
+        ids, events, sources = [], [], {}
+        for entry_id, fields in entries:
+            ids.append(entry_id)
+            payload = fields.get(b"e", b"")
+            try:
+                event = json.loads(payload)
+            except ValueError as e:
+                _dead_letter(pipe, entry_id, payload, e)
+                continue
+            events.append(event)
+            sources[id(event)] = (entry_id, payload)
+
+        batch_written, rejected = write_events_isolating(events)
+        written += batch_written
+        for event, error in rejected:
+            _dead_letter(pipe, *sources[id(event)], error)
+        pipe.xack(STREAM_KEY, CONSUMER_GROUP, *ids)
+        pipe.xdel(STREAM_KEY, *ids)
+        pipe.execute()
+
+
+def _flush_local(batch_size: int) -> int:
+    written = 0
+    while True:
+        events = local_buffer.drain(batch_size)
+        if not events:
+            break
+        try:
+            batch_written, rejected = write_events_isolating(events)
+        except Exception:
+            # Not caused by the events (e.g. the database is down); retry them
+            # on the next flush
+            local_buffer.restore(events)
+            raise
+        written += batch_written
+        for event, error in rejected:
+            logger.error(f"Dropping page view event {event!r}: {error}")
+    local_buffer.prune_sessions(time.time())
+    return written
+
+
+def flush_page_views() -> int:
+    """
+    Persist every queued page-view event.
+
+    Returns:
+        Number of page views written
+    """
+    batch_size = _setting("ANALYTICS_FLUSH_BATCH_SIZE", 500)
+    client = get_redis_client()
+    if client is None:
+        return _flush_local(batch_size)
+    return _flush_stream(client, batch_size)
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    if len(local_buffer):
+        try:
+            _flush_local(_setting("ANALYTICS_FLUSH_BATCH_SIZE", 500))
+        except Exception:
+            logger.exception("Page view flush at shutdown failed")
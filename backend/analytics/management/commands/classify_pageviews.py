@@ -0,0 +1,55 @@
+"""
+Management command to backfill page-view classification columns.
+
+Fills traffic_source, device_type and is_public_page for page views recorded
+before they were classified at ingest time. Rows are updated in primary-key
+batches so each UPDATE stays short.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from analytics.classification import classify_unclassified
+from analytics.models import PageView
+
+
+class Command(BaseCommand):
+    help = "Classify page views that have no traffic source/device/public flag"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per UPDATE (default: 5000)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show how many rows would be classified without changing them",
+        )
+
+    def handle(self, *args, **options):
+        unclassified = PageView.objects.filter(traffic_source="")
+        count = unclassified.count()
+
+        if count == 0:
+            self.stdout.write(self.style.SUCCESS("All page views are classified."))
+            return
+
+        self.stdout.write(f"Found {count} unclassified page view(s).")
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("DRY RUN - No changes will be made"))
+            return
+
+        bounds = unclassified.aggregate(low=Min("pk"), high=Max("pk"))
+        batch_size = options["batch_size"]
+        updated = 0
+        for start in range(bounds["low"], bounds["high"] + 1, batch_size):
+            updated += classify_unclassified(
+                PageView.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+            )
+            self.stdout.write(f"  {updated}/{count} classified", ending="\r")
+
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(f"✅ Classified {updated} page view(s)."))
@@ -0,0 +1,68 @@
+"""
+Management command to purge raw analytics traffic past its retention window.
+
+Days are rolled up before their raw rows are deleted, so dashboards keep
+their history. Deletes run in batches with a pause between them.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.retention import (
+    DEFAULT_BATCH_PAUSE,
+    DEFAULT_BATCH_SIZE,
+    purge_raw_traffic,
+)
+
+
+class Command(BaseCommand):
+    help = "Roll up and delete raw page views/sessions older than the retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            help="Days of raw traffic to keep (default: ANALYTICS_RAW_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Rows deleted per batch (default: {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=DEFAULT_BATCH_PAUSE,
+            help=f"Seconds to wait between batches (default: {DEFAULT_BATCH_PAUSE})",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show how many rows would be deleted without deleting them",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = purge_raw_traffic(
+                retention_days=options["retention_days"],
+                batch_size=options["batch_size"],
+                pause=options["pause"],
+                dry_run=options["dry_run"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("DRY RUN - No changes will be made"))
+            self.stdout.write(
+                f"Would delete {result['page_views']} page view(s) and "
+                f"{result['sessions']} session(s)."
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Deleted {result['page_views']} page view(s) and "
+                f"{result['sessions']} session(s)."
+            )
+        )
@@ -0,0 +1,45 @@
+"""
+Management command to rebuild the materialized booking/inquiry trend counters.
+
+Recomputes DailyEventCount rows from the Claim, Inquiry and CarPurchaseRequest
+tables. Use it after bulk imports or other writes that bypass model signals.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from analytics.trends import TREND_METRICS, rebuild_event_counts
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily trend counters for bookings, inquiries and purchase requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Only rebuild the last N days (default: all history)",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+
+        if options["days"]:
+            start = today - timedelta(days=options["days"] - 1)
+        else:
+            firsts = [
+                model.objects.aggregate(first=Min(field))["first"]
+                for model, field, _ in TREND_METRICS.values()
+            ]
+            firsts = [value for value in firsts if value]
+            if not firsts:
+                self.stdout.write(self.style.WARNING("No source rows to count"))
+                return
+            start = timezone.localtime(min(firsts)).date()
+
+        self.stdout.write(f"📈 Rebuilding trend counters from {start} to {today}...")
+        rows = rebuild_event_counts(start, today)
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote {rows} counter row(s)"))
@@ -0,0 +1,63 @@
+"""
+Management command to build the web analytics rollup tables.
+
+Without arguments, continues from the stored watermark like the periodic
+Celery task. Use --days or --start/--end to rebuild a historical range.
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.rollups import backfill_rollups, refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Aggregate page views and sessions into daily/hourly rollups"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Rebuild the last N days (including today)",
+        )
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="First day to rebuild (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            help="Last day to rebuild (YYYY-MM-DD, default: today)",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start = options["start"]
+        end = options["end"] or today
+
+        if options["days"]:
+            start = today - timedelta(days=options["days"] - 1)
+            end = today
+
+        if start is None:
+            if options["end"]:
+                raise CommandError("--end requires --start")
+            days = refresh_rollups()
+        else:
+            if start > end:
+                raise CommandError("--start must not be after --end")
+            self.stdout.write(f"📊 Rebuilding rollups from {start} to {end}...")
+            days = backfill_rollups(start, end)
+
+        if not days:
+            self.stdout.write(self.style.WARNING("No days to aggregate"))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Aggregated {len(days)} day(s): {days[0]} to {days[-1]}"
+            )
+        )
@@ -1,21 +1,43 @@
+import ipaddress
 import logging
 import uuid
 from typing import Optional
 
 from django.conf import settings
-from django.utils import timezone
+from django.core.exceptions import MiddlewareNotUsed
 
 from accounts.models import User
 
-from .models import ActivityLog, PageView, VisitorSession
+from .audit import queue_activity
+from .ingest import record_page_view
 
 logger = logging.getLogger(__name__)
 
 
+def client_ip(request) -> Optional[str]:
+    """
+    Client IP address from X-Forwarded-For or REMOTE_ADDR.
+
+    Returns None unless the value is a valid address, since the header is
+    client-controlled and the address is stored in an inet column.
+    """
+    x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(",")[0].strip()
+    else:
+        ip = request.META.get("REMOTE_ADDR", "")
+    try:
+        return str(ipaddress.ip_address(ip))
+    except ValueError:
+        return None
+
+
 class AnalyticsMiddleware:
     """Middleware to track page views and sessions"""
 
     def __init__(self, get_response):
+        if not getattr(settings, "ANALYTICS_TRACKING_ENABLED", False):
+            raise MiddlewareNotUsed
         self.get_response = get_response
 
     def __call__(self, request):
@@ -73,87 +95,33 @@ class AnalyticsMiddleware:
         # Track homepage and all other pages (normalize homepage path)
         page_path = request.path if request.path != "/" else "/home"
 
-        # Get or create session ID
-        session_id = request.COOKIES.get("analytics_session")
-
-        # Check for session expiration (30 minutes of inactivity)
-        if session_id:
-            try:
-                last_session = VisitorSession.objects.filter(
-                    session_id=session_id
-                ).first()
-                if last_session:
-                    time_since_activity = timezone.now() - last_session.last_activity
-                    if time_since_activity.total_seconds() > 1800:  # 30 minutes
-                        session_id = None  # Force new session
-            except Exception:
-                session_id = None
-
-        if not session_id:
-            session_id = str(uuid.uuid4())
-            request.session_was_rotated = True  # Flag to ensure cookie is set
-
-        # Get user info
+        # Run the view first so request.user and any page_title are populated
+        response = self.get_response(request)
+
+        cookie_session = request.COOKIES.get("analytics_session")
         user = getattr(request, "user", None)
         if user is not None and not getattr(user, "is_authenticated", False):
             user = None
 
-        # Track page view (wrap in try-except to prevent errors from breaking requests)
+        # Queue the page view; it is written to the database in batches
+        # (wrap in try-except to prevent errors from breaking requests)
         try:
-            PageView.objects.create(
+            session_id, rotated = record_page_view(
+                cookie_session,
+                str(uuid.uuid4()),
                 page_path=page_path,
                 page_title=getattr(request, "page_title", ""),
                 ip_address=self.get_client_ip(request),
                 user_agent=request.META.get("HTTP_USER_AGENT", ""),
                 referrer=request.META.get("HTTP_REFERER", ""),
-                session_id=session_id,
-                user=user,
+                user_id=user.pk if user else None,
             )
         except Exception as e:
-            logger.error(f"Failed to create page view: {e}")
-
-        # Update or create session
-        now = timezone.now()
-        session, created = VisitorSession.objects.get_or_create(
-            session_id=session_id,
-            defaults={
-                "ip_address": self.get_client_ip(request),
-                "user_agent": request.META.get("HTTP_USER_AGENT", ""),
-                "user": user,
-                "first_visit": now,
-                "last_activity": now,
-                "page_views_count": 1,
-            },
-        )
-
-        if not created:
-            # Calculate session duration (time since first visit)
-            # Only update duration if this is logically the same session (which it is, because we filtered expired ones above)
-            if session.first_visit:
-                duration = int((now - session.first_visit).total_seconds())
-                session.duration_seconds = duration
-
-            session.last_activity = now
-            session.page_views_count += 1
-
-            # Update user if they logged in during this session
-            if user and not session.user:
-                session.user = user
-
-            session.save(
-                update_fields=[
-                    "last_activity",
-                    "page_views_count",
-                    "user",
-                    "duration_seconds",
-                ]
-            )
+            logger.error(f"Failed to queue page view: {e}")
+            return response
 
         # Add session cookie to response
-        response = self.get_response(request)
-        if not request.COOKIES.get("analytics_session") or getattr(
-            request, "session_was_rotated", False
-        ):
+        if rotated:
             response.set_cookie(
                 "analytics_session",
                 session_id,
@@ -170,12 +138,7 @@ class AnalyticsMiddleware:
 
     def get_client_ip(self, request):
         """Get client IP address"""
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(",")[0]
-        else:
-            ip = request.META.get("REMOTE_ADDR")
-        return ip
+        return client_ip(request)
 
 
 class AdminActivityMiddleware:
@@ -226,11 +189,11 @@ class AdminActivityMiddleware:
         if not activity_type:
             return
 
-        description = self._build_description(request)
-        ActivityLog.objects.create(
+        # Written in batches off the response path
+        queue_activity(
             user=user,
             activity_type=activity_type,
-            description=description,
+            description=self._build_description(request),
             ip_address=self._get_client_ip(request),
         )
 
@@ -282,7 +245,4 @@ class AdminActivityMiddleware:
 
     @staticmethod
     def _get_client_ip(request):
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            return x_forwarded_for.split(",")[0]
-        return request.META.get("REMOTE_ADDR", "")
+        return client_ip(request)
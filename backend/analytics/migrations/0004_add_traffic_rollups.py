@@ -0,0 +1,158 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "analytics",
+            "0003_rename_analytics_a_recipie_idx_analytics_a_recipie_304567_idx_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyTrafficRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("page_views", models.PositiveIntegerField(default=0)),
+                ("public_page_views", models.PositiveIntegerField(default=0)),
+                ("authenticated_visitors", models.PositiveIntegerField(default=0)),
+                ("anonymous_visitors", models.PositiveIntegerField(default=0)),
+                ("sessions", models.PositiveIntegerField(default=0)),
+                (
+                    "valid_sessions",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Sessions with at least one page view"
+                    ),
+                ),
+                ("valid_session_page_views", models.PositiveIntegerField(default=0)),
+                ("bounce_sessions", models.PositiveIntegerField(default=0)),
+                ("returning_sessions", models.PositiveIntegerField(default=0)),
+                (
+                    "timed_sessions",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Valid sessions with a duration under 24 hours",
+                    ),
+                ),
+                ("total_duration_seconds", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["-date"],
+            },
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                (
+                    "processed_through",
+                    models.DateField(
+                        help_text="Last day (inclusive) that has been aggregated"
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailyBreakdownRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("page", "Page"),
+                            ("source", "Traffic Source"),
+                            ("device", "Device"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(
+                        help_text="Page path, source or device", max_length=500
+                    ),
+                ),
+                (
+                    "label",
+                    models.CharField(
+                        blank=True, help_text="Page title", max_length=200
+                    ),
+                ),
+                ("page_views", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["-date", "dimension", "-page_views"],
+                "indexes": [
+                    models.Index(
+                        fields=["dimension", "date"],
+                        name="analytics_d_dimensi_86d647_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "dimension", "key", "label"),
+                        name="unique_daily_breakdown_rollup",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="HourlyTrafficRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("hour", models.PositiveSmallIntegerField()),
+                ("page_views", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["-date", "hour"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "hour"), name="unique_hourly_traffic_rollup"
+                    )
+                ],
+            },
+        ),
+    ]
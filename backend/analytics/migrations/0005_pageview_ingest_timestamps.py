@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0004_add_traffic_rollups"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="pageview",
+            name="viewed_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name="visitorsession",
+            name="first_visit",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name="visitorsession",
+            name="last_activity",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
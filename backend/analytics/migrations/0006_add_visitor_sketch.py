@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0005_pageview_ingest_timestamps"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailytrafficrollup",
+            name="visitor_sketch",
+            field=models.BinaryField(
+                blank=True,
+                default=b"",
+                help_text="HyperLogLog registers of the day's visitors (utils.hyperloglog)",
+            ),
+        ),
+    ]
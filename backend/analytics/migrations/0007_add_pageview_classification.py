@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0006_add_visitor_sketch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pageview",
+            name="device_type",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("Desktop", "Desktop"),
+                    ("Mobile", "Mobile"),
+                    ("Tablet", "Tablet"),
+                    ("Unknown", "Unknown"),
+                ],
+                db_index=True,
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="pageview",
+            name="is_public_page",
+            field=models.BooleanField(db_index=True, default=True),
+        ),
+        migrations.AddField(
+            model_name="pageview",
+            name="traffic_source",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("Direct", "Direct"),
+                    ("Search", "Search"),
+                    ("Social", "Social"),
+                    ("Email", "Email"),
+                    ("Referral", "Referral"),
+                ],
+                db_index=True,
+                max_length=10,
+            ),
+        ),
+    ]
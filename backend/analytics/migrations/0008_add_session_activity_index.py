@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0007_add_pageview_classification"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="visitorsession",
+            index=models.Index(
+                fields=["last_activity"], name="analytics_v_last_ac_ad2612_idx"
+            ),
+        ),
+    ]
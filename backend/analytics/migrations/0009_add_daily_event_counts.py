@@ -0,0 +1,77 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:05
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+TREND_SOURCES = [
+    ("bookings", "bookings", "Claim"),
+    ("inquiries", "inquiries", "Inquiry"),
+    ("purchase_requests", "car_sales", "CarPurchaseRequest"),
+]
+
+
+def backfill_event_counts(apps, schema_editor):
+    DailyEventCount = apps.get_model("analytics", "DailyEventCount")
+    rows = []
+    for metric, app_label, model_name in TREND_SOURCES:
+        model = apps.get_model(app_label, model_name)
+        daily = (
+            model.objects.annotate(day=TruncDate("created_at"))
+            .values("day")
+            .annotate(total=Count("id"))
+        )
+        rows += [
+            DailyEventCount(metric=metric, date=entry["day"], count=entry["total"])
+            for entry in daily
+        ]
+    DailyEventCount.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0008_add_session_activity_index"),
+        ("bookings", "0002_add_indexes"),
+        ("car_sales", "0003_add_indexes"),
+        ("inquiries", "0003_limit_inquiry_statuses"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyEventCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("bookings", "Bookings"),
+                            ("inquiries", "Inquiries"),
+                            ("purchase_requests", "Purchase Requests"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["metric", "date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("metric", "date"), name="unique_daily_event_count"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_event_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0009_add_daily_event_counts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("table", models.CharField(max_length=50, unique=True)),
+                (
+                    "exported_through",
+                    models.DateTimeField(
+                        help_text="Rows with a timestamp up to this point have been exported"
+                    ),
+                ),
+                ("rows_exported", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
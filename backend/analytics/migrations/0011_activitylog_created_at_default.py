@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:09
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0010_add_export_watermark"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="activitylog",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,11 +1,27 @@
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 
 
 class PageView(models.Model):
     """Track page views for analytics"""
 
+    TRAFFIC_SOURCE_CHOICES = [
+        ("Direct", "Direct"),
+        ("Search", "Search"),
+        ("Social", "Social"),
+        ("Email", "Email"),
+        ("Referral", "Referral"),
+    ]
+
+    DEVICE_TYPE_CHOICES = [
+        ("Desktop", "Desktop"),
+        ("Mobile", "Mobile"),
+        ("Tablet", "Tablet"),
+        ("Unknown", "Unknown"),
+    ]
+
     page_path = models.CharField(max_length=500)
     page_title = models.CharField(max_length=200, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
@@ -15,7 +31,17 @@ class PageView(models.Model):
     user = models.ForeignKey(
         "accounts.User", on_delete=models.SET_NULL, null=True, blank=True
     )
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    # Set explicitly by batched ingestion (analytics.ingest)
+    viewed_at = models.DateTimeField(default=timezone.now)
+
+    # Classified at ingest time (analytics.classification); blank = not yet classified
+    traffic_source = models.CharField(
+        max_length=10, choices=TRAFFIC_SOURCE_CHOICES, blank=True, db_index=True
+    )
+    device_type = models.CharField(
+        max_length=10, choices=DEVICE_TYPE_CHOICES, blank=True, db_index=True
+    )
+    is_public_page = models.BooleanField(default=True, db_index=True)
 
     class Meta:
         ordering = ["-viewed_at"]
@@ -32,8 +58,8 @@ class VisitorSession(models.Model):
     session_id = models.CharField(max_length=200, unique=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
-    first_visit = models.DateTimeField(auto_now_add=True)
-    last_activity = models.DateTimeField(auto_now=True)
+    first_visit = models.DateTimeField(default=timezone.now)
+    last_activity = models.DateTimeField(default=timezone.now)
     page_views_count = models.IntegerField(default=0)
     duration_seconds = models.IntegerField(null=True, blank=True)
     user = models.ForeignKey(
@@ -45,9 +71,152 @@ class VisitorSession(models.Model):
         indexes = [
             models.Index(fields=["session_id"]),
             models.Index(fields=["-first_visit"]),
+            models.Index(fields=["last_activity"]),
+        ]
+
+
+class DailyTrafficRollup(models.Model):
+    """Per-day traffic and session totals, aggregated from PageView/VisitorSession"""
+
+    date = models.DateField(unique=True)
+    page_views = models.PositiveIntegerField(default=0)
+    public_page_views = models.PositiveIntegerField(default=0)
+    authenticated_visitors = models.PositiveIntegerField(default=0)
+    anonymous_visitors = models.PositiveIntegerField(default=0)
+    # Sessions are attributed to the day of their last activity
+    sessions = models.PositiveIntegerField(default=0)
+    valid_sessions = models.PositiveIntegerField(
+        default=0, help_text="Sessions with at least one page view"
+    )
+    valid_session_page_views = models.PositiveIntegerField(default=0)
+    bounce_sessions = models.PositiveIntegerField(default=0)
+    returning_sessions = models.PositiveIntegerField(default=0)
+    timed_sessions = models.PositiveIntegerField(
+        default=0, help_text="Valid sessions with a duration under 24 hours"
+    )
+    total_duration_seconds = models.BigIntegerField(default=0)
+    visitor_sketch = models.BinaryField(
+        default=b"",
+        blank=True,
+        help_text="HyperLogLog registers of the day's visitors (utils.hyperloglog)",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-date"]
+
+    @property
+    def unique_visitors(self) -> int:
+        return self.authenticated_visitors + self.anonymous_visitors
+
+    def __str__(self):
+        return f"Traffic rollup {self.date}"
+
+
+class HourlyTrafficRollup(models.Model):
+    """Page views per hour of day"""
+
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    page_views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date", "hour"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "hour"], name="unique_hourly_traffic_rollup"
+            ),
         ]
 
 
+class DailyBreakdownRollup(models.Model):
+    """Per-day page view counts by page, traffic source or device class"""
+
+    DIMENSION_PAGE = "page"
+    DIMENSION_SOURCE = "source"
+    DIMENSION_DEVICE = "device"
+
+    DIMENSION_CHOICES = [
+        (DIMENSION_PAGE, "Page"),
+        (DIMENSION_SOURCE, "Traffic Source"),
+        (DIMENSION_DEVICE, "Device"),
+    ]
+
+    date = models.DateField()
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=500, help_text="Page path, source or device")
+    label = models.CharField(max_length=200, blank=True, help_text="Page title")
+    page_views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date", "dimension", "-page_views"]
+        indexes = [
+            models.Index(fields=["dimension", "date"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "dimension", "key", "label"],
+                name="unique_daily_breakdown_rollup",
+            ),
+        ]
+
+
+class DailyEventCount(models.Model):
+    """Per-day count of business events, maintained for dashboard trend charts"""
+
+    METRIC_BOOKINGS = "bookings"
+    METRIC_INQUIRIES = "inquiries"
+    METRIC_PURCHASE_REQUESTS = "purchase_requests"
+
+    METRIC_CHOICES = [
+        (METRIC_BOOKINGS, "Bookings"),
+        (METRIC_INQUIRIES, "Inquiries"),
+        (METRIC_PURCHASE_REQUESTS, "Purchase Requests"),
+    ]
+
+    metric = models.CharField(max_length=30, choices=METRIC_CHOICES)
+    date = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["metric", "date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["metric", "date"], name="unique_daily_event_count"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} on {self.date}: {self.count}"
+
+
+class RollupWatermark(models.Model):
+    """Progress marker for an incremental aggregation pipeline"""
+
+    name = models.CharField(max_length=50, unique=True)
+    processed_through = models.DateField(
+        help_text="Last day (inclusive) that has been aggregated"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} through {self.processed_through}"
+
+
+class ExportWatermark(models.Model):
+    """Incremental export progress for one table (analytics.export)"""
+
+    table = models.CharField(max_length=50, unique=True)
+    exported_through = models.DateTimeField(
+        help_text="Rows with a timestamp up to this point have been exported"
+    )
+    rows_exported = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.table} exported through {self.exported_through}"
+
+
 class ActivityLog(models.Model):
     """Log user activities for dashboard and notifications"""
 
@@ -142,7 +311,8 @@ class ActivityLog(models.Model):
     expires_at = models.DateTimeField(
         null=True, blank=True, help_text="Optional expiration date for the notification"
     )
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the entry is queued, not when it is written (analytics.audit)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["-created_at"]
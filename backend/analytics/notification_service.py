@@ -1,15 +1,106 @@
 """
 Helper service for creating notifications (ActivityLog entries with recipient).
+
+Each recipient's unread count is kept in the cache (Redis in production) so
+polling it is a single GET. The counter is adjusted atomically as
+notifications are created, read or deleted, recomputed from the database on a
+miss, and reconciled periodically by the reconcile_notification_counts task
+(which also catches notifications that have expired).
 """
 
-from typing import Optional
+from typing import Dict, Optional
 
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
 
 from accounts.models import User
+from utils.cache import get_cache_key
 
 from .models import ActivityLog
 
+UNREAD_COUNT_CACHE_PREFIX = "notification_unread_count"
+# Counters expire so drift (e.g. expired notifications) never outlives this
+UNREAD_COUNT_TIMEOUT = 60 * 30
+
+
+def _unread_count_key(user_id: int) -> str:
+    return get_cache_key(UNREAD_COUNT_CACHE_PREFIX, user_id)
+
+
+def _unread_filter() -> Q:
+    return Q(is_read=False) & (
+        Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+    )
+
+
+def counts_as_unread(notification: ActivityLog) -> bool:
+    """Whether ``notification`` is included in its recipient's unread count."""
+    return not notification.is_read and (
+        notification.expires_at is None or notification.expires_at > timezone.now()
+    )
+
+
+def get_unread_count(user_id: int) -> int:
+    """Return the unread notification count for ``user_id``."""
+    count = cache.get(_unread_count_key(user_id))
+    if count is None:
+        count = ActivityLog.objects.filter(
+            _unread_filter(), recipient_id=user_id
+        ).count()
+        # add() rather than set(): don't overwrite a counter created meanwhile
+        cache.add(_unread_count_key(user_id), count, UNREAD_COUNT_TIMEOUT)
+    return max(count, 0)
+
+
+def adjust_unread_count(user_id: int, delta: int) -> None:
+    """
+    Atomically add ``delta`` to a cached unread count.
+
+    Applied once the current transaction commits. A counter that is not
+    cached is left alone; it is recomputed on the next read.
+    """
+
+    def apply():
+        try:
+            cache.incr(_unread_count_key(user_id), delta)
+        except ValueError:
+            pass
+
+    transaction.on_commit(apply)
+
+
+def reset_unread_count(user_id: int) -> None:
+    """Set a recipient's unread count to zero (after marking everything read)."""
+    transaction.on_commit(
+        lambda: cache.set(_unread_count_key(user_id), 0, UNREAD_COUNT_TIMEOUT)
+    )
+
+
+def reconcile_unread_counts() -> Dict[int, int]:
+    """
+    Recompute every admin's unread count from the database.
+
+    Returns:
+        Mapping of user ID to unread count
+    """
+    admin_ids = User.objects.filter(
+        admin_type__in=[User.ROLE_ADMIN, User.ROLE_SUPER_ADMIN]
+    ).values_list("id", flat=True)
+    counts = {user_id: 0 for user_id in admin_ids}
+    counts.update(
+        ActivityLog.objects.filter(_unread_filter(), recipient__isnull=False)
+        .values_list("recipient_id")
+        .annotate(total=Count("id"))
+    )
+    cache.set_many(
+        {_unread_count_key(user_id): count for user_id, count in counts.items()},
+        UNREAD_COUNT_TIMEOUT,
+    )
+    return counts
+
 
 def create_notification(
     recipient: User,
@@ -58,6 +149,8 @@ def create_notification(
         object_id=object_id,
         expires_at=expires_at,
     )
+    if counts_as_unread(notification):
+        adjust_unread_count(recipient.pk, 1)
 
     return notification
 
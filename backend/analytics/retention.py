@@ -0,0 +1,113 @@
+"""
+Retention for raw traffic tables.
+
+Raw PageView and VisitorSession rows are only needed until their day has been
+aggregated into the rollup tables (analytics.rollups). purge_raw_traffic()
+makes sure every day before the retention cutoff is rolled up, then deletes
+the raw rows in small primary-key batches with a pause between batches, so
+the purge never holds long locks or floods the WAL. The rollups stay forever,
+which keeps table size and query time bounded however old the site gets.
+
+The purge is recorded in a RollupWatermark so those days are never
+re-aggregated from the (now missing) raw rows.
+
+PageView is not a PostgreSQL partitioned table. Django 5.2 can model the
+(id, viewed_at) key that partitioning requires (models.CompositePrimaryKey),
+but it cannot migrate an existing table to a composite primary key or to
+PARTITION BY. The switch would be a hand-written copy-and-swap of the
+table, plus a job creating partitions ahead of time. With a composite key
+``pk`` also becomes a tuple, which breaks the integer pk batching used here
+and in classify_pageviews. Partitions would only make dropping old rows
+cheaper; the batched purge already keeps the table bounded.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PageView, RollupWatermark, VisitorSession
+from .rollups import TRAFFIC_PURGE, TRAFFIC_ROLLUP, day_bounds, refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_BATCH_PAUSE = 0.1
+
+
+def _delete_in_batches(queryset, batch_size: int, pause: float) -> int:
+    deleted = 0
+    while True:
+        batch = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        # No cascades or delete signals, so this is a single fast DELETE
+        deleted += queryset.model.objects.filter(pk__in=batch).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+
+def purge_raw_traffic(
+    retention_days: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    pause: float = DEFAULT_BATCH_PAUSE,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Delete raw traffic older than ``retention_days`` after rolling it up.
+
+    Args:
+        retention_days: Days of raw rows to keep (default:
+            settings.ANALYTICS_RAW_RETENTION_DAYS)
+        batch_size: Rows deleted per statement
+        pause: Seconds to sleep between batches
+        dry_run: Only count what would be deleted
+
+    Returns:
+        Number of page views and sessions deleted (or eligible, on a dry run)
+    """
+    if retention_days is None:
+        retention_days = getattr(
+            settings, "ANALYTICS_RAW_RETENTION_DAYS", DEFAULT_RETENTION_DAYS
+        )
+    if retention_days < 2:
+        # Today and yesterday are still being re-aggregated
+        raise ValueError("Raw traffic retention must be at least 2 days")
+
+    cutoff_day = timezone.localdate() - timedelta(days=retention_days)
+    cutoff, _ = day_bounds(cutoff_day)
+
+    pageviews = PageView.objects.filter(viewed_at__lt=cutoff)
+    sessions = VisitorSession.objects.filter(last_activity__lt=cutoff)
+
+    if dry_run:
+        return {"page_views": pageviews.count(), "sessions": sessions.count()}
+
+    # Downsample first: every day before the cutoff must exist as a rollup
+    watermark = RollupWatermark.objects.filter(name=TRAFFIC_ROLLUP).first()
+    if watermark is None or watermark.processed_through < cutoff_day:
+        refresh_rollups()
+
+    # Record the purge before deleting, so an interrupted purge can never
+    # leave a half-deleted day that a later backfill would re-aggregate
+    last_purged_day = cutoff_day - timedelta(days=1)
+    purge_mark, created = RollupWatermark.objects.get_or_create(
+        name=TRAFFIC_PURGE, defaults={"processed_through": last_purged_day}
+    )
+    if not created and purge_mark.processed_through < last_purged_day:
+        purge_mark.processed_through = last_purged_day
+        purge_mark.save(update_fields=["processed_through", "updated_at"])
+
+    result = {
+        "page_views": _delete_in_batches(pageviews, batch_size, pause),
+        "sessions": _delete_in_batches(sessions, batch_size, pause),
+    }
+    logger.info(
+        f"Purged raw traffic before {cutoff_day}: "
+        f"{result['page_views']} page views, {result['sessions']} sessions"
+    )
+    return result
@@ -0,0 +1,258 @@
+"""
+Daily and hourly traffic rollups.
+
+Raw PageView and VisitorSession rows are aggregated per day into small fact
+tables (DailyTrafficRollup, HourlyTrafficRollup, DailyBreakdownRollup) so the
+web analytics dashboard never scans raw traffic. Each day is recomputed from
+scratch, which makes every rollup idempotent and safe to re-run.
+
+refresh_rollups() is run periodically by the refresh_analytics_rollups Celery
+task. It continues from a stored watermark and always re-aggregates the most
+recent days, because sessions are attributed to the day of their last
+activity and can move forward while they are still active. Older ranges can be
+rebuilt with backfill_rollups() or the ``rollup_analytics`` management command.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import ExtractHour
+from django.utils import timezone
+
+from utils.hyperloglog import HyperLogLog
+
+from .classification import classify_unclassified
+from .models import (
+    DailyBreakdownRollup,
+    DailyTrafficRollup,
+    HourlyTrafficRollup,
+    PageView,
+    RollupWatermark,
+    VisitorSession,
+)
+
+logger = logging.getLogger(__name__)
+
+TRAFFIC_ROLLUP = "traffic"
+TRAFFIC_PURGE = "traffic_purge"
+
+# Days before the watermark that are re-aggregated on every refresh
+REFRESH_LOOKBACK_DAYS = 1
+
+# Sessions longer than this are treated as legacy data anomalies
+MAX_SESSION_SECONDS = 86400
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    """Return the aware [start, end) datetimes of ``day`` in the current timezone."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def _session_totals(sessions_qs) -> dict:
+    valid_q = Q(page_views_count__gt=0)
+    timed_q = valid_q & Q(
+        duration_seconds__isnull=False, duration_seconds__lt=MAX_SESSION_SECONDS
+    )
+    totals = sessions_qs.aggregate(
+        sessions=Count("id"),
+        valid_sessions=Count("id", filter=valid_q),
+        valid_session_page_views=Sum("page_views_count", filter=valid_q),
+        bounce_sessions=Count("id", filter=valid_q & Q(page_views_count__lte=1)),
+        returning_sessions=Count("id", filter=valid_q & Q(page_views_count__gte=3)),
+        timed_sessions=Count("id", filter=timed_q),
+        total_duration_seconds=Sum("duration_seconds", filter=timed_q),
+    )
+    return {field: value or 0 for field, value in totals.items()}
+
+
+def visitor_identity(user_id: Optional[int], session_id: str) -> Optional[str]:
+    """
+    Identify a unique visitor: the same authenticated user counts once, each
+    anonymous session counts separately.
+    """
+    if user_id:
+        return f"u:{user_id}"
+    if session_id:
+        return f"s:{session_id}"
+    return None
+
+
+def _visitor_totals(sessions_qs) -> dict:
+    authenticated, anonymous = set(), set()
+    sketch = HyperLogLog()
+    for user_id, session_id in sessions_qs.values_list("user_id", "session_id"):
+        identity = visitor_identity(user_id, session_id)
+        if identity is None:
+            continue
+        (authenticated if user_id else anonymous).add(identity)
+        sketch.add(identity)
+    return {
+        "authenticated_visitors": len(authenticated),
+        "anonymous_visitors": len(anonymous),
+        "visitor_sketch": sketch.to_bytes(),
+    }
+
+
+def count_unique_visitors(rollups: Iterable[DailyTrafficRollup]) -> int:
+    """
+    Estimate distinct visitors across several days by merging their sketches.
+
+    Days aggregated before sketches existed contribute their daily count
+    (rebuild them with ``rollup_analytics --start`` for a true union).
+    """
+    sketches = []
+    unsketched = 0
+    for rollup in rollups:
+        if rollup.visitor_sketch:
+            sketches.append(HyperLogLog.from_bytes(bytes(rollup.visitor_sketch)))
+        else:
+            unsketched += rollup.unique_visitors
+    return HyperLogLog.merge_all(sketches).count() + unsketched
+
+
+def rollup_day(day: date) -> DailyTrafficRollup:
+    """
+    Recompute every rollup row for ``day`` from raw traffic.
+
+    Args:
+        day: Calendar day in the current timezone
+
+    Returns:
+        The updated DailyTrafficRollup
+    """
+    start, end = day_bounds(day)
+    pageviews_qs = PageView.objects.filter(viewed_at__gte=start, viewed_at__lt=end)
+    sessions_qs = VisitorSession.objects.filter(
+        last_activity__gte=start, last_activity__lt=end
+    )
+    # Rows written before ingest-time classification existed
+    classify_unclassified(pageviews_qs)
+    public_pages_qs = pageviews_qs.filter(is_public_page=True)
+
+    totals = _session_totals(sessions_qs)
+    totals.update(_visitor_totals(sessions_qs))
+    totals.update(
+        pageviews_qs.aggregate(
+            page_views=Count("id"),
+            public_page_views=Count("id", filter=Q(is_public_page=True)),
+        )
+    )
+
+    hourly = [
+        HourlyTrafficRollup(date=day, hour=entry["hour"], page_views=entry["views"])
+        for entry in pageviews_qs.annotate(hour=ExtractHour("viewed_at"))
+        .values("hour")
+        .annotate(views=Count("id"))
+    ]
+
+    breakdown = [
+        DailyBreakdownRollup(
+            date=day,
+            dimension=DailyBreakdownRollup.DIMENSION_PAGE,
+            key=entry["page_path"],
+            label=entry["page_title"] or "",
+            page_views=entry["views"],
+        )
+        for entry in public_pages_qs.values("page_path", "page_title").annotate(
+            views=Count("id")
+        )
+    ]
+    for dimension, field in (
+        (DailyBreakdownRollup.DIMENSION_SOURCE, "traffic_source"),
+        (DailyBreakdownRollup.DIMENSION_DEVICE, "device_type"),
+    ):
+        breakdown += [
+            DailyBreakdownRollup(
+                date=day,
+                dimension=dimension,
+                key=entry[field],
+                page_views=entry["views"],
+            )
+            for entry in pageviews_qs.values(field).annotate(views=Count("id"))
+        ]
+
+    with transaction.atomic():
+        rollup, _ = DailyTrafficRollup.objects.update_or_create(
+            date=day, defaults=totals
+        )
+        HourlyTrafficRollup.objects.filter(date=day).delete()
+        HourlyTrafficRollup.objects.bulk_create(hourly)
+        DailyBreakdownRollup.objects.filter(date=day).delete()
+        DailyBreakdownRollup.objects.bulk_create(breakdown)
+
+    return rollup
+
+
+def backfill_rollups(start: date, end: date) -> List[date]:
+    """
+    Recompute rollups for every day from ``start`` to ``end`` inclusive.
+
+    Days whose raw traffic has already been purged (analytics.retention) are
+    skipped, so their rollups are never overwritten with zeros.
+
+    Returns:
+        The days that were aggregated
+    """
+    purged_through = (
+        RollupWatermark.objects.filter(name=TRAFFIC_PURGE)
+        .values_list("processed_through", flat=True)
+        .first()
+    )
+    if purged_through is not None and start <= purged_through:
+        logger.warning(
+            f"Raw traffic through {purged_through} has been purged; "
+            f"keeping the existing rollups for those days"
+        )
+        start = purged_through + timedelta(days=1)
+
+    days = []
+    day = start
+    while day <= end:
+        rollup_day(day)
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _earliest_traffic_day() -> Optional[date]:
+    first_view = PageView.objects.aggregate(first=Min("viewed_at"))["first"]
+    first_session = VisitorSession.objects.aggregate(first=Min("first_visit"))["first"]
+    candidates = [value for value in (first_view, first_session) if value]
+    if not candidates:
+        return None
+    return timezone.localtime(min(candidates)).date()
+
+
+def refresh_rollups(today: Optional[date] = None) -> List[date]:
+    """
+    Bring the rollup tables up to date.
+
+    Aggregates every day after the watermark (minus REFRESH_LOOKBACK_DAYS)
+    through today, then advances the watermark. Without a watermark, starts
+    from the earliest raw traffic.
+
+    Returns:
+        The days that were aggregated
+    """
+    today = today or timezone.localdate()
+
+    watermark = RollupWatermark.objects.filter(name=TRAFFIC_ROLLUP).first()
+    if watermark is not None:
+        start = min(
+            watermark.processed_through - timedelta(days=REFRESH_LOOKBACK_DAYS),
+            today,
+        )
+    else:
+        start = _earliest_traffic_day() or today
+
+    days = backfill_rollups(start, today)
+    RollupWatermark.objects.update_or_create(
+        name=TRAFFIC_ROLLUP, defaults={"processed_through": today}
+    )
+    logger.info(f"Traffic rollups refreshed for {start} to {today} ({len(days)} days)")
+    return days
@@ -8,12 +8,8 @@ from newsletter.models import NewsletterSubscriber
 from testimonials.models import Testimonial
 from vehicles.models import Vehicle
 
-from .cache import (
-    BOOKING_TRENDS_CACHE_PREFIX,
-    DASHBOARD_SUMMARY_CACHE_PREFIX,
-    invalidate_booking_trends_cache,
-    invalidate_dashboard_summary_cache,
-)
+from .cache import DASHBOARD_SUMMARY_CACHE_PREFIX, invalidate_dashboard_summary_cache
+from .trends import TREND_METRICS, record_event
 
 SUMMARY_MODELS = [
     Vehicle,
@@ -26,17 +22,24 @@ SUMMARY_MODELS = [
     FAQ,
 ]
 
-BOOKING_TREND_MODELS = [Claim, CarPurchaseRequest]
-
 
 def _invalidate_summary_cache(sender, **kwargs):
     """Invalidate the cached dashboard summary when key models change."""
     invalidate_dashboard_summary_cache()
 
 
-def _invalidate_booking_trends_cache(sender, **kwargs):
-    """Invalidate the cached booking trends when relevant models change."""
-    invalidate_booking_trends_cache()
+def _make_trend_handlers(metric, field):
+    def on_save(sender, instance, created, raw=False, **kwargs):
+        """Count a new row in its day's trend counter."""
+        if created and not raw and getattr(instance, field, None):
+            record_event(metric, getattr(instance, field))
+
+    def on_delete(sender, instance, **kwargs):
+        """Remove a deleted row from its day's trend counter."""
+        if getattr(instance, field, None):
+            record_event(metric, getattr(instance, field), delta=-1)
+
+    return on_save, on_delete
 
 
 def _connect_signals(models, handler, suffix):
@@ -58,6 +61,17 @@ def _connect_signals(models, handler, suffix):
 _connect_signals(
     SUMMARY_MODELS, _invalidate_summary_cache, DASHBOARD_SUMMARY_CACHE_PREFIX
 )
-_connect_signals(
-    BOOKING_TREND_MODELS, _invalidate_booking_trends_cache, BOOKING_TRENDS_CACHE_PREFIX
-)
+for _metric, (_model, _field, _) in TREND_METRICS.items():
+    _on_save, _on_delete = _make_trend_handlers(_metric, _field)
+    post_save.connect(
+        _on_save,
+        sender=_model,
+        weak=False,
+        dispatch_uid=f"{_model.__name__}_trend_counts_post_save",
+    )
+    post_delete.connect(
+        _on_delete,
+        sender=_model,
+        weak=False,
+        dispatch_uid=f"{_model.__name__}_trend_counts_post_delete",
+    )
@@ -0,0 +1,92 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.core.cache import cache
+from django.utils import timezone
+
+from .export import export_all
+from .ingest import flush_page_views
+from .notification_service import reconcile_unread_counts
+from .retention import purge_raw_traffic
+from .rollups import refresh_rollups
+from .trends import rebuild_event_counts
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_LOCK_KEY = "analytics:rollup_lock"
+ROLLUP_LOCK_TIMEOUT = 600
+FLUSH_LOCK_KEY = "analytics:pageview_flush_lock"
+FLUSH_LOCK_TIMEOUT = 300
+TREND_RECONCILE_DAYS = 35
+
+
+@shared_task(bind=True)
+def refresh_analytics_rollups(self) -> dict:
+    """Aggregate new traffic into the daily/hourly rollup tables."""
+    # Overlapping runs would rewrite the same days concurrently
+    if not cache.add(ROLLUP_LOCK_KEY, self.request.id or "local", ROLLUP_LOCK_TIMEOUT):
+        logger.info("Skipping analytics rollup refresh; another run is in progress")
+        return {"skipped": True}
+
+    try:
+        days = refresh_rollups()
+    finally:
+        cache.delete(ROLLUP_LOCK_KEY)
+
+    return {
+        "days": len(days),
+        "start": days[0].isoformat() if days else None,
+        "end": days[-1].isoformat() if days else None,
+    }
+
+
+@shared_task(bind=True, ignore_result=True)
+def flush_page_view_events(self) -> int:
+    """Write queued page-view events to PageView/VisitorSession in batches."""
+    # The stream has a single consumer; overlapping flushes would re-read
+    # each other's unacknowledged entries
+    if not cache.add(FLUSH_LOCK_KEY, self.request.id or "local", FLUSH_LOCK_TIMEOUT):
+        return 0
+
+    try:
+        written = flush_page_views()
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+    if written:
+        logger.info("Flushed %s page view(s)", written)
+    return written
+
+
+@shared_task(bind=True)
+def purge_old_analytics(self) -> dict:
+    """Roll up and delete raw page views/sessions past the retention window."""
+    if not cache.add(ROLLUP_LOCK_KEY, self.request.id or "local", ROLLUP_LOCK_TIMEOUT):
+        logger.info("Skipping analytics purge; a rollup refresh is in progress")
+        return {"skipped": True}
+
+    try:
+        return purge_raw_traffic()
+    finally:
+        cache.delete(ROLLUP_LOCK_KEY)
+
+
+@shared_task(bind=True)
+def reconcile_trend_counts(self) -> int:
+    """Recompute recent trend counters to correct writes that bypassed signals."""
+    today = timezone.localdate()
+    return rebuild_event_counts(today - timedelta(days=TREND_RECONCILE_DAYS), today)
+
+
+@shared_task(bind=True)
+def export_analytics_data(self) -> list:
+    """Incrementally export analytics tables as date-partitioned Parquet files."""
+    results = export_all()
+    return [{"table": r["table"], "rows": r["rows"]} for r in results]
+
+
+@shared_task(bind=True, ignore_result=True)
+def reconcile_notification_counts(self) -> int:
+    """Recompute cached unread notification counts from the database."""
+    return len(reconcile_unread_counts())
@@ -0,0 +1,145 @@
+"""
+Materialized trend series for bookings, inquiries and purchase requests.
+
+DailyEventCount keeps one counter per metric per day. Signal handlers in
+analytics.signals adjust the counter as source rows are created or deleted,
+so trend charts read a few hundred small rows instead of grouping the
+transactional tables. rebuild_event_counts() recomputes a date range from the
+source tables; the nightly reconcile_trend_counts task runs it over recent
+days to correct drift from writes that bypass signals (bulk_create, raw SQL).
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from bookings.models import Claim
+from car_sales.models import CarPurchaseRequest
+from inquiries.models import Inquiry
+
+from .models import DailyEventCount
+from .rollups import day_bounds
+
+logger = logging.getLogger(__name__)
+
+# metric -> (source model, timestamp field, response key)
+TREND_METRICS = {
+    DailyEventCount.METRIC_BOOKINGS: (Claim, "created_at", "bookings"),
+    DailyEventCount.METRIC_INQUIRIES: (Inquiry, "created_at", "inquiries"),
+    DailyEventCount.METRIC_PURCHASE_REQUESTS: (
+        CarPurchaseRequest,
+        "created_at",
+        "purchaseRequests",
+    ),
+}
+
+GRANULARITIES = ("month", "week")
+
+
+def record_event(metric: str, when: datetime, delta: int = 1) -> None:
+    """Add ``delta`` to ``metric``'s counter for the day of ``when``."""
+    day = timezone.localtime(when).date() if timezone.is_aware(when) else when.date()
+    counters = DailyEventCount.objects.filter(metric=metric, date=day)
+    if counters.update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            DailyEventCount.objects.create(metric=metric, date=day, count=delta)
+    except IntegrityError:
+        # Created concurrently by another writer
+        counters.update(count=F("count") + delta)
+
+
+def rebuild_event_counts(start: date, end: date) -> int:
+    """
+    Recompute every metric's daily counters from ``start`` to ``end`` inclusive.
+
+    Returns:
+        Number of counter rows written
+    """
+    range_start, _ = day_bounds(start)
+    _, range_end = day_bounds(end)
+
+    rows = []
+    for metric, (model, field, _) in TREND_METRICS.items():
+        daily = (
+            model.objects.filter(
+                **{f"{field}__gte": range_start, f"{field}__lt": range_end}
+            )
+            .annotate(day=TruncDate(field))
+            .values("day")
+            .annotate(total=Count("id"))
+        )
+        rows += [
+            DailyEventCount(metric=metric, date=entry["day"], count=entry["total"])
+            for entry in daily
+        ]
+
+    with transaction.atomic():
+        DailyEventCount.objects.filter(date__gte=start, date__lte=end).delete()
+        DailyEventCount.objects.bulk_create(rows)
+
+    logger.info(f"Rebuilt trend counts for {start} to {end} ({len(rows)} rows)")
+    return len(rows)
+
+
+def _bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _previous_bucket(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start - timedelta(days=7)
+    return (start - timedelta(days=1)).replace(day=1)
+
+
+def get_trend_series(
+    granularity: str = "month", periods: int = 8, end: Optional[date] = None
+) -> List[Dict]:
+    """
+    Return event counts per month or ISO week, oldest first.
+
+    Args:
+        granularity: 'month' or 'week'
+        periods: Number of buckets, ending with the one containing ``end``
+        end: Last day to include (default: today)
+
+    Returns:
+        One dict per bucket: a 'month' label ('October 2025') or a 'week'
+        start date ('2025-10-13'), plus one count per metric
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown trend granularity: {granularity}")
+
+    end = end or timezone.localdate()
+    buckets = [_bucket_start(end, granularity)]
+    while len(buckets) < periods:
+        buckets.append(_previous_bucket(buckets[-1], granularity))
+    buckets.reverse()
+
+    totals: Dict[tuple, int] = {}
+    for row in DailyEventCount.objects.filter(
+        date__gte=buckets[0], date__lte=end
+    ).values_list("metric", "date", "count"):
+        metric, day, count = row
+        key = (_bucket_start(day, granularity), metric)
+        totals[key] = totals.get(key, 0) + count
+
+    series = []
+    for bucket in buckets:
+        entry = (
+            {"week": bucket.isoformat()}
+            if granularity == "week"
+            else {"month": bucket.strftime("%B %Y")}
+        )
+        for metric, (_, _, response_key) in TREND_METRICS.items():
+            entry[response_key] = totals.get((bucket, metric), 0)
+        series.append(entry)
+    return series
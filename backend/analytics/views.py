@@ -1,7 +1,6 @@
 from datetime import timedelta
 
-from django.db.models import Avg, Case, CharField, Count, Q, Sum, Value, When
-from django.db.models.functions import ExtractHour, TruncDate, TruncMonth
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -13,24 +12,31 @@ from bookings.models import Claim
 from car_sales.models import CarListing, CarPurchaseRequest
 from faq.models import FAQ
 from gallery.models import GalleryImage
-from inquiries.models import Inquiry
 from newsletter.models import NewsletterSubscriber
 from testimonials.models import Testimonial
+from utils.bulk_operations import bulk_count
 from utils.cache import cache_result
 from vehicles.models import Vehicle
 
-from .cache import (
-    BOOKING_TRENDS_CACHE_PREFIX,
-    DASHBOARD_SUMMARY_CACHE_PREFIX,
+from .cache import DASHBOARD_SUMMARY_CACHE_PREFIX
+from .models import (
+    ActivityLog,
+    DailyBreakdownRollup,
+    DailyTrafficRollup,
+    HourlyTrafficRollup,
 )
-from .models import ActivityLog, PageView, VisitorSession
+from .notification_service import (
+    adjust_unread_count,
+    counts_as_unread,
+    get_unread_count,
+    reset_unread_count,
+)
+from .rollups import count_unique_visitors, day_bounds
 from .serializers import ActivityLogSerializer, NotificationSerializer
+from .trends import GRANULARITIES, get_trend_series
 from .utils import get_activity_icon
 
-SEARCH_DOMAINS = ["google", "bing", "yahoo", "duckduckgo"]
-SOCIAL_DOMAINS = ["facebook", "instagram", "linkedin", "twitter", "t.co", "x.com"]
-TABLET_KEYWORDS = ["ipad", "tablet"]
-MOBILE_KEYWORDS = ["mobile", "iphone", "android"]
+MAX_TREND_PERIODS = 104
 
 
 class ActivityLogPagination(PageNumberPagination):
@@ -45,186 +51,44 @@ def _safe_percentage(value: int | float, total: int | float) -> float:
     return round((value / total) * 100, 2)
 
 
-def _build_keyword_query(field: str, keywords: list[str]) -> Q:
-    matcher = Q(pk__in=[])
-    for keyword in keywords:
-        matcher |= Q(**{f"{field}__icontains": keyword})
-    return matcher
-
-
-def _build_referrer_case() -> Case:
-    search_q = _build_keyword_query("referrer", SEARCH_DOMAINS)
-    social_q = _build_keyword_query("referrer", SOCIAL_DOMAINS)
-
-    return Case(
-        When(Q(referrer__isnull=True) | Q(referrer__exact=""), then=Value("Direct")),
-        When(search_q, then=Value("Search")),
-        When(social_q, then=Value("Social")),
-        When(Q(referrer__icontains="email"), then=Value("Email")),
-        default=Value("Referral"),
-        output_field=CharField(),
-    )
-
-
-def _build_device_case() -> Case:
-    tablet_q = _build_keyword_query("user_agent", TABLET_KEYWORDS)
-    mobile_q = _build_keyword_query("user_agent", MOBILE_KEYWORDS)
-
-    return Case(
-        When(
-            Q(user_agent__isnull=True) | Q(user_agent__exact=""), then=Value("Unknown")
-        ),
-        When(tablet_q, then=Value("Tablet")),
-        When(mobile_q, then=Value("Mobile")),
-        default=Value("Desktop"),
-        output_field=CharField(),
-    )
-
-
 @cache_result(timeout=300, key_prefix=DASHBOARD_SUMMARY_CACHE_PREFIX)
 def _build_dashboard_summary() -> dict:
-    now = timezone.now()
-    today = now.date()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
-
-    data = {
-        "totalVehicles": Vehicle.objects.count(),
-        "totalBookings": Claim.objects.count(),
-        "inquiries": Claim.objects.filter(created_at__date=today).count(),
-        "testimonials": Testimonial.objects.filter(status="approved").count(),
-        "carListings": CarListing.objects.filter(status="published").count(),
-        "purchaseRequests": CarPurchaseRequest.objects.count(),
-        "galleryImages": GalleryImage.objects.filter(is_active=True).count(),
-        "newsletterSubscribers": NewsletterSubscriber.objects.filter(
-            is_active=True
-        ).count(),
-        "faqItems": FAQ.objects.filter(is_active=True).count(),
-    }
-
-    # Use VisitorSession for more accurate unique visitor counting
-    # For unique visitors, we count distinct authenticated users OR distinct anonymous sessions
-    # This provides more accurate counts: same authenticated user = 1 visitor, different anonymous sessions = separate visitors
-
-    # For today: sessions that had activity today
-    today_start = timezone.make_aware(
-        timezone.datetime.combine(today, timezone.datetime.min.time())
-    )
-    authenticated_today = (
-        VisitorSession.objects.filter(last_activity__date=today, user__isnull=False)
-        .values("user_id")
-        .distinct()
-        .count()
-    )
-
-    anonymous_today = (
-        VisitorSession.objects.filter(last_activity__date=today, user__isnull=True)
-        .exclude(session_id="")
-        .values("session_id")
-        .distinct()
-        .count()
-    )
-
-    unique_visitors_today = authenticated_today + anonymous_today
-
-    # For week/month: sessions with activity in the period
-    authenticated_week = (
-        VisitorSession.objects.filter(last_activity__gte=week_ago, user__isnull=False)
-        .values("user_id")
-        .distinct()
-        .count()
-    )
-
-    anonymous_week = (
-        VisitorSession.objects.filter(last_activity__gte=week_ago, user__isnull=True)
-        .exclude(session_id="")
-        .values("session_id")
-        .distinct()
-        .count()
-    )
-
-    unique_visitors_week = authenticated_week + anonymous_week
-
-    authenticated_month = (
-        VisitorSession.objects.filter(last_activity__gte=month_ago, user__isnull=False)
-        .values("user_id")
-        .distinct()
-        .count()
-    )
-
-    anonymous_month = (
-        VisitorSession.objects.filter(last_activity__gte=month_ago, user__isnull=True)
-        .exclude(session_id="")
-        .values("session_id")
-        .distinct()
-        .count()
-    )
-
-    unique_visitors_month = authenticated_month + anonymous_month
-
-    data.update(
+    """
+    Build the dashboard counters.
+
+    Content counters are taken in one round trip (utils.bulk_operations.
+    bulk_count); traffic counters come from the daily rollups, with unique
+    visitors estimated by merging HyperLogLog sketches. "Week" and "month"
+    are the last 7 and 30 calendar days including today.
+    """
+    today = timezone.localdate()
+    today_start, _ = day_bounds(today)
+
+    data = bulk_count(
         {
-            "pageViewsToday": PageView.objects.filter(viewed_at__date=today).count(),
-            "pageViewsWeek": PageView.objects.filter(viewed_at__gte=week_ago).count(),
-            "pageViewsMonth": PageView.objects.filter(viewed_at__gte=month_ago).count(),
-            "uniqueVisitorsToday": unique_visitors_today,
-            "uniqueVisitorsWeek": unique_visitors_week,
-            "uniqueVisitorsMonth": unique_visitors_month,
+            "totalVehicles": Vehicle.objects.all(),
+            "totalBookings": Claim.objects.all(),
+            "inquiries": Claim.objects.filter(created_at__gte=today_start),
+            "testimonials": Testimonial.objects.filter(status="approved"),
+            "carListings": CarListing.objects.filter(status="published"),
+            "purchaseRequests": CarPurchaseRequest.objects.all(),
+            "galleryImages": GalleryImage.objects.filter(is_active=True),
+            "newsletterSubscribers": NewsletterSubscriber.objects.filter(
+                is_active=True
+            ),
+            "faqItems": FAQ.objects.filter(is_active=True),
         }
     )
 
-    return data
-
-
-@cache_result(timeout=900, key_prefix=BOOKING_TRENDS_CACHE_PREFIX)
-def _build_booking_trends() -> list[dict]:
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=240)  # 8 months
-
-    def get_monthly_counts(queryset, date_field: str):
-        return (
-            queryset.filter(
-                **{f"{date_field}__gte": start_date, f"{date_field}__lte": end_date}
-            )
-            .annotate(month=TruncMonth(date_field))
-            .values("month")
-            .annotate(total=Count("id"))
-            .order_by("month")
-        )
-
-    def to_lookup(data):
-        lookup = {}
-        for entry in data:
-            month_key = entry["month"].strftime("%B %Y")
-            lookup[month_key] = entry["total"]
-        return lookup
-
-    bookings_lookup = to_lookup(get_monthly_counts(Claim.objects, "created_at"))
-    inquiries_lookup = to_lookup(get_monthly_counts(Inquiry.objects, "created_at"))
-    purchase_lookup = to_lookup(
-        get_monthly_counts(CarPurchaseRequest.objects, "created_at")
+    rollups = list(
+        DailyTrafficRollup.objects.filter(date__gt=today - timedelta(days=30))
     )
+    for label, days in (("Today", 1), ("Week", 7), ("Month", 30)):
+        period = [r for r in rollups if r.date > today - timedelta(days=days)]
+        data[f"pageViews{label}"] = sum(r.page_views for r in period)
+        data[f"uniqueVisitors{label}"] = count_unique_visitors(period)
 
-    months = []
-    current_date = start_date.replace(day=1)
-    while current_date <= end_date:
-        months.append(current_date.strftime("%B %Y"))
-        if current_date.month == 12:
-            current_date = current_date.replace(year=current_date.year + 1, month=1)
-        else:
-            current_date = current_date.replace(month=current_date.month + 1)
-
-    result = [
-        {
-            "month": month_key,
-            "bookings": bookings_lookup.get(month_key, 0),
-            "inquiries": inquiries_lookup.get(month_key, 0),
-            "purchaseRequests": purchase_lookup.get(month_key, 0),
-        }
-        for month_key in months
-    ]
-
-    return result[-8:]
+    return data
 
 
 @api_view(["GET"])
@@ -237,8 +101,24 @@ def dashboard_summary(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def booking_trends(request):
-    """Get multi-metric trends for the last 8 months"""
-    return Response(_build_booking_trends())
+    """
+    Get multi-metric trends, served from the materialized daily counters.
+
+    Query params:
+        granularity: 'month' (default) or 'week'
+        periods: number of buckets, 1-104 (default 8)
+    """
+    granularity = request.query_params.get("granularity", "month")
+    if granularity not in GRANULARITIES:
+        granularity = "month"
+
+    try:
+        periods = int(request.query_params.get("periods", 8))
+    except ValueError:
+        periods = 8
+    periods = min(max(periods, 1), MAX_TREND_PERIODS)
+
+    return Response(get_trend_series(granularity, periods))
 
 
 @api_view(["GET"])
@@ -354,13 +234,8 @@ def notifications(request):
 @permission_classes([IsAuthenticated])
 def notification_unread_count(request):
     """Get count of unread notifications for current user."""
-    count = (
-        ActivityLog.objects.filter(recipient=request.user, is_read=False)
-        .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()))
-        .count()
-    )
-
-    return Response({"unread_count": count})
+    # Served from the cached counter (see analytics.notification_service)
+    return Response({"unread_count": get_unread_count(request.user.pk)})
 
 
 @api_view(["PATCH"])
@@ -372,7 +247,17 @@ def notification_mark_read(request, notification_id):
             id=notification_id,
             recipient=request.user,  # Ensure user owns this notification
         )
-        notification.mark_as_read()
+        was_unread = counts_as_unread(notification)
+        # Conditional update so concurrent requests decrement the count once
+        read_at = timezone.now()
+        if ActivityLog.objects.filter(pk=notification.pk, is_read=False).update(
+            is_read=True, read_at=read_at
+        ):
+            notification.is_read, notification.read_at = True, read_at
+            if was_unread:
+                adjust_unread_count(request.user.pk, -1)
+        else:
+            notification.refresh_from_db()
         serializer = NotificationSerializer(notification)
         return Response(serializer.data)
     except ActivityLog.DoesNotExist:
@@ -388,6 +273,7 @@ def notification_mark_all_read(request):
     updated = ActivityLog.objects.filter(recipient=request.user, is_read=False).update(
         is_read=True, read_at=timezone.now()
     )
+    reset_unread_count(request.user.pk)
 
     return Response(
         {"message": f"Marked {updated} notifications as read", "updated_count": updated}
@@ -403,7 +289,9 @@ def notification_delete(request, notification_id):
             id=notification_id,
             recipient=request.user,  # Ensure user owns this notification
         )
-        notification.delete()
+        was_unread = counts_as_unread(notification)
+        if notification.delete()[0] and was_unread:
+            adjust_unread_count(request.user.pk, -1)
         return Response(
             {"message": "Notification deleted"}, status=status.HTTP_204_NO_CONTENT
         )
@@ -416,7 +304,13 @@ def notification_delete(request, notification_id):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def web_analytics_overview(request):
-    """Provide detailed website analytics for the dashboard."""
+    """
+    Provide detailed website analytics for the dashboard.
+
+    Reads only the rollup tables maintained by analytics.rollups, so data is
+    as fresh as the last refresh_analytics_rollups run. Range-level unique
+    visitors are estimated from the merged daily HyperLogLog sketches.
+    """
     period_param = request.query_params.get("period", "30d")
     period_map = {
         "7d": 7,
@@ -430,185 +324,92 @@ def web_analytics_overview(request):
     start = (now - timedelta(days=days - 1)).replace(
         hour=0, minute=0, second=0, microsecond=0
     )
+    start_day = timezone.localdate(start)
 
-    pageviews_qs = PageView.objects.filter(viewed_at__gte=start, viewed_at__lte=now)
-    visitor_sessions_qs = VisitorSession.objects.filter(last_activity__gte=start)
-
-    total_views = pageviews_qs.count()
-
-    # Improved unique visitor counting:
-    # - For authenticated users: count distinct user_id
-    # - For anonymous users: count distinct session_id (excluding empty)
-    # - This provides more accurate unique visitor counts
-    authenticated_visitors = (
-        VisitorSession.objects.filter(last_activity__gte=start, user__isnull=False)
-        .values("user_id")
-        .distinct()
-        .count()
-    )
-
-    anonymous_visitors = (
-        VisitorSession.objects.filter(last_activity__gte=start, user__isnull=True)
-        .exclude(session_id="")
-        .values("session_id")
-        .distinct()
-        .count()
-    )
-
-    unique_visitors = authenticated_visitors + anonymous_visitors
-    total_sessions = visitor_sessions_qs.count()
+    daily_rollups = {
+        rollup.date: rollup
+        for rollup in DailyTrafficRollup.objects.filter(date__gte=start_day)
+    }
+    totals = {
+        field: sum(getattr(rollup, field) for rollup in daily_rollups.values())
+        for field in (
+            "page_views",
+            "public_page_views",
+            "sessions",
+            "valid_sessions",
+            "valid_session_page_views",
+            "bounce_sessions",
+            "returning_sessions",
+            "timed_sessions",
+            "total_duration_seconds",
+        )
+    }
 
-    # Filter valid sessions for averages (exclude 0-page sessions and potential anomalies)
-    valid_sessions_qs = visitor_sessions_qs.filter(page_views_count__gt=0)
+    # Merged HyperLogLog sketches: ~1.6% standard error, constant cost per day
+    unique_visitors = count_unique_visitors(daily_rollups.values())
 
+    total_views = totals["page_views"]
+    total_sessions = totals["sessions"]
+    total_duration = totals["total_duration_seconds"]
     avg_session_duration = (
-        valid_sessions_qs.filter(
-            duration_seconds__isnull=False,
-            duration_seconds__lt=86400,  # Exclude sessions > 24 hours (legacy data anomalies)
-        ).aggregate(avg=Avg("duration_seconds"))["avg"]
-        or 0
+        total_duration / totals["timed_sessions"] if totals["timed_sessions"] else 0
     )
-
-    total_duration = (
-        valid_sessions_qs.filter(
-            duration_seconds__isnull=False,
-            duration_seconds__lt=86400,  # Exclude sessions > 24 hours (legacy data anomalies)
-        ).aggregate(total=Sum("duration_seconds"))["total"]
-        or 0
-    )
-
     avg_pages_per_session = (
-        valid_sessions_qs.aggregate(avg=Avg("page_views_count"))["avg"] or 0
+        totals["valid_session_page_views"] / totals["valid_sessions"]
+        if totals["valid_sessions"]
+        else 0
     )
 
-    bounce_sessions = valid_sessions_qs.filter(page_views_count__lte=1).count()
-    returning_sessions = valid_sessions_qs.filter(page_views_count__gte=3).count()
-
-    # Get daily page views
-    raw_daily_pageviews = list(
-        pageviews_qs.annotate(day=TruncDate("viewed_at"))
-        .values("day")
-        .annotate(views=Count("id"))
-    )
-    daily_pageviews_lookup = {
-        entry["day"]: entry["views"] for entry in raw_daily_pageviews
-    }
-
-    # Get daily unique visitors from VisitorSession (more accurate)
-    # Count authenticated users + anonymous sessions separately, then combine
-    raw_daily_authenticated = list(
-        VisitorSession.objects.filter(last_activity__gte=start, user__isnull=False)
-        .annotate(day=TruncDate("last_activity"))
-        .values("day")
-        .annotate(visitors=Count("user_id", distinct=True))
-    )
-
-    raw_daily_anonymous = list(
-        VisitorSession.objects.filter(last_activity__gte=start, user__isnull=True)
-        .annotate(day=TruncDate("last_activity"))
-        .exclude(session_id="")
-        .values("day")
-        .annotate(visitors=Count("session_id", distinct=True))
-    )
-
-    # Combine authenticated and anonymous counts by day
-    daily_visitors_lookup = {}
-    for entry in raw_daily_authenticated:
-        day = entry["day"]
-        daily_visitors_lookup[day] = (
-            daily_visitors_lookup.get(day, 0) + entry["visitors"]
-        )
-    for entry in raw_daily_anonymous:
-        day = entry["day"]
-        daily_visitors_lookup[day] = (
-            daily_visitors_lookup.get(day, 0) + entry["visitors"]
-        )
-
     traffic_trend = []
     for offset in range(days):
-        current_day = (start + timedelta(days=offset)).date()
+        current_day = start_day + timedelta(days=offset)
+        rollup = daily_rollups.get(current_day)
         traffic_trend.append(
             {
                 "date": current_day.isoformat(),
-                "views": daily_pageviews_lookup.get(current_day, 0),
-                "uniqueVisitors": daily_visitors_lookup.get(current_day, 0),
+                "views": rollup.page_views if rollup else 0,
+                "uniqueVisitors": rollup.unique_visitors if rollup else 0,
             }
         )
 
-    raw_hourly = list(
-        pageviews_qs.annotate(hour=ExtractHour("viewed_at"))
+    hourly_lookup = dict(
+        HourlyTrafficRollup.objects.filter(date__gte=start_day)
         .values("hour")
-        .annotate(views=Count("id"))
+        .annotate(views=Sum("page_views"))
+        .values_list("hour", "views")
     )
-    hourly_lookup = {entry["hour"]: entry["views"] for entry in raw_hourly}
     hourly_distribution = [
         {"hour": hour, "views": hourly_lookup.get(hour, 0)} for hour in range(24)
     ]
 
-    # Filter out admin/internal pages, auth routes, and static files - only show public website pages
-    public_pages_qs = pageviews_qs.exclude(
-        # Admin routes
-        Q(page_path__startswith="/admin/")
-        | Q(page_path__startswith="/api/")
-        | Q(page_path__startswith="/django-admin/")
-        | Q(page_path__startswith="/super-admin/")
-        | Q(page_path__startswith="/cms/")
-        | Q(page_path__startswith="/backup/")
-        | Q(page_path__startswith="/theming/")
-        |
-        # Auth routes
-        Q(page_path__startswith="/auth/")
-        |
-        # System/hidden files (security concern - should not be accessible)
-        Q(page_path__startswith="/.")
-        |
-        # Static files and assets
-        Q(page_path__endswith=".svg")
-        | Q(page_path__endswith=".png")
-        | Q(page_path__endswith=".jpg")
-        | Q(page_path__endswith=".jpeg")
-        | Q(page_path__endswith=".gif")
-        | Q(page_path__endswith=".webp")
-        | Q(page_path__endswith=".ico")
-        | Q(page_path__endswith=".css")
-        | Q(page_path__endswith=".js")
-        | Q(page_path__endswith=".txt")
-        | Q(page_path__endswith=".xml")
-        |
-        # Other internal/system paths
-        Q(page_path__startswith="/static/")
-        | Q(page_path__startswith="/media/")
-        | Q(page_path__startswith="/assets/")
-        | Q(page_path__startswith="/fonts/")
-    )
-
-    # Calculate total views for public pages only (for accurate share calculation)
-    total_public_views = public_pages_qs.count()
+    breakdown_qs = DailyBreakdownRollup.objects.filter(date__gte=start_day)
 
+    # Only public website pages are rolled up for this dimension
     top_pages_qs = list(
-        public_pages_qs.values("page_path", "page_title")
-        .annotate(views=Count("id"))
+        breakdown_qs.filter(dimension=DailyBreakdownRollup.DIMENSION_PAGE)
+        .values("key", "label")
+        .annotate(views=Sum("page_views"))
         .order_by("-views")[:8]
     )
     top_pages = [
         {
-            "path": item["page_path"],
-            "title": item["page_title"],
+            "path": item["key"],
+            "title": item["label"],
             "views": item["views"],
-            "share": _safe_percentage(item["views"], total_public_views),
+            "share": _safe_percentage(item["views"], totals["public_page_views"]),
         }
         for item in top_pages_qs
     ]
 
     source_counts = (
-        pageviews_qs.annotate(source=_build_referrer_case())
-        .values("source")
-        .annotate(views=Count("id"))
+        breakdown_qs.filter(dimension=DailyBreakdownRollup.DIMENSION_SOURCE)
+        .values("key")
+        .annotate(views=Sum("page_views"))
         .order_by("-views")
     )
     traffic_sources = [
         {
-            "source": entry["source"],
+            "source": entry["key"],
             "views": entry["views"],
             "percentage": _safe_percentage(entry["views"], total_views),
         }
@@ -616,14 +417,14 @@ def web_analytics_overview(request):
     ]
 
     device_counts = (
-        pageviews_qs.annotate(device=_build_device_case())
-        .values("device")
-        .annotate(views=Count("id"))
+        breakdown_qs.filter(dimension=DailyBreakdownRollup.DIMENSION_DEVICE)
+        .values("key")
+        .annotate(views=Sum("page_views"))
         .order_by("-views")
     )
     device_breakdown = [
         {
-            "device": entry["device"],
+            "device": entry["key"],
             "views": entry["views"],
             "percentage": _safe_percentage(entry["views"], total_views),
         }
@@ -641,11 +442,13 @@ def web_analytics_overview(request):
             "uniqueVisitors": unique_visitors,
             "totalSessions": total_sessions,
             "avgSessionDurationSeconds": round(avg_session_duration, 2),
-            "avgPagesPerSession": round(avg_pages_per_session or 0, 2),
+            "avgPagesPerSession": round(avg_pages_per_session, 2),
             "viewerMinutes": round(total_duration / 60, 2),
-            "bounceRate": round(_safe_percentage(bounce_sessions, total_sessions), 2),
+            "bounceRate": round(
+                _safe_percentage(totals["bounce_sessions"], total_sessions), 2
+            ),
             "returningVisitorRate": round(
-                _safe_percentage(returning_sessions, total_sessions), 2
+                _safe_percentage(totals["returning_sessions"], total_sessions), 2
             ),
         },
         "trafficTrend": traffic_trend,
@@ -656,7 +459,7 @@ def web_analytics_overview(request):
         "engagement": {
             "sessions": total_sessions,
             "avgSessionDurationSeconds": round(avg_session_duration, 2),
-            "avgPagesPerSession": round(avg_pages_per_session or 0, 2),
+            "avgPagesPerSession": round(avg_pages_per_session, 2),
             "totalDurationSeconds": total_duration,
         },
     }
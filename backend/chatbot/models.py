@@ -5,6 +5,8 @@ from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 
+from utils.request_cache import memoize_per_request
+
 
 class ChatbotContext(models.Model):
     """Context sections for chatbot to classify intents and generate responses"""
@@ -291,8 +293,10 @@ class ChatbotSettings(models.Model):
         from django.core.cache import cache
 
         cache.delete("chatbot_settings")
+        ChatbotSettings.get_settings.invalidate()
 
     @classmethod
+    @memoize_per_request
     def get_settings(cls):
         """Get or create the singleton settings instance with caching"""
         from django.core.cache import cache
@@ -6,13 +6,14 @@ Extracted from the monolithic services.py file for better maintainability.
 """
 
 import logging
+from types import SimpleNamespace
 from typing import Any, Dict, List, Optional
 
 from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-from django.core.cache import cache
 from django.db.models import Q
 
 from utils.cache import get_cache_key, invalidate_cache_pattern
+from utils.cache_metrics import instrumented_get, instrumented_set
 
 from ..models import ContentIndex
 
@@ -20,6 +21,11 @@ logger = logging.getLogger(__name__)
 
 SEARCH_CACHE_PREFIX = "chatbot_content_search"
 
+# Fields of ContentIndex that search consumers read. Only these are cached, and
+# content_text is cut to what is ever displayed (summary fallback).
+SEARCH_HIT_FIELDS = ("id", "title", "summary", "url", "category", "content_type")
+SEARCH_HIT_TEXT_LENGTH = 500
+
 
 def invalidate_content_search_cache() -> None:
     """Invalidate all content search cache entries"""
@@ -32,7 +38,8 @@ def _execute_cached_content_search(
     """
     Execute cached content search with PostgreSQL full-text search.
 
-    Returns a list of (content_item, score) tuples, ordered by relevance.
+    Returns a list of (hit, score) tuples, ordered by relevance. Hits expose the
+    ContentIndex attributes listed in SEARCH_HIT_FIELDS plus content_text.
     """
     if not query or not query.strip():
         return []
@@ -43,17 +50,25 @@ def _execute_cached_content_search(
     )
 
     # Try to get from cache first
-    cached_result = cache.get(cache_key)
-    if cached_result is not None:
-        return cached_result
+    cached_result = instrumented_get(SEARCH_CACHE_PREFIX, cache_key)
+    if cached_result is None:
+        # Execute search and cache plain field data (not model instances)
+        results = _perform_content_search(query_terms, limit, content_types)
+        cached_result = [
+            [_to_search_hit(item), float(score)] for item, score in results
+        ]
+
+        # Cache the results for 10 minutes
+        instrumented_set(SEARCH_CACHE_PREFIX, cache_key, cached_result, 600)
 
-    # Execute search
-    results = _perform_content_search(query_terms, limit, content_types)
+    return [(SimpleNamespace(**hit), score) for hit, score in cached_result]
 
-    # Cache the results for 10 minutes
-    cache.set(cache_key, results, 600)
 
-    return results
+def _to_search_hit(item: ContentIndex) -> Dict[str, Any]:
+    """Reduce a ContentIndex row to the fields search consumers use."""
+    hit = {field: getattr(item, field) for field in SEARCH_HIT_FIELDS}
+    hit["content_text"] = item.content_text[:SEARCH_HIT_TEXT_LENGTH]
+    return hit
 
 
 def _perform_content_search(
@@ -109,7 +124,8 @@ class ContentSearchService:
             content_types: Optional list of content types to search in
 
         Returns:
-            List of (ContentIndex, score) tuples ordered by relevance
+            List of (hit, score) tuples ordered by relevance, where each hit
+            carries the ContentIndex fields in SEARCH_HIT_FIELDS
         """
         return _execute_cached_content_search(query, limit, content_types)
 
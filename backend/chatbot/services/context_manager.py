@@ -11,6 +11,7 @@ from typing import Dict, List, Optional
 from django.core.cache import cache
 
 from utils.cache import cache_result, get_cache_key
+from utils.request_cache import memoize_per_request
 
 from ..models import ChatbotContext
 
@@ -22,8 +23,10 @@ CONTEXT_CACHE_PREFIX = "chatbot_context_sections"
 def invalidate_context_sections_cache() -> None:
     """Invalidate the context sections cache"""
     cache.delete(get_cache_key(CONTEXT_CACHE_PREFIX))
+    _get_cached_context_sections.invalidate()
 
 
+@memoize_per_request
 @cache_result(timeout=3600, key_prefix=CONTEXT_CACHE_PREFIX)
 def _get_cached_context_sections() -> Dict[str, Dict[str, str]]:
     """
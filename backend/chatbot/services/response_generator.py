@@ -13,6 +13,8 @@ import groq
 import requests
 from django.conf import settings
 
+from utils.request_metrics import provider_metrics
+
 from ..models import Conversation
 
 logger = logging.getLogger(__name__)
@@ -152,15 +154,16 @@ class ResponseGenerator:
 
         try:
             system_prompt = self._get_system_prompt()
-            response = await self.async_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=80,
-                temperature=0.3,
-            )
+            with provider_metrics.track("groq"):
+                response = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt},
+                    ],
+                    max_tokens=80,
+                    temperature=0.3,
+                )
             raw_response = response.choices[0].message.content.strip()
 
             cleaned_response = self._clean_response(raw_response)
@@ -229,15 +232,16 @@ class ResponseGenerator:
 
         try:
             system_prompt = self._get_system_prompt()
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=80,  # Very strict limit for 2-3 sentences
-                temperature=0.3,  # Lower temperature for more consistent, concise responses
-            )
+            with provider_metrics.track("groq"):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt},
+                    ],
+                    max_tokens=80,  # Very strict limit for 2-3 sentences
+                    temperature=0.3,  # Lower temperature for more consistent, concise responses
+                )
             raw_response = response.choices[0].message.content.strip()
 
             # Clean and format the response
@@ -401,10 +405,13 @@ class ResponseGenerator:
             "temperature": 0.3,
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+        with provider_metrics.track("openrouter"):
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    url, json=payload, headers=headers, timeout=30
+                )
+                response.raise_for_status()
+                data = response.json()
 
         raw_response = data["choices"][0]["message"]["content"].strip()
 
@@ -441,8 +448,9 @@ class ResponseGenerator:
             "temperature": 0.3,  # Lower temperature for more consistent, concise responses
         }
 
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        response.raise_for_status()
+        with provider_metrics.track("openrouter"):
+            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response.raise_for_status()
 
         data = response.json()
         raw_response = data["choices"][0]["message"]["content"].strip()
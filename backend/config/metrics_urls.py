@@ -4,7 +4,13 @@ URLs for metrics and monitoring endpoints.
 
 from django.urls import path
 
-from config.metrics_views import metrics_view
+from config.metrics_views import (
+    metrics_view,
+    openmetrics_view,
+    profile_detail_view,
+    profile_stacks_view,
+    profile_token_view,
+)
 from config.views import health_check, liveness_check, readiness_check
 
 app_name = "metrics"
@@ -13,5 +19,9 @@ urlpatterns = [
     path("health/", health_check, name="health"),
     path("ready/", readiness_check, name="ready"),
     path("live/", liveness_check, name="live"),
+    path("prometheus/", openmetrics_view, name="openmetrics"),
+    path("profiles/", profile_stacks_view, name="profile-stacks"),
+    path("profiles/token/", profile_token_view, name="profile-token"),
+    path("profiles/<str:profile_id>/", profile_detail_view, name="profile-detail"),
     path("", metrics_view, name="metrics"),
 ]
@@ -2,13 +2,19 @@
 Metrics views for monitoring.
 """
 
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import BasePermission, IsAuthenticated
 from rest_framework.response import Response
 
+from utils import openmetrics, profiling
 from utils.metrics import MetricsCollector
 from utils.permissions import IsAdmin
-from utils.response import success_response
+from utils.response import error_response, success_response
 
 
 @api_view(["GET"])
@@ -20,3 +26,127 @@ def metrics_view(request):
     """
     metrics = MetricsCollector.get_all_metrics()
     return success_response(data=metrics, message="Metrics retrieved successfully")
+
+
+class HasMetricsScrapeToken(BasePermission):
+    """
+    Allow scrapers presenting ``Authorization: Token <METRICS_SCRAPE_TOKEN>``.
+
+    (Prometheus: ``authorization: {type: Token, credentials: ...}``.)
+    """
+
+    def has_permission(self, request, view):
+        token = getattr(settings, "METRICS_SCRAPE_TOKEN", "")
+        scheme, _, credentials = request.META.get("HTTP_AUTHORIZATION", "").partition(
+            " "
+        )
+        return bool(
+            token
+            and scheme == "Token"
+            and hmac.compare_digest(credentials.encode(), token.encode())
+        )
+
+
+@api_view(["GET"])
+@permission_classes([HasMetricsScrapeToken | (IsAuthenticated & IsAdmin)])
+def openmetrics_view(request):
+    """
+    Expose metrics in the OpenMetrics text format for Prometheus.
+    Requires the scrape token or admin authentication.
+    """
+    return HttpResponse(openmetrics.render(), content_type=openmetrics.CONTENT_TYPE)
+
+
+def _profile_download(samples, file_format: str, name: str, interval_ms: float):
+    body, content_type = profiling.render(samples, file_format, name, interval_ms)
+    extension = "speedscope.json" if file_format == "speedscope" else "txt"
+    filename = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+    response = HttpResponse(body, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+
+def _profile_format(request) -> str:
+    # "format" is reserved by DRF for content negotiation
+    return request.query_params.get("output", "collapsed")
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def profile_token_view(request):
+    """
+    Issue a signed token that enables profiling of requests carrying it
+    (X-Profile-Token header or __profile query parameter).
+    """
+    if not getattr(settings, "PROFILING_ENABLED", False):
+        return error_response(
+            "Profiling is disabled", status.HTTP_409_CONFLICT, "PROFILING_DISABLED"
+        )
+    return success_response(
+        data={
+            "token": profiling.issue_token(request.user.pk),
+            "header": "X-Profile-Token",
+            "query_param": profiling.TOKEN_PARAM,
+            "expires_in": getattr(settings, "PROFILING_TOKEN_MAX_AGE", 3600),
+        },
+        message="Profiling token issued",
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def profile_detail_view(request, profile_id):
+    """
+    Download a captured request profile.
+    ?output=collapsed (default) or ?output=speedscope
+    """
+    file_format = _profile_format(request)
+    if file_format not in profiling.FORMATS:
+        return error_response(f"Unknown output format: {file_format}")
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        return error_response(
+            "Profile not found or expired", status.HTTP_404_NOT_FOUND, "NOT_FOUND"
+        )
+    return _profile_download(
+        profile["samples"],
+        file_format,
+        f"{profile['view']}-{profile_id}",
+        profile["interval_ms"],
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def profile_stacks_view(request):
+    """
+    Background-sampled stacks aggregated per view.
+    Without ?view=, lists views and their sample counts; with it, downloads
+    that view's stacks (?output=collapsed or speedscope).
+    """
+    stacks = profiling.background_sampler.snapshot()
+    view_name = request.query_params.get("view")
+    if not view_name:
+        views = sorted(
+            (
+                {"view": view, "samples": sum(samples.values())}
+                for view, samples in stacks.items()
+            ),
+            key=lambda row: row["samples"],
+            reverse=True,
+        )
+        return success_response(data=views, message="Profiled views retrieved")
+
+    file_format = _profile_format(request)
+    if file_format not in profiling.FORMATS:
+        return error_response(f"Unknown output format: {file_format}")
+    if view_name not in stacks:
+        return error_response(
+            "No samples for this view", status.HTTP_404_NOT_FOUND, "NOT_FOUND"
+        )
+    return _profile_download(
+        stacks[view_name],
+        file_format,
+        view_name,
+        getattr(settings, "PROFILING_BACKGROUND_INTERVAL_MS", 0),
+    )
@@ -55,17 +55,19 @@ INSTALLED_APPS = [
     "cookie_consent",
     "theming",
     "backup",
+    "utils",  # Management commands (cache_stats)
 ]
 
 MIDDLEWARE = [
     "utils.middleware.SecurityHeadersMiddleware",  # Custom security headers (replaces Django's SecurityMiddleware)
     "utils.middleware.SensitiveFileProtectionMiddleware",  # Block access to sensitive files (.env, .git, etc.)
     "utils.middleware.RequestIDMiddleware",  # Request ID tracking
+    "utils.request_cache.RequestCacheMiddleware",  # Per-request memoization scope
     "utils.metrics.PerformanceMiddleware",  # Performance metrics
     "utils.middleware.SuppressPollingLogsMiddleware",  # Suppress verbose polling logs
     "django.contrib.sessions.middleware.SessionMiddleware",
     # 'utils.compression.GZipCompressionMiddleware',  # DISABLED: Handled by Nginx
-    # 'analytics.middleware.AnalyticsMiddleware',  # DISABLED: Replaced by GA4
+    "analytics.middleware.AnalyticsMiddleware",  # First-party analytics (opt-in via ANALYTICS_TRACKING_ENABLED)
     "corsheaders.middleware.CorsMiddleware",
     "utils.middleware.CSRFExemptMiddleware",  # Custom CSRF middleware for API (must be before CSRF middleware)
     "django.middleware.common.CommonMiddleware",
@@ -77,13 +79,62 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-QUERY_LOGGING_ENABLED = os.getenv("ENABLE_QUERY_LOGGING", "False").lower() == "true"
+# Per-request query profiling via connection.execute_wrapper (utils.query_logging);
+# cheap enough for production, no DEBUG needed
+QUERY_LOGGING_ENABLED = os.getenv("ENABLE_QUERY_LOGGING", "True").lower() == "true"
+QUERY_LOGGING_SAMPLE_RATE = float(os.getenv("QUERY_LOGGING_SAMPLE_RATE", "1.0"))
+QUERY_LOGGING_MAX_QUERIES = int(os.getenv("QUERY_LOGGING_MAX_QUERIES", "20"))
+QUERY_LOGGING_SLOW_MS = int(os.getenv("QUERY_LOGGING_SLOW_MS", "500"))
+QUERY_LOGGING_DUPLICATE_THRESHOLD = int(
+    os.getenv("QUERY_LOGGING_DUPLICATE_THRESHOLD", "5")
+)
 if QUERY_LOGGING_ENABLED:
     request_id_index = MIDDLEWARE.index("utils.middleware.RequestIDMiddleware")
     MIDDLEWARE.insert(
         request_id_index + 1, "utils.query_logging.QueryLoggingMiddleware"
     )
 
+# Opt-in sampling profiler (utils.profiling). On-demand capture needs a signed
+# token from /api/metrics/profiles/token/; background sampling runs when
+# PROFILING_BACKGROUND_INTERVAL_MS > 0.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+PROFILING_SAMPLE_INTERVAL_MS = int(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5"))
+PROFILING_BACKGROUND_INTERVAL_MS = int(
+    os.getenv("PROFILING_BACKGROUND_INTERVAL_MS", "0")
+)
+PROFILING_FLUSH_INTERVAL = 30  # seconds between background stack flushes
+PROFILING_TOKEN_MAX_AGE = 3600
+PROFILING_MAX_DEPTH = 64
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("utils.middleware.RequestIDMiddleware") + 1,
+        "utils.profiling.ProfilingMiddleware",
+    )
+
+# Server-Timing breakdown per request (utils.server_timing): time per
+# middleware, view, serialization, rendering, db and cache. Requests slower
+# than SERVER_TIMING_LOG_MS are also logged with the breakdown. Clients other
+# than active admins only see "total", unless they send SERVER_TIMING_TOKEN in
+# an X-Server-Timing-Token header (for internal tooling).
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "True").lower() == "true"
+SERVER_TIMING_LOG_MS = int(os.getenv("SERVER_TIMING_LOG_MS", "500"))
+SERVER_TIMING_TOKEN = os.getenv("SERVER_TIMING_TOKEN", "")
+if SERVER_TIMING_ENABLED:
+    # Directly after RequestIDMiddleware, so every layer below is timed
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("utils.middleware.RequestIDMiddleware") + 1,
+        "utils.server_timing.ServerTimingMiddleware",
+    )
+
+# Health probes read results cached by a background refresher
+# (utils.health_checks); intervals and timeouts are in seconds
+HEALTH_CHECK_INTERVAL = int(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+HEALTH_CHECK_DISK_INTERVAL = 60
+HEALTH_CHECK_CELERY_INTERVAL = int(os.getenv("HEALTH_CHECK_CELERY_INTERVAL", "30"))
+HEALTH_CHECK_CELERY_REPLY_TIMEOUT = 1.0
+HEALTH_CHECK_STALE_AFTER = 3  # intervals without a fresh result
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -205,8 +256,8 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "utils.pagination.CustomPagination",
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "utils.throttles.AtomicAnonRateThrottle",
+        "utils.throttles.AtomicUserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "2000/hour",
@@ -270,11 +321,28 @@ EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True").lower() == "true"
 EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "False").lower() == "true"
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", "30"))
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", EMAIL_HOST_USER)
 SUPPORT_EMAIL = os.getenv("SUPPORT_EMAIL", DEFAULT_FROM_EMAIL or EMAIL_HOST_USER)
 SITE_NAME = os.getenv("SITE_NAME", "AAA Accident Solutions LTD")
 SITE_URL = os.getenv("SITE_URL", "http://localhost:8000")
 
+# Persistent SMTP connections (utils.smtp_pool), per process and per account.
+# EMAIL_RATE_LIMITS caps messages per SMTP host across all processes, as
+# DRF-style rates, e.g. {"smtp.gmail.com": "5/s"}; EMAIL_RATE_LIMIT applies to
+# other hosts (empty: no limit).
+EMAIL_POOL_SIZE = int(os.getenv("EMAIL_POOL_SIZE", "4"))
+EMAIL_POOL_IDLE_TIMEOUT = 60  # seconds before an idle connection is reopened
+EMAIL_POOL_MAX_MESSAGES = 100  # messages per connection before reconnecting
+EMAIL_POOL_WAIT_TIMEOUT = 30  # seconds to wait for a free connection
+EMAIL_RATE_LIMIT = os.getenv("EMAIL_RATE_LIMIT", "")
+EMAIL_RATE_LIMITS = {}
+
+# Newsletter campaigns are sent by Celery in chunks (newsletter.delivery)
+NEWSLETTER_CHUNK_SIZE = int(os.getenv("NEWSLETTER_CHUNK_SIZE", "200"))
+NEWSLETTER_MATERIALIZE_BATCH_SIZE = 2000  # recipients inserted per bulk_create
+NEWSLETTER_CLAIM_TIMEOUT = 15 * 60  # seconds before an unfinished chunk is re-sent
+
 # CKEditor 5 settings
 CKEDITOR_5_UPLOAD_FILE_VIEW = "ckeditor_5_upload_file"
 CKEDITOR_5_CONFIGS = {
@@ -317,6 +385,50 @@ GROQ_MODEL = os.getenv("GROQ_MODEL", "mixtral-8x7b-32768")
 # Cache configuration
 CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))  # default to 5 minutes
 
+# First-party page-view tracking (see analytics.ingest). Page views are queued
+# on the request path and written in batches every ANALYTICS_FLUSH_INTERVAL seconds.
+ANALYTICS_TRACKING_ENABLED = (
+    os.getenv("ANALYTICS_TRACKING_ENABLED", "False").lower() == "true"
+)
+ANALYTICS_FLUSH_INTERVAL = int(os.getenv("ANALYTICS_FLUSH_INTERVAL", "5"))
+ANALYTICS_FLUSH_BATCH_SIZE = int(os.getenv("ANALYTICS_FLUSH_BATCH_SIZE", "500"))
+ANALYTICS_BUFFER_SIZE = 10000  # in-process buffer cap when Redis is unavailable
+ANALYTICS_STREAM_MAXLEN = 100000  # Redis stream cap if the flusher falls behind
+# Raw PageView/VisitorSession rows older than this are purged once rolled up
+ANALYTICS_RAW_RETENTION_DAYS = int(os.getenv("ANALYTICS_RAW_RETENTION_DAYS", "90"))
+# Admin audit entries (ActivityLog) are queued and bulk-inserted by a background
+# writer thread (see analytics.audit); disable to write them synchronously
+ACTIVITY_LOG_ASYNC = os.getenv("ACTIVITY_LOG_ASYNC", "True").lower() == "true"
+ACTIVITY_LOG_BATCH_SIZE = 200
+ACTIVITY_LOG_FLUSH_INTERVAL = 1.0  # seconds
+ACTIVITY_LOG_BUFFER_SIZE = 5000  # callers write synchronously once this is full
+ACTIVITY_LOG_SHUTDOWN_TIMEOUT = 10  # seconds to let the writer finish at exit
+# Incremental Parquet export of analytics tables (see analytics.export; needs pyarrow)
+ANALYTICS_EXPORT_ENABLED = (
+    os.getenv("ANALYTICS_EXPORT_ENABLED", "False").lower() == "true"
+)
+ANALYTICS_EXPORT_DIR = os.getenv(
+    "ANALYTICS_EXPORT_DIR", str(BASE_DIR / "exports" / "analytics")
+)
+
+# Per-prefix cache hit/miss/latency counters (see utils.cache_metrics)
+CACHE_STATS_ENABLED = os.getenv("CACHE_STATS_ENABLED", "True").lower() == "true"
+CACHE_STATS_FLUSH_INTERVAL = int(
+    os.getenv("CACHE_STATS_FLUSH_INTERVAL", "10")
+)  # seconds between Redis flushes
+
+# Per-route request counts and latency histograms (see utils.request_metrics)
+REQUEST_METRICS_ENABLED = os.getenv("REQUEST_METRICS_ENABLED", "True").lower() == "true"
+REQUEST_METRICS_FLUSH_INTERVAL = int(
+    os.getenv("REQUEST_METRICS_FLUSH_INTERVAL", "5")
+)  # seconds between Redis flushes
+
+# OpenMetrics endpoint (/api/metrics/prometheus/): scrapers authenticate with
+# "Authorization: Token <METRICS_SCRAPE_TOKEN>"; admins can always read it.
+# METRICS_CELERY_QUEUES lists the broker queues whose length is exported.
+METRICS_SCRAPE_TOKEN = os.getenv("METRICS_SCRAPE_TOKEN", "")
+METRICS_CELERY_QUEUES = os.getenv("METRICS_CELERY_QUEUES", "celery").split(",")
+
 # Smart Redis Configuration
 # Tries to connect to:
 # 1. REDIS_URL from env (Docker usually)
@@ -356,6 +468,13 @@ if REDIS_AVAILABLE:
             "OPTIONS": {
                 "CLIENT_CLASS": "django_redis.client.DefaultClient",
                 # 'IGNORE_EXCEPTIONS': True,  # Optional: prevent errors if Redis dies mid-operation
+                # Plain data as orjson, compressed above COMPRESS_MIN_LENGTH bytes
+                "SERIALIZER": "utils.cache_serializers.CompactSerializer",
+                "COMPRESSOR": "utils.cache_serializers.ThresholdCompressor",
+                "COMPRESS_MIN_LENGTH": int(
+                    os.getenv("CACHE_COMPRESS_MIN_LENGTH", "1024")
+                ),
+                "COMPRESS_ALGORITHM": os.getenv("CACHE_COMPRESS_ALGORITHM", "auto"),
             },
             "KEY_PREFIX": "aaa",
             "TIMEOUT": CACHE_TTL_SECONDS,
@@ -400,8 +519,36 @@ CELERY_BEAT_SCHEDULE = {
         "task": "chatbot.tasks.cleanup_inactive_sessions_task",
         "schedule": crontab(minute="*/5"),  # Run every 5 minutes
     },
+    "analytics-pageview-flush": {
+        "task": "analytics.tasks.flush_page_view_events",
+        "schedule": ANALYTICS_FLUSH_INTERVAL,
+    },
+    "analytics-retention": {
+        "task": "analytics.tasks.purge_old_analytics",
+        "schedule": crontab(hour=4, minute=15),
+    },
+    "analytics-trend-reconcile": {
+        "task": "analytics.tasks.reconcile_trend_counts",
+        "schedule": crontab(hour=4, minute=45),
+    },
+    "analytics-notification-counts": {
+        "task": "analytics.tasks.reconcile_notification_counts",
+        "schedule": crontab(minute="*/10"),
+    },
+    "analytics-rollups": {
+        "task": "analytics.tasks.refresh_analytics_rollups",
+        "schedule": crontab(
+            minute=f"*/{os.getenv('ANALYTICS_ROLLUP_INTERVAL_MINUTES', '15')}"
+        ),
+    },
 }
 
+if ANALYTICS_EXPORT_ENABLED:
+    CELERY_BEAT_SCHEDULE["analytics-export"] = {
+        "task": "analytics.tasks.export_analytics_data",
+        "schedule": crontab(hour=5, minute=0),
+    }
+
 # Backup settings
 BACKUP_ENABLED = os.getenv("BACKUP_ENABLED", "True").lower() == "true"
 BACKUP_RETENTION_DAYS = int(os.getenv("BACKUP_RETENTION_DAYS", "30"))
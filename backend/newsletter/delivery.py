@@ -0,0 +1,351 @@
+"""
+Campaign delivery.
+
+Sending a campaign is split into Celery tasks (newsletter.tasks):
+
+1. Every active subscriber is materialized as a pending NewsletterRecipient,
+   which fixes the audience and tracking token of each email up front.
+2. Pending recipients are split into chunks of NEWSLETTER_CHUNK_SIZE and each
+   chunk is sent by its own task, so several workers send in parallel.
+3. A chunk claims its recipients (pending -> sending), sends them in parallel
+   over the newsletter's SMTP connection pool (utils.smtp_pool) and marks
+   each one sent or failed as soon as the SMTP server answers. The campaign's
+   sent/failed counters advance per chunk; the last chunk to finish marks the
+   campaign sent.
+
+Recipients marked sent are never sent again, so an interrupted campaign can be
+resumed: resume_campaign_task returns recipients left in "sending" by a
+worker that died (claimed longer than NEWSLETTER_CLAIM_TIMEOUT ago) to pending
+and dispatches the remaining work. Only a message that was in flight when its
+worker died can be delivered twice.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.signing import TimestampSigner
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from utils.smtp_pool import SMTPConnectionPool, get_pool
+
+from .models import NewsletterCampaign, NewsletterRecipient, NewsletterSubscriber
+from .personalization import SUBSCRIBER_FOOTER, CompiledCampaign
+
+logger = logging.getLogger(__name__)
+
+# Send from noreply (authenticated account) with reply-to info (alias)
+NEWSLETTER_FROM_EMAIL = "AAA Accident Solutions LTD <noreply@aaa-as.co.uk>"
+NEWSLETTER_REPLY_TO = "info@aaa-as.co.uk"
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def get_newsletter_pool() -> SMTPConnectionPool:
+    """
+    SMTP connection pool that authenticates with the noreply account.
+
+    Kept apart from the transactional pool, so a campaign never holds every
+    connection an OTP email could use.
+    """
+    return get_pool(
+        host=settings.EMAIL_HOST,
+        port=settings.EMAIL_PORT,
+        username=settings.EMAIL_HOST_USER,
+        password=settings.EMAIL_HOST_PASSWORD,
+        use_tls=settings.EMAIL_USE_TLS,
+        use_ssl=settings.EMAIL_USE_SSL,
+    )
+
+
+def tracking_urls(campaign_id: int, base_url: Optional[str] = None) -> Dict[str, str]:
+    """Absolute open-pixel and click-redirect URLs for a campaign."""
+    base_url = (base_url or settings.SITE_URL).rstrip("/")
+    return {
+        "open": base_url + reverse("newsletter:campaign-open", args=[campaign_id]),
+        "click": base_url + reverse("newsletter:campaign-click", args=[campaign_id]),
+    }
+
+
+def render_campaign_email(
+    campaign: NewsletterCampaign,
+    email: str,
+    token: str,
+    urls: Dict[str, str],
+    footer_text: str = SUBSCRIBER_FOOTER,
+):
+    """
+    Return (html, plain text) of ``campaign`` personalized for one recipient.
+
+    For a single email; bulk sends compile the campaign once with
+    CompiledCampaign and render each recipient from it.
+    """
+    return CompiledCampaign(campaign.content, urls, footer_text).render(email, token)
+
+
+def build_message(
+    subject: str, email: str, html_content: str, plain_content: str, connection=None
+) -> EmailMultiAlternatives:
+    msg = EmailMultiAlternatives(
+        subject=subject,
+        body=plain_content,
+        from_email=NEWSLETTER_FROM_EMAIL,
+        to=[email],
+        reply_to=[NEWSLETTER_REPLY_TO],
+        connection=connection,
+    )
+    msg.attach_alternative(html_content, "text/html")
+    return msg
+
+
+def materialize_recipients(campaign: NewsletterCampaign) -> int:
+    """
+    Create a pending recipient, with its tracking token, per active subscriber.
+
+    Subscribers are streamed with .iterator() and inserted with one
+    bulk_create(ignore_conflicts=True) per NEWSLETTER_MATERIALIZE_BATCH_SIZE
+    batch, so existing rows are kept and running this again only adds
+    subscribers that joined since.
+
+    Returns:
+        Number of (non-test) recipients of the campaign
+    """
+    batch_size = _setting("NEWSLETTER_MATERIALIZE_BATCH_SIZE", 2000)
+    signer = TimestampSigner()
+    # A test send to a subscriber's address already created their row
+    test_emails = set(
+        campaign.recipients.filter(is_test=True).values_list("email", flat=True)
+    )
+    subscribers = (
+        NewsletterSubscriber.objects.filter(is_active=True)
+        .values_list("email", flat=True)
+        .iterator(chunk_size=batch_size)
+    )
+
+    start = time.perf_counter()
+    batch: List[str] = []
+    for email in subscribers:
+        batch.append(email)
+        if len(batch) >= batch_size:
+            _insert_recipients(campaign, batch, signer, test_emails)
+            batch = []
+    if batch:
+        _insert_recipients(campaign, batch, signer, test_emails)
+
+    total = campaign.recipients.filter(is_test=False).count()
+    logger.info(
+        f"Campaign {campaign.id}: materialized {total} recipient(s) "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return total
+
+
+def _insert_recipients(
+    campaign: NewsletterCampaign,
+    emails: List[str],
+    signer: TimestampSigner,
+    test_emails: set,
+) -> None:
+    NewsletterRecipient.objects.bulk_create(
+        [
+            NewsletterRecipient(
+                campaign=campaign,
+                email=email,
+                token=signer.sign(f"{campaign.id}:{email}"),
+            )
+            for email in emails
+        ],
+        batch_size=len(emails),
+        ignore_conflicts=True,
+    )
+    promoted = test_emails.intersection(emails)
+    if promoted:
+        campaign.recipients.filter(email__in=promoted).update(
+            is_test=False, delivery_status=NewsletterRecipient.STATUS_PENDING
+        )
+
+
+def pending_chunks(campaign_id: int, chunk_size: int) -> Iterator[List[int]]:
+    """Ids of the campaign's pending recipients, ``chunk_size`` at a time."""
+    ids = (
+        NewsletterRecipient.objects.filter(
+            campaign_id=campaign_id,
+            is_test=False,
+            delivery_status=NewsletterRecipient.STATUS_PENDING,
+        )
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    chunk: List[int] = []
+    for recipient_id in ids.iterator(chunk_size=2000):
+        chunk.append(recipient_id)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def claim_recipients(recipient_ids: List[int]) -> List[NewsletterRecipient]:
+    """Move still-pending recipients among ``recipient_ids`` to "sending"."""
+    with transaction.atomic():
+        recipients = list(
+            NewsletterRecipient.objects.select_for_update(skip_locked=True)
+            .filter(
+                id__in=recipient_ids,
+                delivery_status=NewsletterRecipient.STATUS_PENDING,
+            )
+            .only("id", "email", "token")
+        )
+        NewsletterRecipient.objects.filter(
+            id__in=[recipient.id for recipient in recipients]
+        ).update(
+            delivery_status=NewsletterRecipient.STATUS_SENDING,
+            claimed_at=timezone.now(),
+        )
+    return recipients
+
+
+def send_chunk(
+    campaign_id: int, recipient_ids: List[int], base_url: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Send the campaign to the pending recipients among ``recipient_ids``.
+
+    Returns:
+        Counts of sent and failed messages
+    """
+    campaign = NewsletterCampaign.objects.get(pk=campaign_id)
+    if campaign.status != "sending":
+        return {"sent": 0, "failed": 0}
+
+    recipients = claim_recipients(recipient_ids)
+    if not recipients:
+        return {"sent": 0, "failed": 0}
+
+    compiled = CompiledCampaign(campaign.content, tracking_urls(campaign.id, base_url))
+    sent = failed = 0
+    pool = get_newsletter_pool()
+    try:
+        pool.warm()
+    except Exception:
+        # Nothing was sent; hand the chunk back for the task's retry
+        NewsletterRecipient.objects.filter(
+            id__in=[recipient.id for recipient in recipients]
+        ).update(delivery_status=NewsletterRecipient.STATUS_PENDING, claimed_at=None)
+        raise
+
+    messages = {}
+    for recipient in recipients:
+        html_content, plain_content = compiled.render(recipient.email, recipient.token)
+        message = build_message(
+            campaign.subject, recipient.email, html_content, plain_content
+        )
+        messages[id(message)] = (message, recipient)
+
+    try:
+        # Sent in parallel over the pool; results are recorded as they arrive
+        for message, error in pool.send_iter(m for m, _ in messages.values()):
+            recipient = messages[id(message)][1]
+            if error is not None:
+                failed += 1
+                NewsletterRecipient.objects.filter(pk=recipient.pk).update(
+                    delivery_status=NewsletterRecipient.STATUS_FAILED,
+                    delivery_error=str(error)[:1000],
+                )
+            else:
+                sent += 1
+                NewsletterRecipient.objects.filter(pk=recipient.pk).update(
+                    delivery_status=NewsletterRecipient.STATUS_SENT,
+                    delivered_at=timezone.now(),
+                )
+    finally:
+        NewsletterCampaign.objects.filter(pk=campaign_id).update(
+            sent_count=F("sent_count") + sent,
+            failed_count=F("failed_count") + failed,
+        )
+
+    logger.info(
+        f"Campaign {campaign_id}: chunk of {len(recipients)} sent "
+        f"({sent} sent, {failed} failed)"
+    )
+    finish_if_done(campaign_id)
+    return {"sent": sent, "failed": failed}
+
+
+def finish_if_done(campaign_id: int) -> bool:
+    """Mark the campaign sent (or cancelled if nothing went out) once no work is left."""
+    outstanding = NewsletterRecipient.objects.filter(
+        campaign_id=campaign_id,
+        is_test=False,
+        delivery_status__in=[
+            NewsletterRecipient.STATUS_PENDING,
+            NewsletterRecipient.STATUS_SENDING,
+        ],
+    )
+    if outstanding.exists():
+        return False
+    campaign = NewsletterCampaign.objects.get(pk=campaign_id)
+    final_status = "sent" if campaign.sent_count else "cancelled"
+    NewsletterCampaign.objects.filter(pk=campaign_id, status="sending").update(
+        status=final_status
+    )
+    return True
+
+
+def release_stale_claims(campaign_id: int) -> int:
+    """Return recipients claimed by a worker that never finished to pending."""
+    cutoff = timezone.now() - timedelta(
+        seconds=_setting("NEWSLETTER_CLAIM_TIMEOUT", 15 * 60)
+    )
+    return NewsletterRecipient.objects.filter(
+        campaign_id=campaign_id,
+        is_test=False,
+        delivery_status=NewsletterRecipient.STATUS_SENDING,
+        claimed_at__lt=cutoff,
+    ).update(delivery_status=NewsletterRecipient.STATUS_PENDING, claimed_at=None)
+
+
+def retry_failed(campaign_id: int) -> int:
+    """Return failed recipients to pending and take them off the failed count."""
+    with transaction.atomic():
+        count = NewsletterRecipient.objects.filter(
+            campaign_id=campaign_id,
+            is_test=False,
+            delivery_status=NewsletterRecipient.STATUS_FAILED,
+        ).update(delivery_status=NewsletterRecipient.STATUS_PENDING, delivery_error="")
+        NewsletterCampaign.objects.filter(pk=campaign_id).update(
+            failed_count=F("failed_count") - count
+        )
+    return count
+
+
+def campaign_progress(campaign: NewsletterCampaign) -> Dict[str, object]:
+    """Delivery progress of a campaign, counted from its recipients."""
+    counts = campaign.recipients.filter(is_test=False).aggregate(
+        total=Count("id"),
+        **{
+            status: Count("id", filter=Q(delivery_status=status))
+            for status, _ in NewsletterRecipient.STATUS_CHOICES
+        },
+    )
+    total = counts.pop("total")
+    done = (
+        counts[NewsletterRecipient.STATUS_SENT]
+        + counts[NewsletterRecipient.STATUS_FAILED]
+    )
+    return {
+        "campaign_id": campaign.id,
+        "status": campaign.status,
+        "total": total,
+        **counts,
+        "percent_complete": round(done * 100 / total, 1) if total else 0.0,
+    }
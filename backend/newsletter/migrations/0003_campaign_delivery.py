@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:20
+
+from django.db import migrations, models
+
+
+def mark_existing_deliveries(apps, schema_editor):
+    """Recipients of campaigns sent before delivery tracking count as sent."""
+    NewsletterCampaign = apps.get_model("newsletter", "NewsletterCampaign")
+    NewsletterRecipient = apps.get_model("newsletter", "NewsletterRecipient")
+    NewsletterRecipient.objects.filter(
+        is_test=False, campaign__status__in=["sending", "sent"]
+    ).update(delivery_status="sent")
+    for campaign in NewsletterCampaign.objects.filter(status="sent"):
+        campaign.sent_count = campaign.recipients.filter(is_test=False).count()
+        campaign.recipients_materialized_at = campaign.sent_at
+        campaign.save(update_fields=["sent_count", "recipients_materialized_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletter", "0002_newsletterrecipient"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newslettercampaign",
+            name="failed_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="newslettercampaign",
+            name="recipients_materialized_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="newslettercampaign",
+            name="sent_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="newsletterrecipient",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="newsletterrecipient",
+            name="delivered_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="newsletterrecipient",
+            name="delivery_error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="newsletterrecipient",
+            name="delivery_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("sending", "Sending"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=10,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="newsletterrecipient",
+            index=models.Index(
+                fields=["campaign", "delivery_status"],
+                name="newsletter__campaig_8a1c13_idx",
+            ),
+        ),
+        migrations.RunPython(mark_existing_deliveries, migrations.RunPython.noop),
+    ]
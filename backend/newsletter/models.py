@@ -35,6 +35,10 @@ class NewsletterCampaign(models.Model):
     sent_at = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="draft")
     recipients_count = models.IntegerField(default=0)
+    sent_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    # Set once a recipient row exists for every subscriber at send time
+    recipients_materialized_at = models.DateTimeField(null=True, blank=True)
     opened_count = models.IntegerField(default=0)
     clicked_count = models.IntegerField(default=0)
     created_by = models.ForeignKey("accounts.User", on_delete=models.CASCADE)
@@ -51,12 +55,29 @@ class NewsletterCampaign(models.Model):
 class NewsletterRecipient(models.Model):
     """Per-recipient tracking for a campaign."""
 
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
     campaign = models.ForeignKey(
         NewsletterCampaign, on_delete=models.CASCADE, related_name="recipients"
     )
     email = models.EmailField()
     token = models.CharField(max_length=255, unique=True)
     is_test = models.BooleanField(default=False)
+    delivery_status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    delivery_error = models.TextField(blank=True)
     open_count = models.IntegerField(default=0)
     click_count = models.IntegerField(default=0)
     first_opened_at = models.DateTimeField(null=True, blank=True)
@@ -70,6 +91,7 @@ class NewsletterRecipient(models.Model):
         unique_together = ("campaign", "email")
         indexes = [
             models.Index(fields=["campaign", "email"]),
+            models.Index(fields=["campaign", "delivery_status"]),
         ]
 
     def __str__(self):
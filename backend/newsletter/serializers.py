@@ -26,6 +26,8 @@ class NewsletterCampaignSerializer(serializers.ModelSerializer):
             "updated_at",
             "sent_at",
             "recipients_count",
+            "sent_count",
+            "failed_count",
             "opened_count",
             "clicked_count",
         ]
@@ -0,0 +1,85 @@
+import logging
+import smtplib
+from typing import List, Optional
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .delivery import (
+    finish_if_done,
+    materialize_recipients,
+    pending_chunks,
+    release_stale_claims,
+    send_chunk,
+)
+from .models import NewsletterCampaign
+
+logger = logging.getLogger(__name__)
+
+
+def dispatch_chunks(campaign_id: int, base_url: Optional[str] = None) -> int:
+    """Queue one send task per chunk of pending recipients."""
+    chunk_size = getattr(settings, "NEWSLETTER_CHUNK_SIZE", 200)
+    chunks = 0
+    for recipient_ids in pending_chunks(campaign_id, chunk_size):
+        send_campaign_chunk.delay(campaign_id, recipient_ids, base_url)
+        chunks += 1
+    if not chunks:
+        finish_if_done(campaign_id)
+    return chunks
+
+
+def materialize_campaign(campaign: NewsletterCampaign) -> int:
+    """Create the campaign's recipient rows and record that they are complete."""
+    recipients = materialize_recipients(campaign)
+    NewsletterCampaign.objects.filter(pk=campaign.pk).update(
+        recipients_count=recipients, recipients_materialized_at=timezone.now()
+    )
+    return recipients
+
+
+@shared_task(ignore_result=True)
+def send_campaign_task(campaign_id: int, base_url: Optional[str] = None) -> dict:
+    """Materialize a campaign's recipients and fan the send out in chunks."""
+    recipients = materialize_campaign(NewsletterCampaign.objects.get(pk=campaign_id))
+    chunks = dispatch_chunks(campaign_id, base_url)
+    logger.info(
+        f"Campaign {campaign_id}: {recipients} recipient(s) queued in {chunks} chunk(s)"
+    )
+    return {"recipients": recipients, "chunks": chunks}
+
+
+@shared_task(ignore_result=True)
+def resume_campaign_task(campaign_id: int, base_url: Optional[str] = None) -> dict:
+    """
+    Re-dispatch the pending recipients of an interrupted campaign.
+
+    A campaign interrupted before all of its recipients were created is
+    materialized first, so subscribers past the interruption are not skipped.
+    """
+    campaign = NewsletterCampaign.objects.get(pk=campaign_id)
+    materialized = campaign.recipients_materialized_at is None
+    if materialized:
+        materialize_campaign(campaign)
+    released = release_stale_claims(campaign_id)
+    chunks = dispatch_chunks(campaign_id, base_url)
+    logger.info(
+        f"Campaign {campaign_id}: resumed with {chunks} chunk(s), "
+        f"{released} stale claim(s) released"
+        + (", recipients materialized" if materialized else "")
+    )
+    return {"released": released, "chunks": chunks, "materialized": materialized}
+
+
+@shared_task(
+    ignore_result=True,
+    autoretry_for=(smtplib.SMTPException, OSError),
+    retry_backoff=True,
+    max_retries=5,
+)
+def send_campaign_chunk(
+    campaign_id: int, recipient_ids: List[int], base_url: Optional[str] = None
+) -> dict:
+    """Send one chunk of a campaign in parallel over the newsletter SMTP pool."""
+    return send_chunk(campaign_id, recipient_ids, base_url)
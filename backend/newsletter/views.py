@@ -1,19 +1,12 @@
-import re
+import logging
 
 from django.conf import settings
-from django.core.mail import (
-    EmailMultiAlternatives,
-    get_connection,
-    send_mail,
-    send_mass_mail,
-)
+from django.core.mail import send_mail, send_mass_mail
 from django.core.signing import TimestampSigner
 from django.db.models import F
 from django.http import HttpResponse, HttpResponseRedirect
 from django.template.loader import render_to_string
-from django.urls import reverse
 from django.utils import timezone
-from django.utils.html import strip_tags
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
@@ -21,9 +14,22 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
 from utils.permissions import IsAdmin
-
+from utils.smtp_pool import PooledEmailBackend
+
+from .delivery import (
+    build_message,
+    campaign_progress,
+    get_newsletter_pool,
+    render_campaign_email,
+    retry_failed,
+    tracking_urls,
+)
 from .models import NewsletterCampaign, NewsletterRecipient, NewsletterSubscriber
+from .personalization import TEST_FOOTER
 from .serializers import NewsletterCampaignSerializer, NewsletterSubscriberSerializer
+from .tasks import resume_campaign_task, send_campaign_task
+
+logger = logging.getLogger(__name__)
 
 
 @api_view(["POST"])
@@ -148,7 +154,7 @@ class NewsletterCampaignViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"])
     def send_campaign(self, request, pk=None):
-        """Send newsletter campaign"""
+        """Queue a newsletter campaign for background delivery"""
         campaign = self.get_object()
 
         if campaign.status != "draft":
@@ -157,139 +163,75 @@ class NewsletterCampaignViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Get active subscribers
-        subscribers = NewsletterSubscriber.objects.filter(is_active=True)
-        recipients = [subscriber.email for subscriber in subscribers]
-
-        if not recipients:
+        if not NewsletterSubscriber.objects.filter(is_active=True).exists():
             return Response(
                 {"error": "No active subscribers found"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Update campaign status
-        campaign.status = "sending"
-        campaign.recipients_count = len(recipients)
-        campaign.sent_at = timezone.now()
-        campaign.save()
-
-        campaign.save()
+        # Only one request can move the campaign out of draft
+        updated = NewsletterCampaign.objects.filter(
+            pk=campaign.pk, status="draft"
+        ).update(status="sending", sent_at=timezone.now())
+        if not updated:
+            return Response(
+                {"error": "Campaign can only be sent from draft status"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        # Send emails (this would typically be done asynchronously with Celery)
         try:
-            # Custom connection to authenticate with noreply but send as news
-            connection = get_connection(
-                host=settings.EMAIL_HOST,
-                port=settings.EMAIL_PORT,
-                username=settings.EMAIL_HOST_USER,
-                password=settings.EMAIL_HOST_PASSWORD,
-                use_tls=settings.EMAIL_USE_TLS,
-                use_ssl=settings.EMAIL_USE_SSL,
-                fail_silently=False,
+            send_campaign_task.delay(campaign.id, request.build_absolute_uri("/"))
+        except Exception as e:
+            # Nothing was queued; put the campaign back so it can be sent again
+            logger.error(f"Failed to queue campaign {campaign.id}: {e}")
+            NewsletterCampaign.objects.filter(pk=campaign.pk).update(
+                status="draft", sent_at=None
+            )
+            return Response(
+                {"error": "Could not queue the campaign for sending, try again"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
+        return Response(
+            {"message": "Campaign queued for sending", "campaign_id": campaign.id},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
-            # Send from noreply (authenticated account) with reply-to news (alias)
-            NEWSLETTER_FROM_EMAIL = "AAA Accident Solutions LTD <noreply@aaa-as.co.uk>"
-            NEWSLETTER_REPLY_TO = "info@aaa-as.co.uk"
+    @action(detail=True, methods=["get"])
+    def progress(self, request, pk=None):
+        """Delivery progress of a campaign"""
+        return Response(campaign_progress(self.get_object()))
 
-            # For simplicity, sending synchronously (use Celery in production)
-            sent_count = 0
-            errors = []
-            signer = TimestampSigner()
+    @action(detail=True, methods=["post"])
+    def resume(self, request, pk=None):
+        """Resume an interrupted campaign; optionally retry failed recipients"""
+        campaign = self.get_object()
 
-            # Open connection once for mass sending
-            connection.open()
-
-            for email in recipients:
-                try:
-                    # Ensure recipient tracking record and token
-                    recipient, _ = NewsletterRecipient.objects.get_or_create(
-                        campaign=campaign,
-                        email=email,
-                        defaults={
-                            "is_test": False,
-                            "token": signer.sign(f"{campaign.id}:{email}"),
-                        },
-                    )
-                    if not recipient.token:
-                        recipient.token = signer.sign(f"{campaign.id}:{email}")
-                        recipient.save(update_fields=["token"])
-
-                    html_content = campaign.content.replace("{{email}}", email)
-                    footer_html = f"""
-                    <hr style='border:none;border-top:1px solid #eee;margin:20px 0;'/>
-                    <div style='font-size:12px;color:#666'>
-                      You are receiving this email because you subscribed to our newsletter.
-                      <br/>
-                      <a href="/unsubscribe?email={email}">Unsubscribe</a>
-                    </div>
-                    """
-                    # Append tracking pixel (open)
-                    pixel_url = request.build_absolute_uri(
-                        reverse("newsletter:campaign-open", args=[campaign.id])
-                    )
-                    tracking_pixel = f'<img src="{pixel_url}?t={recipient.token}" width="1" height="1" style="display:none" alt="." />'
-                    # Rewrite links to pass through click tracker
-                    click_base = request.build_absolute_uri(
-                        reverse("newsletter:campaign-click", args=[campaign.id])
-                    )
-
-                    def _rewrite_link(match: re.Match) -> str:
-                        href = match.group(1)
-                        # Only rewrite http(s) links
-                        if href.startswith("http://") or href.startswith("https://"):
-                            return f'href="{click_base}?t={recipient.token}&u={href}"'
-                        return f'href="{href}"'
-
-                    html_content = re.sub(
-                        r'href="([^"]+)"', _rewrite_link, html_content
-                    )
-                    html_content = f"{html_content}{tracking_pixel}{footer_html}"
-                    plain_content = strip_tags(html_content)
-
-                    # Use EmailMultiAlternatives to support HTML
-                    msg = EmailMultiAlternatives(
-                        subject=campaign.subject,
-                        body=plain_content,
-                        from_email=NEWSLETTER_FROM_EMAIL,
-                        to=[email],
-                        reply_to=[NEWSLETTER_REPLY_TO],
-                        connection=connection,
-                    )
-                    msg.attach_alternative(html_content, "text/html")
-                    msg.send(fail_silently=False)
-                    sent_count += 1
-                except Exception as e:
-                    errors.append(f"Failed to send to {email}: {str(e)}")
-                    # Continue sending to other recipients even if one fails
-
-            # Close connection
-            connection.close()
-
-            if sent_count > 0:
-                campaign.status = "sent"
-                campaign.save()
-                message = f"Campaign sent to {sent_count} out of {len(recipients)} subscribers"
-                if errors:
-                    message += f". {len(errors)} failed."
-                return Response({"message": message})
-            else:
-                campaign.status = "cancelled"
-                campaign.save()
-                return Response(
-                    {
-                        "error": f'Failed to send campaign to any subscribers. Errors: {", ".join(errors[:5])}'
-                    },
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
+        if campaign.status not in ("sending", "sent", "cancelled"):
+            return Response(
+                {"error": "Only campaigns that have started sending can be resumed"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
+        retried = 0
+        if str(request.data.get("retry_failed", "")).lower() in ("1", "true"):
+            retried = retry_failed(campaign.id)
+        NewsletterCampaign.objects.filter(pk=campaign.pk).update(status="sending")
+        try:
+            resume_campaign_task.delay(campaign.id, request.build_absolute_uri("/"))
         except Exception as e:
-            campaign.status = "cancelled"
-            campaign.save()
+            # Nothing was queued; put the campaign back as it was
+            logger.error(f"Failed to queue resume of campaign {campaign.id}: {e}")
+            NewsletterCampaign.objects.filter(pk=campaign.pk).update(
+                status=campaign.status
+            )
             return Response(
-                {"error": f"Failed to send campaign: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                {"error": "Could not queue the campaign for resuming, try again"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
+        return Response(
+            {"message": "Campaign resumed", "retried_failed": retried},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
     @action(detail=True, methods=["post"])
     def send_test(self, request, pk=None):
@@ -316,58 +258,20 @@ class NewsletterCampaignViewSet(viewsets.ModelViewSet):
                 recipient.is_test = True
                 recipient.save(update_fields=["token", "is_test"])
 
-            html_content = campaign.content.replace("{{email}}", email)
-            footer_html = f"""
-            <hr style='border:none;border-top:1px solid #eee;margin:20px 0;'/>
-            <div style='font-size:12px;color:#666'>
-              This is a test email preview of your campaign.
-              <br/>
-              <a href="/unsubscribe?email={email}">Unsubscribe</a>
-            </div>
-            """
-            # Append tracking pixel (open)
-            pixel_url = request.build_absolute_uri(
-                reverse("newsletter:campaign-open", args=[campaign.id])
-            )
-            tracking_pixel = f'<img src="{pixel_url}?t={recipient.token}" width="1" height="1" style="display:none" alt="." />'
-            # Rewrite links to pass through click tracker
-            click_base = request.build_absolute_uri(
-                reverse("newsletter:campaign-click", args=[campaign.id])
-            )
-
-            def _rewrite_link(match: re.Match) -> str:
-                href = match.group(1)
-                if href.startswith("http://") or href.startswith("https://"):
-                    return f'href="{click_base}?t={recipient.token}&u={href}"'
-                return f'href="{href}"'
-
-            html_content = re.sub(r'href="([^"]+)"', _rewrite_link, html_content)
-            html_content = f"{html_content}{tracking_pixel}{footer_html}"
-            plain_content = strip_tags(html_content)
-
-            # Custom connection for test email
-            connection = get_connection(
-                host=settings.EMAIL_HOST,
-                port=settings.EMAIL_PORT,
-                username=settings.EMAIL_HOST_USER,
-                password=settings.EMAIL_HOST_PASSWORD,
-                use_tls=settings.EMAIL_USE_TLS,
-                use_ssl=settings.EMAIL_USE_SSL,
-                fail_silently=False,
-            )
-            NEWSLETTER_FROM_EMAIL = "AAA Accident Solutions LTD <noreply@aaa-as.co.uk>"
-            NEWSLETTER_REPLY_TO = "info@aaa-as.co.uk"
-
-            msg = EmailMultiAlternatives(
-                subject=f"[TEST] {campaign.subject}",
-                body=plain_content,
-                from_email=NEWSLETTER_FROM_EMAIL,
-                to=[email],
-                reply_to=[NEWSLETTER_REPLY_TO],
-                connection=connection,
+            html_content, plain_content = render_campaign_email(
+                campaign,
+                email,
+                recipient.token,
+                tracking_urls(campaign.id, request.build_absolute_uri("/")),
+                footer_text=TEST_FOOTER,
             )
-            msg.attach_alternative(html_content, "text/html")
-            msg.send(fail_silently=False)
+            build_message(
+                f"[TEST] {campaign.subject}",
+                email,
+                html_content,
+                plain_content,
+                PooledEmailBackend(pool=get_newsletter_pool()),
+            ).send(fail_silently=False)
             return Response({"message": f"Test email sent to {email}"})
         except Exception as e:
             return Response(
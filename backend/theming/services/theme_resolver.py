@@ -2,6 +2,7 @@ from datetime import date
 
 from django.conf import settings
 from django.core.cache import cache
+from django.db.models import Q
 from django.utils import timezone
 
 from config.themes import THEMES
@@ -118,23 +119,23 @@ def get_active_theme(request=None):
     event = get_active_event(today)
 
     if event:
-        theme_key = event.theme_key
+        db_theme = Theme.objects.filter(key=event.theme_key).first()
     else:
-        # Check for user-selected active theme
-        active_theme = Theme.objects.filter(is_active=True).first()
-        if active_theme:
-            theme_key = active_theme.key
-        else:
-            theme_key = "default"
-
-    # Try to get theme from database
-    try:
-        db_theme = Theme.objects.get(key=theme_key)
+        # The user-selected active theme, else the stored "default" theme, in
+        # one query
+        db_theme = (
+            Theme.objects.filter(Q(is_active=True) | Q(key="default"))
+            .order_by("-is_active", "name")
+            .first()
+        )
+
+    if db_theme is not None:
+        theme_key = db_theme.key
         theme_data = db_theme.to_dict()
-    except Theme.DoesNotExist:
+    else:
         # Fallback to default
-        theme_data = DEFAULT_THEME
         theme_key = "default"
+        theme_data = DEFAULT_THEME
 
     return {
         "theme_key": theme_key,
@@ -4,7 +4,8 @@ Bulk operations utilities for efficient batch processing.
 
 from typing import Any, Dict, List, Optional, Type, TypeVar
 
-from django.db import models, transaction
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, transaction
 from django.db.models import QuerySet
 
 ModelType = TypeVar("ModelType", bound=models.Model)
@@ -146,3 +147,37 @@ def bulk_update_fields(
             updated_count += len(batch)
 
     return updated_count
+
+
+def bulk_count(querysets: Dict[str, QuerySet]) -> Dict[str, int]:
+    """
+    Count several querysets in a single database round trip.
+
+    Each queryset becomes a scalar ``COUNT(*)`` subquery of one SELECT, so
+    counts across different tables cost one query instead of one each.
+
+    Args:
+        querysets: Mapping of result name to QuerySet (all on one database)
+
+    Returns:
+        Mapping of result name to row count
+    """
+    if not querysets:
+        return {}
+
+    columns, params = [], []
+    for queryset in querysets.values():
+        try:
+            sql, qs_params = queryset.order_by().values("pk").query.sql_with_params()
+        except EmptyResultSet:
+            columns.append("0")
+            continue
+        columns.append(f"(SELECT COUNT(*) FROM ({sql}) AS counted)")
+        params.extend(qs_params)
+
+    alias = next(iter(querysets.values())).db
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(columns)}", params)
+        row = cursor.fetchone()
+
+    return {name: int(count) for name, count in zip(querysets, row)}
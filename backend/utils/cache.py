@@ -10,6 +10,8 @@ from typing import Any, Callable, Optional, TypeVar
 from django.conf import settings
 from django.core.cache import cache
 
+from utils.cache_metrics import instrumented_get, instrumented_set
+
 T = TypeVar("T")
 
 # Cache timeout defaults (in seconds)
@@ -18,6 +20,10 @@ CACHE_TIMEOUT_MEDIUM = 60 * 30  # 30 minutes
 CACHE_TIMEOUT_LONG = 60 * 60 * 24  # 24 hours
 
 
+def _stable_hash(value: str) -> str:
+    return hashlib.md5(value.encode()).hexdigest()[:16]
+
+
 def get_cache_key(prefix: str, *args, **kwargs) -> str:
     """
     Generate a cache key from prefix and arguments.
@@ -30,14 +36,15 @@ def get_cache_key(prefix: str, *args, **kwargs) -> str:
     Returns:
         Cache key string
     """
-    # Create a hash of arguments
+    # Create a hash of arguments (md5, not hash(): str hashes are randomized
+    # per process, which would give every worker different keys)
     key_parts = [prefix]
     if args:
-        key_parts.append(str(hash(str(args))))
+        key_parts.append(_stable_hash(str(args)))
     if kwargs:
         # Sort kwargs for consistent keys
         sorted_kwargs = sorted(kwargs.items())
-        key_parts.append(str(hash(str(sorted_kwargs))))
+        key_parts.append(_stable_hash(str(sorted_kwargs)))
 
     key_string = ":".join(key_parts)
     # Create hash for long keys
@@ -69,7 +76,7 @@ def cache_result(timeout: int = CACHE_TIMEOUT_MEDIUM, key_prefix: Optional[str]
             cache_key = get_cache_key(prefix, *args, **kwargs)
 
             # Try to get from cache
-            cached_result = cache.get(cache_key)
+            cached_result = instrumented_get(prefix, cache_key)
             if cached_result is not None:
                 return cached_result
 
@@ -77,7 +84,7 @@ def cache_result(timeout: int = CACHE_TIMEOUT_MEDIUM, key_prefix: Optional[str]
             result = func(*args, **kwargs)
 
             # Store in cache
-            cache.set(cache_key, result, timeout)
+            instrumented_set(prefix, cache_key, result, timeout)
 
             return result
 
@@ -130,7 +137,7 @@ def cache_queryset(
     cache_key = get_cache_key(key_prefix, sql=sql)
 
     # Try to get from cache
-    cached_result = cache.get(cache_key)
+    cached_result = instrumented_get(key_prefix, cache_key)
     if cached_result is not None:
         return cached_result
 
@@ -138,7 +145,7 @@ def cache_queryset(
     result = list(queryset)
 
     # Store in cache
-    cache.set(cache_key, result, timeout)
+    instrumented_set(key_prefix, cache_key, result, timeout)
 
     return result
 
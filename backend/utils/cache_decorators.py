@@ -8,9 +8,18 @@ from django.core.cache import cache
 from django.http import HttpResponse
 from rest_framework.response import Response  # Moved to global import
 
+from utils.cache_metrics import cache_stats, instrumented_get, instrumented_set
+
 logger = logging.getLogger(__name__)
 
 
+def _route_label(request):
+    """Low-cardinality stats label for a request (URL pattern, not raw path)."""
+    match = getattr(request, "resolver_match", None)
+    route = getattr(match, "route", None)
+    return f"api:/{route}" if route else f"api:{request.path}"
+
+
 def cache_page_custom(timeout=300, key_prefix="page"):
     """
     Custom page caching decorator with more control.
@@ -37,7 +46,7 @@ def cache_page_custom(timeout=300, key_prefix="page"):
 
             # Try to get cached response
             try:
-                cached_response = cache.get(cache_key)
+                cached_response = instrumented_get(key_prefix, cache_key)
                 if cached_response is not None:
                     logger.debug(f"Cache HIT for {cache_key}")
                     # Add header to indicate cache hit
@@ -57,7 +66,7 @@ def cache_page_custom(timeout=300, key_prefix="page"):
                 response["X-Cache"] = "MISS"
                 response["X-Cache-Key"] = cache_key
                 try:
-                    cache.set(cache_key, response, timeout)
+                    instrumented_set(key_prefix, cache_key, response, timeout)
                     logger.info(f"Cached response for {cache_key} (TTL: {timeout}s)")
                 except Exception as e:
                     logger.warning(f"Cache set failed for {cache_key}: {e}")
@@ -103,13 +112,15 @@ def cache_api_response(timeout=60, key_func=None):
                 query_hash = hashlib.md5(request.GET.urlencode().encode()).hexdigest()
                 cache_key = f"api:{path}:{query_hash}"
 
+            stats_label = _route_label(request)
+
             # Try cache
             try:
-                cached_packet = cache.get(cache_key)
+                cached_packet = instrumented_get(stats_label, cache_key)
                 if cached_packet is not None:
                     # Check if it's our new dict format or old Response object
                     if isinstance(cached_packet, dict) and "data" in cached_packet:
-                        logger.info(f"API Cache HIT for {cache_key}")
+                        logger.debug(f"API Cache HIT for {cache_key}")
                         # Reconstruct Response
                         response = Response(
                             data=cached_packet["data"],
@@ -120,14 +131,14 @@ def cache_api_response(timeout=60, key_func=None):
                         return response
                     elif hasattr(cached_packet, "data"):
                         # Legacy cache support (if pickling worked previously)
-                        logger.info(f"API Cache HIT (Legacy) for {cache_key}")
+                        logger.debug(f"API Cache HIT (Legacy) for {cache_key}")
                         cached_packet["X-Cache"] = "HIT"
                         return cached_packet
             except Exception as e:
                 logger.warning(f"API Cache get failed for {cache_key}: {e}")
 
             # Call view
-            logger.info(f"API Cache MISS for {cache_key}")
+            logger.debug(f"API Cache MISS for {cache_key}")
             response = view_func(*args, **kwargs)
 
             # Cache successful responses only
@@ -139,7 +150,7 @@ def cache_api_response(timeout=60, key_func=None):
                         "data": response.data,
                         "status": response.status_code,
                     }
-                    cache.set(cache_key, cache_packet, timeout)
+                    instrumented_set(stats_label, cache_key, cache_packet, timeout)
                     logger.debug(
                         f"Cached API response for {cache_key} (TTL: {timeout}s)"
                     )
@@ -253,7 +264,7 @@ def cache_queryset(timeout=300, key_prefix="queryset"):
 
             # Try cache
             try:
-                cached_data = cache.get(cache_key)
+                cached_data = instrumented_get(key_prefix, cache_key)
                 if cached_data is not None:
                     logger.debug(f"Query Cache HIT for {cache_key}")
                     return cached_data
@@ -271,7 +282,7 @@ def cache_queryset(timeout=300, key_prefix="queryset"):
                     result = list(result)
 
                 try:
-                    cache.set(cache_key, result, timeout)
+                    instrumented_set(key_prefix, cache_key, result, timeout)
                     logger.info(f"Cached queryset for {cache_key} (TTL: {timeout}s)")
                 except Exception as e:
                     logger.warning(f"Query Cache set failed for {cache_key}: {e}")
@@ -300,10 +311,13 @@ def clear_all_caches():
         return False
 
 
-def get_cache_stats():
+def get_cache_stats(top=10):
     """
     Get current cache statistics.
 
+    Args:
+        top: Number of per-prefix rows to include (busiest first)
+
     Returns:
         dict with cache stats or None if not available
     """
@@ -333,6 +347,9 @@ def get_cache_stats():
         else:
             stats["hit_rate"] = 0.0
 
+        cache_stats.flush()
+        stats["prefixes"] = cache_stats.top(top)
+
         return stats
 
     except Exception as e:
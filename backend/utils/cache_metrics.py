@@ -0,0 +1,249 @@
+"""
+Per-prefix cache instrumentation.
+
+Hits, misses, sets, stored bytes and fetch latency are aggregated in-process
+per cache prefix (a ``cache_result`` key prefix, an API route, ...) and flushed
+as deltas to a shared Redis hash every few seconds, so every worker contributes
+to one breakdown without adding a round trip to each cache access.
+"""
+
+import logging
+import pickle
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from utils.cache_serializers import pop_last_encoded_size
+from utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+STATS_HASH_KEY = "aaa:cache_stats"
+FIELD_SEPARATOR = "|"
+COUNTER_FIELDS = ("hits", "misses", "sets", "bytes", "raw_bytes", "fetch_ms")
+
+
+def _empty_counters() -> Dict[str, float]:
+    return {field: 0 for field in COUNTER_FIELDS}
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the stored size of a cache value in bytes."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+def summarize(prefix: str, counters: Dict[str, float]) -> Dict[str, Any]:
+    """Turn raw counters into a display row with derived ratios."""
+    hits = int(counters.get("hits", 0))
+    misses = int(counters.get("misses", 0))
+    sets = int(counters.get("sets", 0))
+    stored_bytes = int(counters.get("bytes", 0))
+    raw_bytes = int(counters.get("raw_bytes", 0))
+    fetches = hits + misses
+    fetch_ms = float(counters.get("fetch_ms", 0))
+
+    return {
+        "prefix": prefix,
+        "hits": hits,
+        "misses": misses,
+        "sets": sets,
+        "bytes": stored_bytes,
+        "hit_rate": round((hits / fetches) * 100, 2) if fetches else 0.0,
+        "avg_fetch_ms": round(fetch_ms / fetches, 3) if fetches else 0.0,
+        "avg_value_bytes": round(stored_bytes / sets) if sets else 0,
+        "compression_ratio": (
+            round(raw_bytes / stored_bytes, 2) if stored_bytes else 1.0
+        ),
+    }
+
+
+class CacheStatsRecorder:
+    """Thread-safe, in-process aggregator for per-prefix cache counters."""
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, float]] = defaultdict(_empty_counters)
+        self._flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, "CACHE_STATS_ENABLED", True)
+
+    @property
+    def flush_interval(self) -> float:
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, "CACHE_STATS_FLUSH_INTERVAL", 10)
+
+    def record_fetch(self, prefix: str, hit: bool, elapsed_ms: float) -> None:
+        """Record a cache read for ``prefix``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            counters = self._pending[prefix]
+            counters["hits" if hit else "misses"] += 1
+            counters["fetch_ms"] += elapsed_ms
+        self._maybe_flush()
+
+    def record_set(
+        self, prefix: str, size: int, raw_size: Optional[int] = None
+    ) -> None:
+        """
+        Record a cache write for ``prefix``.
+
+        Args:
+            prefix: Stats label
+            size: Bytes stored in the cache
+            raw_size: Serialized size before compression (defaults to ``size``)
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            counters = self._pending[prefix]
+            counters["sets"] += 1
+            counters["bytes"] += size
+            counters["raw_bytes"] += size if raw_size is None else raw_size
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _drain(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            pending = self._pending
+            self._pending = defaultdict(_empty_counters)
+            self._last_flush = time.monotonic()
+        return pending
+
+    def _restore(self, pending: Dict[str, Dict[str, float]]) -> None:
+        with self._lock:
+            for prefix, counters in pending.items():
+                target = self._pending[prefix]
+                for field, value in counters.items():
+                    target[field] += value
+
+    def flush(self) -> bool:
+        """
+        Push pending deltas to Redis with HINCRBY/HINCRBYFLOAT.
+
+        Returns:
+            True if the deltas were written, False if they were kept locally.
+        """
+        pending = self._drain()
+        if not pending:
+            return True
+
+        conn = get_redis_client()
+        if conn is None:
+            # No shared store (e.g. LocMemCache); keep counting in-process.
+            self._restore(pending)
+            return False
+
+        try:
+            pipe = conn.pipeline(transaction=False)
+            for prefix, counters in pending.items():
+                for field, value in counters.items():
+                    if not value:
+                        continue
+                    name = f"{prefix}{FIELD_SEPARATOR}{field}"
+                    if field == "fetch_ms":
+                        pipe.hincrbyfloat(STATS_HASH_KEY, name, value)
+                    else:
+                        pipe.hincrby(STATS_HASH_KEY, name, int(value))
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.debug(f"Cache stats flush failed: {e}")
+            self._restore(pending)
+            return False
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Merge flushed counters from Redis with this worker's pending deltas."""
+        merged: Dict[str, Dict[str, float]] = defaultdict(_empty_counters)
+
+        conn = get_redis_client()
+        if conn is not None:
+            try:
+                for raw_name, raw_value in conn.hgetall(STATS_HASH_KEY).items():
+                    name = (
+                        raw_name.decode() if isinstance(raw_name, bytes) else raw_name
+                    )
+                    prefix, _, field = name.rpartition(FIELD_SEPARATOR)
+                    if field in COUNTER_FIELDS:
+                        merged[prefix][field] += float(raw_value)
+            except Exception as e:
+                logger.debug(f"Cache stats read failed: {e}")
+
+        with self._lock:
+            for prefix, counters in self._pending.items():
+                for field, value in counters.items():
+                    merged[prefix][field] += value
+
+        return merged
+
+    def top(self, limit: int = 10, order_by: str = "fetches") -> List[Dict[str, Any]]:
+        """
+        Return the busiest prefixes.
+
+        Args:
+            limit: Maximum number of rows
+            order_by: One of 'fetches', 'misses', 'bytes' or 'fetch_ms'
+        """
+        rows = []
+        for prefix, counters in self.snapshot().items():
+            row = summarize(prefix, counters)
+            row["fetch_ms"] = round(counters.get("fetch_ms", 0), 3)
+            row["fetches"] = row["hits"] + row["misses"]
+            rows.append(row)
+
+        rows.sort(key=lambda row: row.get(order_by, 0), reverse=True)
+        return rows[:limit]
+
+    def reset(self) -> None:
+        """Drop all pending and flushed counters."""
+        self._drain()
+        conn = get_redis_client()
+        if conn is not None:
+            try:
+                conn.delete(STATS_HASH_KEY)
+            except Exception as e:
+                logger.debug(f"Cache stats reset failed: {e}")
+
+
+cache_stats = CacheStatsRecorder()
+
+
+def instrumented_get(prefix: str, key: str, default: Any = None) -> Any:
+    """``cache.get`` that records a hit/miss and fetch latency for ``prefix``."""
+    start = time.perf_counter()
+    value = cache.get(key, default)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    cache_stats.record_fetch(prefix, value is not default, elapsed_ms)
+    return value
+
+
+def instrumented_set(
+    prefix: str, key: str, value: Any, timeout: Any = DEFAULT_TIMEOUT
+) -> None:
+    """``cache.set`` that records the write and its approximate size."""
+    pop_last_encoded_size()
+    cache.set(key, value, timeout)
+    if cache_stats.enabled:
+        encoded = pop_last_encoded_size()
+        if encoded is not None:
+            raw_size, size = encoded
+        else:
+            raw_size = size = estimate_size(value)
+        cache_stats.record_set(prefix, size, raw_size)
@@ -0,0 +1,174 @@
+"""
+Compact serialization and compression for Redis cache values.
+
+Plugged into django-redis through the ``SERIALIZER`` and ``COMPRESSOR`` cache
+options. Plain data (dicts with string keys, lists, strings, numbers, bools,
+None) is stored as orjson; every other value falls back to pickle, so reads
+return exactly what was written. That includes datetimes, Decimals, model
+instances and responses, but also tuples, enums, UUIDs and subclasses of
+str/int/dict/list, which orjson would silently turn into their plain JSON
+counterparts. Values above a size threshold are compressed with zstd, lz4 or
+zlib, whichever is available.
+
+Entries written before this serializer was enabled are plain pickles and are
+still readable.
+"""
+
+import json
+import math
+import pickle
+import threading
+import zlib
+from typing import Any, Optional, Tuple
+
+from django_redis.compressors.base import BaseCompressor
+from django_redis.exceptions import CompressorError
+from django_redis.serializers.base import BaseSerializer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import pyzstd
+except ImportError:  # pragma: no cover - optional dependency
+    pyzstd = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - optional dependency
+    lz4_frame = None
+
+# Serializer tags (first byte of an uncompressed value)
+TAG_JSON = b"J"
+TAG_PICKLE = b"P"
+
+# Compression markers (first byte of a compressed value)
+MARKER_ZLIB = b"\x01"
+MARKER_ZSTD = b"\x02"
+MARKER_LZ4 = b"\x03"
+
+DEFAULT_COMPRESS_MIN_LENGTH = 1024
+
+_local = threading.local()
+
+
+def pop_last_encoded_size() -> Optional[Tuple[int, int]]:
+    """
+    Return ``(raw_bytes, stored_bytes)`` for the last value encoded on this
+    thread, and clear it. Used by utils.cache_metrics for size accounting.
+    """
+    sizes = getattr(_local, "last_encoded", None)
+    _local.last_encoded = None
+    return sizes
+
+
+_SCALAR_TYPES = frozenset((str, int, bool, type(None)))
+
+
+def is_plain_data(value: Any) -> bool:
+    """
+    Whether ``value`` survives a JSON round trip unchanged.
+
+    Only exact dicts with string keys, lists, strings, ints, finite floats,
+    bools and None qualify; tuples, subclasses, enums and every other type
+    would come back as something else.
+    """
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        kind = type(item)
+        if kind is dict:
+            for key in item:
+                if type(key) is not str:
+                    return False
+            stack.extend(item.values())
+        elif kind is list:
+            stack.extend(item)
+        elif kind is float:
+            if not math.isfinite(item):
+                return False
+        elif kind not in _SCALAR_TYPES:
+            return False
+    return True
+
+
+class CompactSerializer(BaseSerializer):
+    """orjson for plain data, pickle for everything else."""
+
+    def dumps(self, value: Any) -> bytes:
+        if orjson is not None and is_plain_data(value):
+            try:
+                return TAG_JSON + orjson.dumps(value)
+            except TypeError:
+                # Integers beyond 64 bits
+                pass
+        return TAG_PICKLE + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, value: bytes) -> Any:
+        tag, payload = value[:1], value[1:]
+        if tag == TAG_JSON:
+            if orjson is not None:
+                return orjson.loads(payload)
+            return json.loads(payload)
+        if tag == TAG_PICKLE:
+            return pickle.loads(payload)
+        # Legacy entry written by django-redis' PickleSerializer
+        return pickle.loads(value)
+
+
+def _codecs():
+    codecs = {}
+    if pyzstd is not None:
+        codecs["zstd"] = (MARKER_ZSTD, pyzstd.compress, pyzstd.decompress)
+    if lz4_frame is not None:
+        codecs["lz4"] = (MARKER_LZ4, lz4_frame.compress, lz4_frame.decompress)
+    codecs["zlib"] = (MARKER_ZLIB, zlib.compress, zlib.decompress)
+    return codecs
+
+
+class ThresholdCompressor(BaseCompressor):
+    """
+    Compress values of at least ``COMPRESS_MIN_LENGTH`` bytes.
+
+    ``COMPRESS_ALGORITHM`` selects 'zstd', 'lz4', 'zlib' or 'auto' (the first
+    one installed, in that order). Small values are stored as-is; compressed
+    values carry a one-byte marker so either kind can be read back.
+    """
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.min_length = int(
+            options.get("COMPRESS_MIN_LENGTH", DEFAULT_COMPRESS_MIN_LENGTH)
+        )
+
+        available = _codecs()
+        algorithm = options.get("COMPRESS_ALGORITHM", "auto")
+        if algorithm == "auto":
+            algorithm = next(iter(available))
+        if algorithm not in available:
+            raise ImportError(f"Cache compression codec '{algorithm}' is unavailable")
+
+        self.algorithm = algorithm
+        self._marker, self._compress, _ = available[algorithm]
+        self._decoders = {marker: decode for marker, _, decode in available.values()}
+
+    def compress(self, value: bytes) -> bytes:
+        raw_length = len(value)
+        if raw_length >= self.min_length:
+            compressed = self._marker + self._compress(value)
+            if len(compressed) < raw_length:
+                value = compressed
+        _local.last_encoded = (raw_length, len(value))
+        return value
+
+    def decompress(self, value: bytes) -> bytes:
+        decode = self._decoders.get(value[:1])
+        if decode is None:
+            # Stored uncompressed (below threshold or legacy pickle)
+            return value
+        try:
+            return decode(value[1:])
+        except Exception as e:
+            raise CompressorError(e)
@@ -7,6 +7,8 @@ from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
+from utils.smtp_pool import PooledEmailBackend
+
 
 class EmailService:
     """Utility wrapper around Django's email utilities for common project messages."""
@@ -33,6 +35,8 @@ class EmailService:
             to=list(recipients),
         )
         message.attach_alternative(html_body, "text/html")
+        # Reuse a persistent connection instead of a TLS handshake per email
+        message.connection = PooledEmailBackend(fail_silently=fail_silently)
         message.send(fail_silently=fail_silently)
 
     def send_otp_email(
@@ -1,13 +1,33 @@
 """
 Health check utilities for monitoring system status.
+
+Probe endpoints never run checks themselves. A background refresher thread
+in each worker (HealthMonitor) runs every check on its own interval with its
+own timeout and keeps the latest result in memory. get_health_status() and
+get_readiness_status() only read that state, so an orchestrator probing every
+few seconds costs a dictionary copy, whatever the database, cache or Celery
+broker are doing.
+
+The refresher starts with the first probe a worker receives. That probe waits,
+at most for each check's timeout, until the checks it reads have a first
+result, so a freshly (re)started worker does not answer "unknown". A check
+that overruns its timeout is reported unhealthy until a later run
+completes in time. Results older than HEALTH_CHECK_STALE_AFTER intervals are
+flagged stale, which also covers a refresher that has stopped running.
 """
 
+import logging
+import threading
 import time
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
 
 from django.conf import settings
 from django.core.cache import cache
-from django.db import connection
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
 
 
 def check_database() -> Dict[str, Any]:
@@ -81,13 +101,16 @@ def check_celery() -> Dict[str, Any]:
     try:
         from celery import current_app
 
-        inspect = current_app.control.inspect()
-        active_workers = inspect.active()
+        # ping() is the cheapest broadcast; bound how long replies are awaited
+        inspect = current_app.control.inspect(
+            timeout=getattr(settings, "HEALTH_CHECK_CELERY_REPLY_TIMEOUT", 1.0)
+        )
+        replies = inspect.ping()
 
-        if active_workers:
+        if replies:
             return {
                 "status": "healthy",
-                "workers": len(active_workers),
+                "workers": len(replies),
             }
         else:
             return {
@@ -136,29 +159,250 @@ def check_disk_space() -> Dict[str, Any]:
         }
 
 
+@dataclass
+class HealthCheck:
+    """A registered check and how often and how long it may run."""
+
+    name: str
+    func: Callable[[], Dict[str, Any]]
+    interval: float
+    timeout: float
+    critical: bool = False
+
+
+class HealthMonitor:
+    """Runs health checks in the background and caches their latest results."""
+
+    def __init__(self):
+        self._checks: Dict[str, HealthCheck] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._running: Dict[str, tuple] = {}
+        self._next_run: Dict[str, float] = {}
+        self._timed_out: set = set()
+        self._lock = threading.Lock()
+        # Notified whenever a result is stored
+        self._updated = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def register(self, check: HealthCheck) -> None:
+        with self._lock:
+            self._checks[check.name] = check
+            self._next_run[check.name] = 0.0
+        self._wake.set()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            # Threads do not survive a fork; (re)start lazily in each worker
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(len(self._checks), 1),
+                thread_name_prefix="health-check",
+            )
+            self._running.clear()
+            self._timed_out.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="health-monitor", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                delay = self._tick()
+            except Exception:
+                logger.exception("Health monitor tick failed")
+                delay = 1.0
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _tick(self) -> float:
+        """Start due checks, time out overrunning ones; return seconds to sleep."""
+        now = time.monotonic()
+        with self._lock:
+            checks = list(self._checks.values())
+        for check in checks:
+            running = self._running.get(check.name)
+            if running is not None:
+                future, started = running
+                if (
+                    not future.done()
+                    and now - started > check.timeout
+                    and check.name not in self._timed_out
+                ):
+                    self._timed_out.add(check.name)
+                    # The thread cannot be interrupted; report and let it finish
+                    self._store(
+                        check,
+                        {
+                            "status": "unhealthy",
+                            "error": f"Timed out after {check.timeout:g}s",
+                        },
+                        (now - started) * 1000,
+                    )
+                continue
+            if now >= self._next_run[check.name]:
+                self._next_run[check.name] = now + check.interval
+                future = self._executor.submit(self._execute, check)
+                self._running[check.name] = (future, now)
+                future.add_done_callback(
+                    lambda _future, name=check.name: self._finished(name)
+                )
+
+        # Wake up for the next due check or the nearest running deadline
+        deadlines = [self._next_run[check.name] for check in checks]
+        deadlines += [
+            started + self._checks[name].timeout
+            for name, (_, started) in list(self._running.items())
+            if name not in self._timed_out
+        ]
+        return max(min(deadlines, default=now + 1.0) - time.monotonic(), 0.05)
+
+    def _finished(self, name: str) -> None:
+        self._running.pop(name, None)
+        self._timed_out.discard(name)
+        self._wake.set()
+
+    def _execute(self, check: HealthCheck) -> None:
+        # Drop a connection the database closed since this thread's last run
+        close_old_connections()
+        start = time.perf_counter()
+        try:
+            result = check.func()
+        except Exception as e:
+            result = {"status": "unhealthy", "error": str(e)}
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms > check.timeout * 1000:
+            result = {
+                "status": "unhealthy",
+                "error": f"Timed out after {check.timeout:g}s",
+            }
+        self._store(check, result, duration_ms)
+
+    def _store(
+        self, check: HealthCheck, result: Dict[str, Any], duration_ms: float
+    ) -> None:
+        if result.get("status") != "healthy":
+            previous = self._results.get(check.name, {}).get("status")
+            if previous != result.get("status"):
+                logger.warning(f"Health check {check.name}: {result}")
+        with self._updated:
+            self._results[check.name] = {
+                **result,
+                "checked_at": time.time(),
+                "check_duration_ms": round(duration_ms, 2),
+            }
+            self._updated.notify_all()
+
+    def _wait_for_first_results(self, checks: List[HealthCheck]) -> None:
+        """Block until every check in ``checks`` has a result or has timed out."""
+        # A timed-out run is stored as unhealthy by the next tick after its
+        # deadline; allow a little slack for that tick
+        deadline = time.monotonic() + max(check.timeout for check in checks) + 0.5
+        with self._updated:
+            while any(check.name not in self._results for check in checks):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._updated.wait(remaining)
+
+    def results(self, names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest cached result of each check, with its age.
+
+        Checks that have never run are waited for, up to their timeout; any
+        still without a result report "unknown". Results older than
+        HEALTH_CHECK_STALE_AFTER intervals report "stale".
+        """
+        self._ensure_thread()
+        stale_after = getattr(settings, "HEALTH_CHECK_STALE_AFTER", 3)
+        with self._lock:
+            checks = [
+                check
+                for name, check in self._checks.items()
+                if names is None or name in names
+            ]
+            missing = [check for check in checks if check.name not in self._results]
+        if missing:
+            self._wait_for_first_results(missing)
+        now = time.time()
+        with self._lock:
+            results = {check.name: self._results.get(check.name) for check in checks}
+
+        output = {}
+        for check in checks:
+            result = results[check.name]
+            if result is None:
+                output[check.name] = {
+                    "status": "unknown",
+                    "message": "Check has not completed yet",
+                }
+                continue
+            result = dict(result)
+            result["age_seconds"] = round(now - result["checked_at"], 2)
+            if result["age_seconds"] > check.interval * stale_after + check.timeout:
+                result["stale"] = True
+                if result["status"] not in ("unhealthy", "critical"):
+                    result["status"] = "stale"
+            output[check.name] = result
+        return output
+
+    def critical_checks(self) -> List[str]:
+        return [name for name, check in self._checks.items() if check.critical]
+
+
+health_monitor = HealthMonitor()
+
+
+def register_default_checks(monitor: HealthMonitor) -> None:
+    """Register the built-in checks with intervals and timeouts from settings."""
+    interval = getattr(settings, "HEALTH_CHECK_INTERVAL", 10)
+    timeout = getattr(settings, "HEALTH_CHECK_TIMEOUT", 2)
+    monitor.register(
+        HealthCheck("database", check_database, interval, timeout, critical=True)
+    )
+    monitor.register(HealthCheck("cache", check_cache, interval, timeout))
+    monitor.register(
+        HealthCheck(
+            "disk_space",
+            check_disk_space,
+            getattr(settings, "HEALTH_CHECK_DISK_INTERVAL", 60),
+            timeout,
+        )
+    )
+    if getattr(settings, "CELERY_BROKER_URL", None):
+        monitor.register(
+            HealthCheck(
+                "celery",
+                check_celery,
+                getattr(settings, "HEALTH_CHECK_CELERY_INTERVAL", 30),
+                getattr(settings, "HEALTH_CHECK_CELERY_REPLY_TIMEOUT", 1.0) + timeout,
+            )
+        )
+
+
+register_default_checks(health_monitor)
+
+
 def get_health_status() -> Dict[str, Any]:
     """
-    Get overall health status of the system.
+    Get overall health status of the system from the cached check results.
 
     Returns:
         Dictionary with health status of all components
     """
-    checks = {
-        "database": check_database(),
-        "cache": check_cache(),
-        "disk_space": check_disk_space(),
-    }
-
-    # Optional: Check Celery if configured
-    if hasattr(settings, "CELERY_BROKER_URL") and settings.CELERY_BROKER_URL:
-        checks["celery"] = check_celery()
+    checks = health_monitor.results()
 
     # Determine overall status
     statuses = [check.get("status") for check in checks.values()]
 
     if "unhealthy" in statuses or "critical" in statuses:
         overall_status = "unhealthy"
-    elif "degraded" in statuses or "warning" in statuses:
+    elif any(s in ("degraded", "warning", "stale", "unknown") for s in statuses):
         overall_status = "degraded"
     else:
         overall_status = "healthy"
@@ -177,16 +421,17 @@ def get_readiness_status() -> Dict[str, Any]:
     Returns:
         Dictionary with readiness status
     """
-    checks = {
-        "database": check_database(),
-        "cache": check_cache(),
-    }
+    checks = health_monitor.results(["database", "cache"])
 
-    # Service is ready if critical components are healthy
-    critical_checks = ["database"]
-    critical_statuses = [checks[check].get("status") for check in critical_checks]
+    # Service is ready unless a critical component is known to be failing; a
+    # check with no result yet ("unknown") does not hold a worker back
+    critical_statuses = [
+        checks[name].get("status")
+        for name in health_monitor.critical_checks()
+        if name in checks
+    ]
 
-    if all(status == "healthy" for status in critical_statuses):
+    if all(status in ("healthy", "unknown") for status in critical_statuses):
         return {
             "status": "ready",
             "checks": checks,
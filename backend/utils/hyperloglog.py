@@ -0,0 +1,105 @@
+"""
+HyperLogLog cardinality sketches.
+
+A sketch estimates the number of distinct values added to it in a fixed
+amount of memory (one byte per register), and sketches of the same precision
+merge losslessly: the union of two sketches is the register-wise maximum. This
+lets per-day sketches be combined into a distinct count for any range.
+
+Accuracy: the standard error is 1.04 / sqrt(2 ** precision). The default
+precision of 12 (4096 registers, 4 KB serialized) gives about 1.6%, so ~95%
+of estimates fall within 3.3% of the true count. Small cardinalities use
+linear counting and are close to exact.
+
+Usage:
+    sketch = HyperLogLog()
+    sketch.update(visitor_ids)
+    merged = HyperLogLog.merge_all([sketch, other])
+    merged.count()
+"""
+
+import hashlib
+import math
+from typing import Iterable, Optional
+
+DEFAULT_PRECISION = 12
+
+
+def _hash64(value) -> int:
+    data = value if isinstance(value, bytes) else str(value).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Mergeable distinct-count estimator."""
+
+    def __init__(
+        self, precision: int = DEFAULT_PRECISION, registers: Optional[bytes] = None
+    ):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is not None and len(registers) != self.size:
+            raise ValueError(
+                f"Expected {self.size} registers for precision {precision}, "
+                f"got {len(registers)}"
+            )
+        self.registers = bytearray(registers or self.size)
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of count() as a fraction of the true cardinality."""
+        return 1.04 / math.sqrt(self.size)
+
+    def add(self, value) -> None:
+        hashed = _hash64(value)
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Fold ``other`` into this sketch (set union)."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    @classmethod
+    def merge_all(
+        cls, sketches: Iterable["HyperLogLog"], precision: int = DEFAULT_PRECISION
+    ) -> "HyperLogLog":
+        registers = [sketch.registers for sketch in sketches]
+        if any(len(r) != 1 << precision for r in registers):
+            raise ValueError("Cannot merge sketches of different precision")
+        merged = cls(precision)
+        if registers:
+            # One register-wise max across all sketches at once
+            merged.registers = bytearray(map(max, *registers, merged.registers))
+        return merged
+
+    def count(self) -> int:
+        """Estimate the number of distinct values added."""
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-register for register in self.registers)
+
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        precision = len(data).bit_length() - 1
+        return cls(precision, bytes(data))
@@ -2,11 +2,31 @@ from django.core.cache import cache
 from django.core.management.base import BaseCommand
 
 from utils.cache_decorators import get_cache_stats
+from utils.cache_metrics import cache_stats
 
 
 class Command(BaseCommand):
     help = "Show cache statistics and health"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Number of cache prefixes to show in the breakdown (default: 10)",
+        )
+        parser.add_argument(
+            "--order-by",
+            choices=["fetches", "misses", "bytes", "fetch_ms"],
+            default="fetches",
+            help="Sort the prefix breakdown by this column (default: fetches)",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the per-prefix counters after displaying them",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS("\n📊 Redis Cache Statistics\n"))
         self.stdout.write("=" * 60)
@@ -44,6 +64,12 @@ class Command(BaseCommand):
 
         self.stdout.write(f"\n🎯 Cache Efficiency:      {status}")
 
+        self._write_prefix_breakdown(options["top"], options["order_by"])
+
+        if options["reset"]:
+            cache_stats.reset()
+            self.stdout.write(self.style.WARNING("\n🧹 Per-prefix counters reset"))
+
         # Test cache operations
         self.stdout.write(f"\n🧪 Testing cache operations...")
         try:
@@ -61,3 +87,27 @@ class Command(BaseCommand):
 
         self.stdout.write("\n" + "=" * 60)
         self.stdout.write(self.style.SUCCESS("\n✅ Cache health check complete\n"))
+
+    def _write_prefix_breakdown(self, top, order_by):
+        """Print the top-N per-prefix counters collected by utils.cache_metrics."""
+        rows = cache_stats.top(top, order_by=order_by)
+
+        self.stdout.write(f"\n🔎 Top {top} prefixes by {order_by}:")
+        if not rows:
+            self.stdout.write("   (no per-prefix data recorded yet)")
+            return
+
+        self.stdout.write(
+            f"   {'prefix':<40} {'hits':>8} {'misses':>8} {'hit%':>7} "
+            f"{'sets':>6} {'avg KB':>8} {'ratio':>6} {'avg ms':>8}"
+        )
+        for row in rows:
+            prefix = row["prefix"]
+            if len(prefix) > 40:
+                prefix = prefix[:37] + "..."
+            self.stdout.write(
+                f"   {prefix:<40} {row['hits']:>8,} {row['misses']:>8,} "
+                f"{row['hit_rate']:>6.1f}% {row['sets']:>6,} "
+                f"{row['avg_value_bytes'] / 1024:>8.1f} "
+                f"{row['compression_ratio']:>5.1f}x {row['avg_fetch_ms']:>8.3f}"
+            )
@@ -0,0 +1,120 @@
+import threading
+import time
+
+from django.core.mail import EmailMessage
+from django.core.management.base import BaseCommand
+
+from utils.smtp_debug import DebugSMTPServer
+from utils.smtp_pool import SMTPConnectionPool
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local SMTP stand-in that accepts and discards mail, or benchmark "
+        "the SMTP connection pool against it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=1025)
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=0,
+            help="Delay before accepting each message, imitating a remote provider",
+        )
+        parser.add_argument(
+            "--drop-after",
+            type=int,
+            default=0,
+            help="Close each connection after this many messages (0: never)",
+        )
+        parser.add_argument(
+            "--echo",
+            action="store_true",
+            help="Print the headers of every message received",
+        )
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            metavar="MESSAGES",
+            help="Send this many messages through the pool at each size and exit",
+        )
+        parser.add_argument(
+            "--pool-sizes",
+            default="1,2,4,8",
+            help="Comma-separated pool sizes to benchmark (default: 1,2,4,8)",
+        )
+
+    def handle(self, *args, **options):
+        server = DebugSMTPServer(
+            (options["host"], options["port"]),
+            latency_ms=options["latency_ms"],
+            drop_after=options["drop_after"],
+            echo=options["echo"],
+        )
+        host, port = server.server_address[:2]
+
+        if options["benchmark"]:
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                self._benchmark(server, host, port, options)
+            finally:
+                server.shutdown()
+                server.server_close()
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Debug SMTP server listening on {host}:{port}")
+        )
+        self.stdout.write(
+            f"Point the app at it with EMAIL_HOST={host} EMAIL_PORT={port} "
+            "EMAIL_USE_TLS=False EMAIL_USE_SSL=False"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(
+                f"\n{server.messages} message(s) over {server.connections} connection(s)"
+            )
+
+    def _benchmark(self, server, host, port, options):
+        count = options["benchmark"]
+        self.stdout.write(
+            f"Sending {count} messages per run to {host}:{port} "
+            f"({options['latency_ms']:g}ms latency per message)\n"
+        )
+        for size in [int(s) for s in options["pool_sizes"].split(",") if s.strip()]:
+            pool = SMTPConnectionPool(
+                size=size,
+                backend="django.core.mail.backends.smtp.EmailBackend",
+                host=host,
+                port=port,
+                username="",
+                password="",
+                use_tls=False,
+                use_ssl=False,
+            )
+            messages = [
+                EmailMessage(
+                    subject=f"Benchmark {i}",
+                    body="Benchmark message body\n" * 20,
+                    from_email="bench@localhost",
+                    to=[f"user{i}@example.com"],
+                )
+                for i in range(count)
+            ]
+            server.reset_stats()
+            start = time.perf_counter()
+            failed = sum(1 for _, error in pool.send_iter(messages) if error)
+            elapsed = time.perf_counter() - start
+            pool.close()
+            self.stdout.write(
+                f"pool size {size:>3}: {count / elapsed:8.1f} msg/s  "
+                f"({elapsed:.2f}s, {server.connections} connection(s), "
+                f"{failed} failed)"
+            )
@@ -2,14 +2,30 @@
 Metrics collection utilities for monitoring.
 """
 
+import os
 import time
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict
 
-from django.conf import settings
-from django.core.cache import cache
 from django.db import connection
 
+from utils.cache_metrics import COUNTER_FIELDS, cache_stats, summarize
+from utils.query_logging import profile_queries
+from utils.request_metrics import request_metrics, route_name
+
+
+@lru_cache(maxsize=None)
+def _process(pid: int):
+    import psutil
+
+    return psutil.Process(pid)
+
+
+def current_process():
+    """psutil handle for this process, reused so cpu_percent() has a baseline."""
+    return _process(os.getpid())
+
 
 class MetricsCollector:
     """Collector for application metrics."""
@@ -20,15 +36,9 @@ class MetricsCollector:
         Get request-related metrics.
 
         Returns:
-            Dictionary with request metrics
+            Dictionary with request metrics, merged across all workers
         """
-        # This would typically be populated by middleware
-        # For now, return basic structure
-        return {
-            "total_requests": cache.get("metrics:total_requests", 0),
-            "requests_per_minute": cache.get("metrics:requests_per_minute", 0),
-            "average_response_time_ms": cache.get("metrics:avg_response_time", 0),
-        }
+        return request_metrics.summary()
 
     @staticmethod
     def get_database_metrics() -> Dict[str, Any]:
@@ -78,17 +88,19 @@ class MetricsCollector:
             Dictionary with cache metrics
         """
         try:
-            # Test cache performance
-            start_time = time.time()
-            test_key = "metrics_test"
-            cache.set(test_key, "test", 10)
-            cache.get(test_key)
-            cache.delete(test_key)
-            response_time = (time.time() - start_time) * 1000
+            # Derived from the recorded traffic; reading metrics never
+            # writes to the cache
+            totals = {field: 0.0 for field in COUNTER_FIELDS}
+            for counters in cache_stats.snapshot().values():
+                for field in COUNTER_FIELDS:
+                    totals[field] += counters.get(field, 0)
+            overall = summarize("*", totals)
 
             return {
                 "status": "healthy",
-                "response_time_ms": round(response_time, 2),
+                "hit_rate": overall["hit_rate"],
+                "avg_fetch_ms": overall["avg_fetch_ms"],
+                "prefixes": cache_stats.top(10),
             }
         except Exception as e:
             return {
@@ -105,14 +117,11 @@ class MetricsCollector:
             Dictionary with system metrics
         """
         try:
-            import os
-
-            import psutil
-
-            process = psutil.Process(os.getpid())
+            process = current_process()
 
             return {
-                "cpu_percent": process.cpu_percent(interval=0.1),
+                # Non-blocking: CPU use since the previous call
+                "cpu_percent": process.cpu_percent(interval=None),
                 "memory_mb": round(process.memory_info().rss / 1024 / 1024, 2),
                 "threads": process.num_threads(),
             }
@@ -144,33 +153,6 @@ class MetricsCollector:
             "system": MetricsCollector.get_system_metrics(),
         }
 
-    @staticmethod
-    def increment_request_count():
-        """Increment request counter."""
-        try:
-            cache.incr("metrics:total_requests", 1)
-        except (ValueError, AttributeError, Exception) as e:
-            # Key doesn't exist yet, initialize it
-            # Also handle any other cache-related errors silently
-            try:
-                cache.set("metrics:total_requests", 1, timeout=None)
-            except Exception:
-                # If cache is completely unavailable, just skip metrics
-                pass
-
-    @staticmethod
-    def record_response_time(response_time_ms: float):
-        """Record response time."""
-        # Update average response time
-        current_avg = cache.get("metrics:avg_response_time", 0)
-        total_requests = cache.get("metrics:total_requests", 1)
-
-        # Simple moving average
-        new_avg = (
-            (current_avg * (total_requests - 1)) + response_time_ms
-        ) / total_requests
-        cache.set("metrics:avg_response_time", new_avg, timeout=3600)
-
 
 class PerformanceMiddleware:
     """Middleware to track request performance metrics."""
@@ -179,24 +161,32 @@ class PerformanceMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        start_time = time.time()
+        if not request.path.startswith("/api/"):
+            return self.get_response(request)
+
+        start_time = time.perf_counter()
 
-        response = self.get_response(request)
+        with profile_queries() as query_timer:
+            response = self.get_response(request)
 
         # Calculate response time
-        response_time_ms = (time.time() - start_time) * 1000
-
-        # Record metrics (only for API requests)
-        # Wrap in try-except to prevent any metrics errors from affecting the request
-        if request.path.startswith("/api/"):
-            try:
-                MetricsCollector.increment_request_count()
-                MetricsCollector.record_response_time(response_time_ms)
-            except Exception:
-                # Silently ignore metrics errors - don't let them affect the request
-                pass
-
-            # Add response time header
-            response["X-Response-Time"] = f"{response_time_ms:.2f}ms"
+        response_time_ms = (time.perf_counter() - start_time) * 1000
+
+        # Record metrics (only for API requests). Counters are aggregated
+        # in-process and flushed to Redis by a background thread.
+        try:
+            request_metrics.record(
+                route_name(request),
+                response.status_code,
+                response_time_ms,
+                db_queries=query_timer.count,
+                db_ms=query_timer.elapsed_ms,
+            )
+        except Exception:
+            # Silently ignore metrics errors - don't let them affect the request
+            pass
+
+        # Add response time header
+        response["X-Response-Time"] = f"{response_time_ms:.2f}ms"
 
         return response
@@ -0,0 +1,230 @@
+"""
+OpenMetrics (Prometheus) text exposition.
+
+Every series is read from collectors that already aggregate in-process and
+merge across gunicorn workers through Redis hashes (utils.request_metrics,
+utils.cache_metrics), so a scrape only reads: it never writes to the cache and
+never waits on a sampling interval. Counters from other workers lag by at most
+their flush interval.
+
+Series:
+    http_request_duration_seconds       histogram by view and status
+    http_request_db_queries             queries issued, by view
+    http_request_db_duration_seconds    time spent in queries, by view
+    cache_requests                      hits and misses by cache prefix
+    cache_hit_ratio                     hits / (hits + misses) by prefix
+    celery_queue_length                 messages waiting per broker queue
+    provider_request_duration_seconds   external provider calls (chatbot LLMs)
+    process_*                           this worker's CPU, memory and threads
+"""
+
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+from utils.cache_metrics import cache_stats
+from utils.metrics import current_process
+from utils.request_metrics import (
+    BUCKET_FIELDS,
+    LATENCY_BUCKETS_MS,
+    provider_metrics,
+    request_metrics,
+)
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Bound how long a scrape can wait on the broker
+BROKER_TIMEOUT_SECONDS = 0.5
+
+_broker_client = None
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return f"{{{pairs}}}"
+
+
+def _number(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Family:
+    """One metric family: its metadata lines followed by its samples."""
+
+    def __init__(self, name: str, metric_type: str, help_text: str, unit: str = ""):
+        self.name = name
+        self.lines = [f"# TYPE {name} {metric_type}"]
+        if unit:
+            self.lines.append(f"# UNIT {name} {unit}")
+        self.lines.append(f"# HELP {name} {help_text}")
+
+    def sample(self, suffix: str, labels: Dict[str, str], value: float) -> None:
+        self.lines.append(f"{self.name}{suffix}{_labels(labels)} {_number(value)}")
+
+
+def _histogram(
+    name: str,
+    help_text: str,
+    label_names: tuple,
+    snapshot: Dict[tuple, Dict[str, float]],
+) -> _Family:
+    family = _Family(name, "histogram", help_text, unit="seconds")
+    for series in sorted(snapshot):
+        counters = snapshot[series]
+        if not counters.get("count"):
+            continue
+        labels = dict(zip(label_names, series))
+        cumulative = 0.0
+        for bound, field in zip(LATENCY_BUCKETS_MS, BUCKET_FIELDS):
+            cumulative += counters.get(field, 0)
+            family.sample("_bucket", {**labels, "le": repr(bound / 1000)}, cumulative)
+        family.sample("_bucket", {**labels, "le": "+Inf"}, counters["count"])
+        family.sample("_count", labels, counters["count"])
+        family.sample("_sum", labels, counters.get("sum_ms", 0) / 1000)
+    return family
+
+
+def _request_families() -> List[_Family]:
+    snapshot = request_metrics.snapshot()
+    families = [
+        _histogram(
+            "http_request_duration_seconds",
+            "API request latency by resolved view name and status.",
+            ("view", "status"),
+            snapshot,
+        )
+    ]
+
+    per_view: Dict[str, Dict[str, float]] = {}
+    for (view, _), counters in snapshot.items():
+        totals = per_view.setdefault(view, {"db_queries": 0, "db_ms": 0})
+        totals["db_queries"] += counters.get("db_queries", 0)
+        totals["db_ms"] += counters.get("db_ms", 0)
+
+    queries = _Family(
+        "http_request_db_queries", "counter", "Database queries issued by API views."
+    )
+    query_time = _Family(
+        "http_request_db_duration_seconds",
+        "counter",
+        "Time API views spent in database queries.",
+        unit="seconds",
+    )
+    for view in sorted(per_view):
+        queries.sample("_total", {"view": view}, per_view[view]["db_queries"])
+        query_time.sample("_total", {"view": view}, per_view[view]["db_ms"] / 1000)
+    return families + [queries, query_time]
+
+
+def _cache_families() -> List[_Family]:
+    requests = _Family(
+        "cache_requests", "counter", "Cache reads by key prefix and result."
+    )
+    ratio = _Family(
+        "cache_hit_ratio", "gauge", "Share of cache reads that were hits, by prefix."
+    )
+    for prefix, counters in sorted(cache_stats.snapshot().items()):
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        requests.sample("_total", {"prefix": prefix, "result": "hit"}, hits)
+        requests.sample("_total", {"prefix": prefix, "result": "miss"}, misses)
+        if hits + misses:
+            ratio.sample("", {"prefix": prefix}, hits / (hits + misses))
+    return [requests, ratio]
+
+
+def _get_broker_client():
+    global _broker_client
+    broker_url = getattr(settings, "CELERY_BROKER_URL", "")
+    if _broker_client is None and broker_url.startswith(("redis://", "rediss://")):
+        import redis
+
+        _broker_client = redis.Redis.from_url(
+            broker_url,
+            socket_connect_timeout=BROKER_TIMEOUT_SECONDS,
+            socket_timeout=BROKER_TIMEOUT_SECONDS,
+        )
+    return _broker_client
+
+
+def _celery_families() -> List[_Family]:
+    family = _Family(
+        "celery_queue_length", "gauge", "Messages waiting in each Celery queue."
+    )
+    client = _get_broker_client()
+    if client is None:
+        return [family]
+
+    queues = getattr(settings, "METRICS_CELERY_QUEUES", ["celery"])
+    try:
+        pipe = client.pipeline(transaction=False)
+        for queue in queues:
+            pipe.llen(queue)
+        for queue, length in zip(queues, pipe.execute()):
+            family.sample("", {"queue": queue}, length)
+    except Exception as e:
+        logger.debug(f"Celery queue length read failed: {e}")
+    return [family]
+
+
+def _process_families() -> List[_Family]:
+    try:
+        process = current_process()
+        cpu = process.cpu_times()
+        memory = process.memory_info().rss
+        threads = process.num_threads()
+    except Exception as e:
+        logger.debug(f"Process metrics read failed: {e}")
+        return []
+
+    labels = {"pid": str(os.getpid())}
+    cpu_family = _Family(
+        "process_cpu_seconds",
+        "counter",
+        "CPU time used by this worker.",
+        unit="seconds",
+    )
+    cpu_family.sample("_total", labels, cpu.user + cpu.system)
+    memory_family = _Family(
+        "process_resident_memory_bytes",
+        "gauge",
+        "Resident memory of this worker.",
+        unit="bytes",
+    )
+    memory_family.sample("", labels, memory)
+    threads_family = _Family("process_threads", "gauge", "Threads in this worker.")
+    threads_family.sample("", labels, threads)
+    return [cpu_family, memory_family, threads_family]
+
+
+def render(families: Optional[Iterable[_Family]] = None) -> str:
+    """Render every metric family in the OpenMetrics text format."""
+    if families is None:
+        families = [
+            *_request_families(),
+            *_cache_families(),
+            *_celery_families(),
+            _histogram(
+                "provider_request_duration_seconds",
+                "Latency of external provider calls (chatbot LLM APIs).",
+                ("provider", "outcome"),
+                provider_metrics.snapshot(),
+            ),
+            *_process_families(),
+        ]
+    lines = []
+    for family in families:
+        lines.extend(family.lines)
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
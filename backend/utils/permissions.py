@@ -14,6 +14,8 @@ from utils.security_logging import SecurityAuditLogger
 
 logger = logging.getLogger(__name__)
 
+ADMIN_ROLES = (User.ROLE_ADMIN, User.ROLE_SUPER_ADMIN)
+
 
 def get_client_ip(request: Request) -> str:
     """Extract client IP address from request."""
@@ -25,6 +27,21 @@ def get_client_ip(request: Request) -> str:
     return ip
 
 
+def is_active_admin(
+    user: User, roles: tuple = ADMIN_ROLES, require_verified: bool = True
+) -> bool:
+    """
+    Check whether ``user`` is an active admin with one of ``roles``.
+
+    Only reads fields of the already loaded user, so it runs no queries.
+    """
+    return (
+        user.admin_type in roles
+        and user.status == User.STATUS_ACTIVE
+        and (user.is_email_verified or not require_verified)
+    )
+
+
 class IsSuperAdmin(permissions.BasePermission):
     """Only super admins can access."""
 
@@ -35,11 +52,7 @@ class IsSuperAdmin(permissions.BasePermission):
 
         user: User = request.user
 
-        is_super_admin = (
-            user.admin_type == User.ROLE_SUPER_ADMIN
-            and user.status == User.STATUS_ACTIVE
-            and user.is_email_verified
-        )
+        is_super_admin = is_active_admin(user, (User.ROLE_SUPER_ADMIN,))
 
         if not is_super_admin and request.user.is_authenticated:
             # Log permission denied
@@ -63,11 +76,7 @@ class IsAdmin(permissions.BasePermission):
 
         user: User = request.user
 
-        is_admin = (
-            user.admin_type in [User.ROLE_ADMIN, User.ROLE_SUPER_ADMIN]
-            and user.status == User.STATUS_ACTIVE
-            and user.is_email_verified
-        )
+        is_admin = is_active_admin(user)
 
         if not is_admin:
             # Log permission denied
@@ -96,11 +105,7 @@ class IsPublicOrAdmin(permissions.BasePermission):
 
         user: User = request.user
 
-        is_admin = (
-            user.admin_type in [User.ROLE_ADMIN, User.ROLE_SUPER_ADMIN]
-            and user.status == User.STATUS_ACTIVE
-            and user.is_email_verified
-        )
+        is_admin = is_active_admin(user)
 
         if not is_admin:
             # Log permission denied
@@ -122,10 +127,7 @@ class IsOwnerOrAdmin(permissions.BasePermission):
         # Admins can access anything
         if request.user.is_authenticated:
             user: User = request.user
-            if (
-                user.admin_type in [User.ROLE_ADMIN, User.ROLE_SUPER_ADMIN]
-                and user.status == User.STATUS_ACTIVE
-            ):
+            if is_active_admin(user, require_verified=False):
                 return True
 
         # Check if user is owner
@@ -151,8 +153,4 @@ class IsReadOnlyOrAdmin(permissions.BasePermission):
             return False
 
         user: User = request.user
-        return (
-            user.admin_type in [User.ROLE_ADMIN, User.ROLE_SUPER_ADMIN]
-            and user.status == User.STATUS_ACTIVE
-            and user.is_email_verified
-        )
+        return is_active_admin(user)
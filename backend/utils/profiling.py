@@ -0,0 +1,380 @@
+"""
+Opt-in statistical profiling.
+
+Two modes, both built on sampling the stacks of request threads from a
+separate thread (``sys._current_frames()``), so profiled code runs unmodified:
+
+- On-demand capture: a request carrying a signed profiling token (header
+  ``X-Profile-Token`` or query parameter ``__profile``) is sampled every
+  PROFILING_SAMPLE_INTERVAL_MS for its whole duration. The profile is stored
+  in the cache for PROFILE_TTL seconds and its id returned in the
+  ``X-Profile-Id`` response header. Admins obtain tokens from
+  ``POST /api/metrics/profiles/token/``.
+- Background sampling: with PROFILING_BACKGROUND_INTERVAL_MS set, a daemon
+  thread samples every in-flight request at that (low) rate and aggregates
+  stacks per view. Counts are flushed to a Redis hash as HINCRBY deltas, like
+  utils.cache_metrics, so all workers feed one flame graph per view.
+
+Profiles can be downloaded as collapsed stacks (flamegraph.pl, speedscope,
+inferno) or speedscope JSON. ProfilingMiddleware is only installed when
+PROFILING_ENABLED is set, so there is no overhead when profiling is off.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from utils.cache import get_cache_key
+from utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = "utils.profiling"
+TOKEN_HEADER = "HTTP_X_PROFILE_TOKEN"
+TOKEN_PARAM = "__profile"
+PROFILE_CACHE_PREFIX = "request_profile"
+PROFILE_TTL = 60 * 60
+STACKS_HASH_KEY = "aaa:profile_stacks"
+STACKS_HASH_TTL = 60 * 60 * 24 * 7
+FIELD_SEPARATOR = "|"
+FORMATS = ("collapsed", "speedscope")
+
+_ROOT = str(settings.BASE_DIR)
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        # Keep site-packages paths short: "django/db/models/query.py"
+        marker = filename.rfind("site-packages" + os.sep)
+        if marker != -1:
+            filename = filename[marker + len("site-packages") + 1 :]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame, max_depth: Optional[int] = None) -> str:
+    """Render ``frame`` and its callers as one collapsed line, root first."""
+    max_depth = max_depth or _setting("PROFILING_MAX_DEPTH", 64)
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def issue_token(user_id: int) -> str:
+    """Signed token that enables on-demand profiling for requests carrying it."""
+    return signing.dumps({"u": user_id}, salt=TOKEN_SALT, compress=True)
+
+
+def verify_token(token: str) -> bool:
+    try:
+        signing.loads(
+            token,
+            salt=TOKEN_SALT,
+            max_age=_setting("PROFILING_TOKEN_MAX_AGE", 3600),
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class RequestSampler:
+    """Samples one thread's stack at a fixed interval until stopped."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Dict[str, int] = defaultdict(int)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> float:
+        """Stop sampling and return the wall time covered, in milliseconds."""
+        self._stop.set()
+        self._thread.join()
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[collapse_stack(frame)] += 1
+
+
+class BackgroundSampler:
+    """Low-rate sampler aggregating the stacks of in-flight requests per view."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[int, str] = {}
+        self._pending: Dict[tuple, int] = defaultdict(int)
+        self._thread: Optional[threading.Thread] = None
+        self._last_flush = time.monotonic()
+
+    @property
+    def interval(self) -> float:
+        return _setting("PROFILING_BACKGROUND_INTERVAL_MS", 0) / 1000
+
+    def enter(self, thread_id: int, view: str) -> None:
+        self._active[thread_id] = view
+        self._ensure_thread()
+
+    def leave(self, thread_id: int) -> None:
+        self._active.pop(thread_id, None)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="background-profiler", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self._sample()
+                if time.monotonic() - self._last_flush >= _setting(
+                    "PROFILING_FLUSH_INTERVAL", 30
+                ):
+                    self.flush()
+            except Exception:
+                logger.exception("Background profiler sample failed")
+
+    def _sample(self) -> None:
+        active = dict(self._active)
+        if not active:
+            return
+        frames = sys._current_frames()
+        with self._lock:
+            for thread_id, view in active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self._pending[(view, collapse_stack(frame))] += 1
+
+    def flush(self) -> bool:
+        """
+        Push pending stack counts to Redis with HINCRBY.
+
+        Returns:
+            True if the counts were written, False if they were kept locally.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return True
+
+        conn = get_redis_client()
+        if conn is None:
+            self._restore(pending)
+            return False
+        try:
+            pipe = conn.pipeline(transaction=False)
+            for (view, stack), count in pending.items():
+                pipe.hincrby(STACKS_HASH_KEY, f"{view}{FIELD_SEPARATOR}{stack}", count)
+            pipe.expire(STACKS_HASH_KEY, STACKS_HASH_TTL)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.debug(f"Profile stacks flush failed: {e}")
+            self._restore(pending)
+            return False
+
+    def _restore(self, pending: Dict[tuple, int]) -> None:
+        with self._lock:
+            for key, count in pending.items():
+                self._pending[key] += count
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Stack counts per view, merged across workers."""
+        merged: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        conn = get_redis_client()
+        if conn is not None:
+            try:
+                for raw_name, raw_value in conn.hgetall(STACKS_HASH_KEY).items():
+                    name = (
+                        raw_name.decode() if isinstance(raw_name, bytes) else raw_name
+                    )
+                    view, _, stack = name.partition(FIELD_SEPARATOR)
+                    merged[view][stack] += int(raw_value)
+            except Exception as e:
+                logger.debug(f"Profile stacks read failed: {e}")
+
+        with self._lock:
+            for (view, stack), count in self._pending.items():
+                merged[view][stack] += count
+        return merged
+
+    def reset(self) -> None:
+        """Drop all pending and flushed stacks."""
+        with self._lock:
+            self._pending = defaultdict(int)
+        conn = get_redis_client()
+        if conn is not None:
+            try:
+                conn.delete(STACKS_HASH_KEY)
+            except Exception as e:
+                logger.debug(f"Profile stacks reset failed: {e}")
+
+
+background_sampler = BackgroundSampler()
+
+
+def _profile_key(profile_id: str) -> str:
+    return get_cache_key(PROFILE_CACHE_PREFIX, profile_id)
+
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    """Return a captured request profile, if it has not expired."""
+    return cache.get(_profile_key(profile_id))
+
+
+def to_collapsed(samples: Dict[str, int]) -> str:
+    """Collapsed-stack text: one ``frame;frame;frame count`` line per stack."""
+    return "".join(
+        f"{stack} {count}\n"
+        for stack, count in sorted(samples.items(), key=lambda item: -item[1])
+    )
+
+
+def to_speedscope(samples: Dict[str, int], name: str, interval_ms: float) -> str:
+    """Speedscope "sampled" profile (https://www.speedscope.app/file-format-schema.json)."""
+    frame_index: Dict[str, int] = {}
+    frames, stacks, weights = [], [], []
+    for stack, count in samples.items():
+        indices = []
+        for label in stack.split(";"):
+            if label not in frame_index:
+                frame_index[label] = len(frames)
+                frames.append({"name": label})
+            indices.append(frame_index[label])
+        stacks.append(indices)
+        weights.append(count * interval_ms)
+
+    return json.dumps(
+        {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "aaa-profiler",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": stacks,
+                    "weights": weights,
+                }
+            ],
+        }
+    )
+
+
+def render(samples: Dict[str, int], file_format: str, name: str, interval_ms: float):
+    """Return (body, content type) for ``samples`` in ``file_format``."""
+    if file_format == "speedscope":
+        return to_speedscope(samples, name, interval_ms), "application/json"
+    return to_collapsed(samples), "text/plain; charset=utf-8"
+
+
+def _view_name(request) -> str:
+    resolver = getattr(request, "resolver_match", None)
+    if resolver is not None:
+        return resolver.view_name or resolver.route or "unnamed"
+    return "unresolved"
+
+
+class ProfilingMiddleware:
+    """
+    Capture on-demand request profiles and feed the background sampler.
+
+    Only installed when PROFILING_ENABLED is set; place it early in MIDDLEWARE
+    so the time spent in other middleware is sampled too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        thread_id = threading.get_ident()
+        token = request.META.get(TOKEN_HEADER) or request.GET.get(TOKEN_PARAM)
+        sampler = None
+        if token and verify_token(token):
+            sampler = RequestSampler(
+                thread_id, _setting("PROFILING_SAMPLE_INTERVAL_MS", 5) / 1000
+            )
+            sampler.start()
+
+        background = background_sampler.interval > 0
+        if background:
+            background_sampler.enter(thread_id, "unresolved")
+        try:
+            response = self.get_response(request)
+        finally:
+            if background:
+                background_sampler.leave(thread_id)
+            if sampler is not None:
+                duration_ms = sampler.stop()
+
+        if sampler is not None:
+            response["X-Profile-Id"] = self._store(request, sampler, duration_ms)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Attribute background samples to the view once the URL is resolved
+        if background_sampler.interval > 0:
+            background_sampler.enter(threading.get_ident(), _view_name(request))
+        return None
+
+    @staticmethod
+    def _store(request, sampler: RequestSampler, duration_ms: float) -> str:
+        profile_id = uuid.uuid4().hex[:12]
+        cache.set(
+            _profile_key(profile_id),
+            {
+                "id": profile_id,
+                "view": _view_name(request),
+                "method": request.method,
+                "path": request.path,
+                "request_id": getattr(request, "id", None),
+                "duration_ms": round(duration_ms, 2),
+                "interval_ms": sampler.interval * 1000,
+                "samples": dict(sampler.samples),
+            },
+            PROFILE_TTL,
+        )
+        logger.info(
+            f"Captured profile {profile_id} for {request.method} {request.path} "
+            f"({sum(sampler.samples.values())} samples, {duration_ms:.1f}ms)"
+        )
+        return profile_id
@@ -1,68 +1,206 @@
 """
-Database query logging utilities for development and debugging.
+Per-request database query profiling.
+
+QueryProfile is a ``connection.execute_wrapper`` hook that counts and times
+every query a request runs and, when asked, groups them by normalized SQL
+fingerprint so repeated statements (N+1 patterns) stand out. It does not
+depend on DEBUG or ``connection.queries``, and costs two clock reads and a
+dict update per query, so QueryLoggingMiddleware can stay on in production:
+
+- a QUERY_LOGGING_SAMPLE_RATE share of API requests is profiled;
+- profiled responses get a ``Server-Timing: db`` entry when the client may
+  see timing details (see utils.server_timing);
+- requests over QUERY_LOGGING_MAX_QUERIES queries, QUERY_LOGGING_SLOW_MS of
+  database time or QUERY_LOGGING_DUPLICATE_THRESHOLD repeats of one statement
+  are logged with their worst normalized statements.
 """
 
+import contextvars
 import logging
+import random
+import re
 import time
-from typing import Any, Dict, List
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
 
 from django.conf import settings
 from django.db import connection
-from django.utils.deprecation import MiddlewareMixin
+
+from utils.server_timing import (
+    append_server_timing,
+    current_timings,
+    timing_details_allowed,
+)
 
 logger = logging.getLogger("django.db.backends")
 
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_VALUE_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_active: contextvars.ContextVar[Optional["QueryProfile"]] = contextvars.ContextVar(
+    "query_profile", default=None
+)
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalize ``sql`` so statements differing only in values compare equal.
+
+    Literals and placeholders become ``?`` and IN/VALUES lists of any length
+    collapse to ``(...)``.
+    """
+    normalized = _STRING_LITERAL.sub("?", sql)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _VALUE_LIST.sub("(...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class QueryProfile:
+    """execute_wrapper that counts and times queries, optionally per statement."""
+
+    def __init__(self, track_statements: bool = False):
+        self.count = 0
+        self.elapsed_ms = 0.0
+        # Keyed by raw SQL; fingerprinting is deferred to report time
+        self._statements = None
+        if track_statements:
+            self.track_statements()
+
+    def track_statements(self) -> None:
+        """Group queries by statement from now on."""
+        if self._statements is None:
+            self._statements = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.elapsed_ms += elapsed_ms
+            if self._statements is not None:
+                entry = self._statements[sql]
+                entry[0] += 1
+                entry[1] += elapsed_ms
+
+    def statements(self) -> List[Dict[str, Any]]:
+        """Statements grouped by fingerprint, most expensive first."""
+        grouped: Dict[str, List] = defaultdict(lambda: [0, 0.0])
+        for sql, (count, elapsed_ms) in (self._statements or {}).items():
+            entry = grouped[fingerprint(sql)]
+            entry[0] += count
+            entry[1] += elapsed_ms
+        rows = [
+            {"sql": sql[:500], "count": count, "time_ms": round(elapsed_ms, 2)}
+            for sql, (count, elapsed_ms) in grouped.items()
+        ]
+        rows.sort(key=lambda row: row["time_ms"], reverse=True)
+        return rows
+
+
+@contextmanager
+def profile_queries(track_statements: bool = False):
+    """
+    Profile the queries run inside the block.
 
-class QueryLoggingMiddleware(MiddlewareMixin):
+    Middlewares nest, so the outermost one installs the execute_wrapper and
+    inner ones share its QueryProfile instead of stacking wrappers. Counts
+    therefore cover the request from the outermost profiling middleware in.
     """
-    Middleware to log database queries in development.
-    Only active when DEBUG=True.
+    profile = _active.get()
+    if profile is not None:
+        if track_statements:
+            profile.track_statements()
+        yield profile
+        return
+
+    profile = QueryProfile(track_statements)
+    token = _active.set(profile)
+    try:
+        with connection.execute_wrapper(profile):
+            yield profile
+    finally:
+        _active.reset(token)
+
+
+class QueryLoggingMiddleware:
     """
+    Profile a sample of API requests' database queries and log offenders.
+
+    Install directly after RequestIDMiddleware so log lines carry the request id.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "QUERY_LOGGING_SAMPLE_RATE", 1.0)
+        self.max_queries = getattr(settings, "QUERY_LOGGING_MAX_QUERIES", 20)
+        self.slow_ms = getattr(settings, "QUERY_LOGGING_SLOW_MS", 500)
+        self.duplicate_threshold = getattr(
+            settings, "QUERY_LOGGING_DUPLICATE_THRESHOLD", 5
+        )
 
-    def process_request(self, request):
-        """Reset query count at start of request."""
-        if settings.DEBUG:
-            connection.queries_log.clear()
-            self.start_time = time.time()
-        return None
-
-    def process_response(self, request, response):
-        """Log queries at end of request."""
-        if settings.DEBUG and hasattr(connection, "queries"):
-            queries = connection.queries
-            query_count = len(queries)
-            total_time = sum(float(q["time"]) for q in queries)
-
-            # Only log if there are queries or if it's an API request
-            if query_count > 0 and request.path.startswith("/api/"):
-                request_time = time.time() - getattr(self, "start_time", 0)
-
-                # Log warning if too many queries (N+1 problem indicator)
-                if query_count > 20:
-                    logger.warning(
-                        f"High query count ({query_count}) for {request.path}",
-                        extra={
-                            "query_count": query_count,
-                            "total_query_time": total_time,
-                            "request_time": request_time,
-                            "path": request.path,
-                            "method": request.method,
-                        },
-                    )
-                elif query_count > 10:
-                    logger.info(
-                        f"Query count ({query_count}) for {request.path}",
-                        extra={
-                            "query_count": query_count,
-                            "total_query_time": total_time,
-                            "request_time": request_time,
-                            "path": request.path,
-                            "method": request.method,
-                        },
-                    )
+    def __call__(self, request):
+        if not request.path.startswith("/api/") or random.random() >= self.sample_rate:
+            return self.get_response(request)
 
+        start = time.perf_counter()
+        with profile_queries(track_statements=True) as profile:
+            response = self.get_response(request)
+        request_ms = (time.perf_counter() - start) * 1000
+
+        if current_timings() is None and timing_details_allowed(request):
+            # ServerTimingMiddleware reports db time itself when installed
+            append_server_timing(
+                response, "db", profile.elapsed_ms, f"{profile.count} queries"
+            )
+        try:
+            self._log_offenders(request, profile, request_ms)
+        except Exception:  # pragma: no cover - logging must never break requests
+            logger.exception("Query profile logging failed for %s", request.path)
         return response
 
+    def _log_offenders(self, request, profile: QueryProfile, request_ms: float):
+        over_limits = (
+            profile.count > self.max_queries or profile.elapsed_ms > self.slow_ms
+        )
+        if not over_limits and profile.count < self.duplicate_threshold:
+            # No statement can repeat often enough; skip fingerprinting
+            return
+
+        statements = profile.statements()
+        duplicates = sorted(
+            (row for row in statements if row["count"] > 1),
+            key=lambda row: row["count"],
+            reverse=True,
+        )
+        if not over_limits and not (
+            duplicates and duplicates[0]["count"] >= self.duplicate_threshold
+        ):
+            return
+
+        resolver = getattr(request, "resolver_match", None)
+        logger.warning(
+            f"{profile.count} queries ({profile.elapsed_ms:.1f}ms) for "
+            f"{request.method} {request.path}",
+            extra={
+                "request_id": getattr(request, "id", None),
+                "path": request.path,
+                "method": request.method,
+                "view": resolver.view_name if resolver else None,
+                "query_count": profile.count,
+                "total_query_time": round(profile.elapsed_ms / 1000, 4),
+                "request_time": round(request_ms / 1000, 4),
+                "duplicate_queries": duplicates[:5],
+                "slowest_queries": statements[:5],
+            },
+        )
+
 
 def get_query_count() -> int:
     """
@@ -0,0 +1,223 @@
+"""
+Atomic rate limiting on Redis.
+
+Each check is a single Lua script call, so concurrent requests cannot race
+each other and the stored state stays constant-size whatever the limit.
+hit_many() evaluates several limits (e.g. every throttle on a view) in that
+same single call. Algorithms:
+
+- ``sliding`` (default): sliding-window counter. The current and previous
+  fixed windows each keep one integer, and the previous window's count is
+  weighted by how much of it still overlaps the sliding window. Accurate to
+  within a few percent of a true sliding log at a fraction of the memory.
+- ``fixed``: plain INCR + PEXPIRE per window.
+
+When the cache is not Redis-backed (LocMemCache in development) the limiter
+falls back to a fixed window on the Django cache.
+
+Usage:
+    limiter = RateLimiter(limit=3, window=3600)
+    if not limiter.hit(f"inquiry:{ip}").allowed:
+        ...
+"""
+
+import time
+from typing import Iterable, List, NamedTuple, Tuple
+
+from django.core.cache import cache
+
+from utils.redis_client import get_redis_client
+
+KEY_PREFIX = "aaa:rl"
+
+# Evaluates any number of checks in one call. For check i (1-based):
+#   KEYS[2i-1], KEYS[2i]    current and previous window counters
+#   ARGV[4i-3 .. 4i]        algorithm (0 sliding, 1 fixed), limit, window_ms,
+#                           elapsed_ms into the current window
+# Returns a flat list of {allowed, current, previous-or-pttl} per check.
+RATE_LIMIT_SCRIPT = """
+local out = {}
+for i = 1, #KEYS / 2 do
+    local cur_key, prev_key = KEYS[2 * i - 1], KEYS[2 * i]
+    local fixed = ARGV[4 * i - 3] == '1'
+    local limit = tonumber(ARGV[4 * i - 2])
+    local window_ms = tonumber(ARGV[4 * i - 1])
+    local elapsed_ms = tonumber(ARGV[4 * i])
+    if fixed then
+        local count = redis.call('INCR', cur_key)
+        if count == 1 then
+            redis.call('PEXPIRE', cur_key, window_ms)
+        end
+        out[#out + 1] = count <= limit and 1 or 0
+        out[#out + 1] = count
+        out[#out + 1] = redis.call('PTTL', cur_key)
+    else
+        local current = tonumber(redis.call('GET', cur_key) or '0')
+        local previous = tonumber(redis.call('GET', prev_key) or '0')
+        local estimate = previous * (window_ms - elapsed_ms) / window_ms + current
+        local allowed = 0
+        if estimate + 1 <= limit then
+            allowed = 1
+            current = redis.call('INCR', cur_key)
+            if current == 1 then
+                redis.call('PEXPIRE', cur_key, window_ms * 2)
+            end
+        end
+        out[#out + 1] = allowed
+        out[#out + 1] = current
+        out[#out + 1] = previous
+    end
+end
+return out
+"""
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+_script = None
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """
+    Parse a DRF-style rate string.
+
+    Args:
+        rate: e.g. '5/minute', '100/hour', '3/h'
+
+    Returns:
+        (limit, window_seconds)
+    """
+    num, period = rate.split("/")
+    return int(num), DURATIONS[period[0]]
+
+
+def _get_script(client):
+    global _script
+    if _script is None:
+        # Script objects cache the SHA and fall back to EVAL on NOSCRIPT
+        _script = client.register_script(RATE_LIMIT_SCRIPT)
+    return _script
+
+
+def hit_many(checks: Iterable[Tuple["RateLimiter", str]]) -> List["RateLimitResult"]:
+    """
+    Count one request against several (limiter, identity) pairs at once.
+
+    All checks are evaluated atomically in a single Redis round trip. Each
+    check is allowed or blocked independently, as if hit() were called for
+    each in turn.
+    """
+    checks = list(checks)
+    if not checks:
+        return []
+
+    now = time.time()
+    client = get_redis_client()
+    if client is None:
+        return [
+            limiter._hit_django_cache(identity, now) for limiter, identity in checks
+        ]
+
+    keys, args = [], []
+    for limiter, identity in checks:
+        index, elapsed_ms = limiter._window_position(now)
+        keys += [
+            limiter._window_key(identity, index),
+            limiter._window_key(identity, index - 1),
+        ]
+        args += [
+            1 if limiter.algorithm == "fixed" else 0,
+            limiter.limit,
+            limiter.window * 1000,
+            elapsed_ms,
+        ]
+
+    raw = _get_script(client)(keys=keys, args=args, client=client)
+    return [
+        limiter._to_result(now, *raw[3 * i : 3 * i + 3])
+        for i, (limiter, _) in enumerate(checks)
+    ]
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until the next request would be allowed
+
+
+class RateLimiter:
+    """Atomic per-identity rate limiter."""
+
+    def __init__(self, limit: int, window: int, algorithm: str = "sliding"):
+        if algorithm not in ("sliding", "fixed"):
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        self.limit = limit
+        self.window = window
+        self.algorithm = algorithm
+
+    @classmethod
+    def from_rate(cls, rate: str, algorithm: str = "sliding") -> "RateLimiter":
+        limit, window = parse_rate(rate)
+        return cls(limit, window, algorithm)
+
+    def hit(self, identity: str) -> RateLimitResult:
+        """
+        Count one request for ``identity`` and report whether it is allowed.
+
+        Blocked requests are not counted against the sliding window.
+        """
+        return hit_many([(self, identity)])[0]
+
+    def _window_key(self, identity: str, index: int) -> str:
+        # Hash tag keeps both windows of an identity on one cluster slot
+        return f"{KEY_PREFIX}:{{{identity}}}:{self.window}:{index}"
+
+    def _window_position(self, now: float) -> Tuple[int, int]:
+        """Return (window index, milliseconds elapsed in that window)."""
+        return divmod(int(now * 1000), self.window * 1000)
+
+    def _to_result(
+        self, now: float, allowed: int, current: int, extra: int
+    ) -> RateLimitResult:
+        if self.algorithm == "fixed":
+            # extra is the window's remaining TTL in milliseconds
+            return RateLimitResult(
+                bool(allowed),
+                self.limit,
+                max(0, self.limit - current),
+                0.0 if allowed else max(extra, 0) / 1000,
+            )
+
+        previous = extra
+        window_ms = self.window * 1000
+        _, elapsed_ms = self._window_position(now)
+        estimate = previous * (window_ms - elapsed_ms) / window_ms + current
+        remaining = max(0, int(self.limit - estimate))
+
+        retry_after = 0.0
+        if not allowed:
+            if current + 1 > self.limit or not previous:
+                retry_after = (window_ms - elapsed_ms) / 1000
+            else:
+                needed_ms = window_ms * (1 - (self.limit - current - 1) / previous)
+                retry_after = max(0.0, (needed_ms - elapsed_ms) / 1000)
+
+        return RateLimitResult(bool(allowed), self.limit, remaining, retry_after)
+
+    def _hit_django_cache(self, identity: str, now: float) -> RateLimitResult:
+        index, elapsed = divmod(now, self.window)
+        key = self._window_key(identity, int(index))
+        cache.add(key, 0, self.window)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(key, 1, self.window)
+            count = 1
+        allowed = count <= self.limit
+        return RateLimitResult(
+            allowed,
+            self.limit,
+            max(0, self.limit - count),
+            0.0 if allowed else self.window - elapsed,
+        )
@@ -0,0 +1,20 @@
+"""
+Access to the raw Redis client behind the default cache.
+"""
+
+from typing import Optional
+
+
+def get_redis_client(alias: str = "default") -> Optional[object]:
+    """
+    Return the redis-py client used by django-redis for ``alias``.
+
+    Returns None when the cache is not Redis-backed (e.g. the LocMemCache
+    fallback in development), so callers can degrade gracefully.
+    """
+    try:
+        from django_redis import get_redis_connection
+
+        return get_redis_connection(alias)
+    except Exception:
+        return None
@@ -0,0 +1,106 @@
+"""
+Request-scoped memoization.
+
+Results are stored in a dict held by a ContextVar, so each request (thread or
+asyncio task under ASGI) sees only its own entries. RequestCacheMiddleware
+opens a fresh scope per request and drops it when the response is returned;
+outside a scope (management commands, Celery tasks) memoized functions simply
+run every time unless the caller opens one with ``request_cache_scope()``.
+
+Only worth it for lookups that really repeat within one request; a function
+called once per request gains nothing.
+
+Usage:
+    @memoize_per_request
+    def get_settings():
+        ...
+
+    get_settings.invalidate()  # after writes within the same request
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_request_cache: ContextVar[Optional[Dict[Any, Any]]] = ContextVar(
+    "request_cache", default=None
+)
+
+
+@contextmanager
+def request_cache_scope() -> Iterator[Dict[Any, Any]]:
+    """Open a memoization scope; entries are discarded when it exits."""
+    store: Dict[Any, Any] = {}
+    token = _request_cache.set(store)
+    try:
+        yield store
+    finally:
+        _request_cache.reset(token)
+
+
+def clear_request_cache() -> None:
+    """Drop every memoized entry in the current scope."""
+    store = _request_cache.get()
+    if store is not None:
+        store.clear()
+
+
+def _make_key(func: Callable, args: tuple, kwargs: dict) -> Any:
+    key = (func.__module__, func.__qualname__, args)
+    if kwargs:
+        key += (tuple(sorted(kwargs.items())),)
+    return key
+
+
+def memoize_per_request(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Memoize ``func`` for the lifetime of the current request.
+
+    Arguments must be hashable; calls with unhashable arguments are not
+    memoized. The wrapper gains an ``invalidate()`` method that drops this
+    function's entries from the current scope.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        store = _request_cache.get()
+        if store is None:
+            return func(*args, **kwargs)
+
+        key = _make_key(func, args, kwargs)
+        try:
+            return store[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable arguments
+            return func(*args, **kwargs)
+
+        result = func(*args, **kwargs)
+        store[key] = result
+        return result
+
+    def invalidate() -> None:
+        store = _request_cache.get()
+        if not store:
+            return
+        prefix = (func.__module__, func.__qualname__)
+        for key in [k for k in store if k[:2] == prefix]:
+            del store[key]
+
+    wrapper.invalidate = invalidate
+    return wrapper
+
+
+class RequestCacheMiddleware:
+    """Give every request its own memoization scope."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_cache_scope():
+            return self.get_response(request)
@@ -0,0 +1,338 @@
+"""
+Per-route request counters and latency histograms.
+
+Requests are aggregated in-process per (route, status): a count, the summed
+latency and fixed-bucket latency histogram counts. A daemon thread per
+recorder flushes the deltas to a shared Redis hash with HINCRBY every
+REQUEST_METRICS_FLUSH_INTERVAL seconds, so recording (on the request path, or
+inside the chatbot's async provider calls) never talks to Redis and concurrent
+workers never overwrite each other. Reading merges the shared hash with this
+worker's pending deltas.
+
+Requests per minute come from per-minute counters that expire after a few
+minutes. API requests also accumulate the number and total time of their
+database queries.
+
+The same recorder, under its own hash, times calls to external providers
+(provider_metrics, e.g. the chatbot's LLM APIs) labelled by provider and
+outcome.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+STATS_HASH_KEY = "aaa:request_metrics"
+PROVIDER_HASH_KEY = "aaa:provider_metrics"
+MINUTE_KEY_TTL = 300
+FIELD_SEPARATOR = "|"
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BUCKET_FIELDS = tuple(f"le_{bound}" for bound in LATENCY_BUCKETS_MS) + ("le_inf",)
+COUNTER_FIELDS = ("count", "sum_ms", "db_queries", "db_ms") + BUCKET_FIELDS
+FLOAT_FIELDS = ("sum_ms", "db_ms")
+
+SeriesKey = Tuple[str, str]
+
+
+def _empty_counters() -> Dict[str, float]:
+    return {field: 0 for field in COUNTER_FIELDS}
+
+
+def bucket_field(elapsed_ms: float) -> str:
+    """Name of the histogram bucket that ``elapsed_ms`` falls into."""
+    return BUCKET_FIELDS[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)]
+
+
+def estimate_percentile(counters: Dict[str, float], percentile: float) -> float:
+    """
+    Estimate a latency percentile (ms) from histogram bucket counts.
+
+    Interpolates linearly inside the bucket holding the percentile, so the
+    result is only as precise as the bucket boundaries.
+    """
+    total = counters.get("count", 0)
+    if not total:
+        return 0.0
+    target = total * percentile / 100
+    seen, lower = 0.0, 0.0
+    for bound, field in zip(LATENCY_BUCKETS_MS + (None,), BUCKET_FIELDS):
+        in_bucket = counters.get(field, 0)
+        if in_bucket and seen + in_bucket >= target:
+            if bound is None:
+                return float(lower)
+            return lower + (bound - lower) * (target - seen) / in_bucket
+        seen += in_bucket
+        lower = bound if bound is not None else lower
+    return float(lower)
+
+
+def summarize(route: str, status: str, counters: Dict[str, float]) -> Dict[str, Any]:
+    """Turn raw counters into a display row with derived latencies."""
+    count = int(counters.get("count", 0))
+    return {
+        "route": route,
+        "status": status,
+        "count": count,
+        "avg_ms": round(counters.get("sum_ms", 0) / count, 2) if count else 0.0,
+        "p50_ms": round(estimate_percentile(counters, 50), 2),
+        "p95_ms": round(estimate_percentile(counters, 95), 2),
+        "p99_ms": round(estimate_percentile(counters, 99), 2),
+    }
+
+
+class RequestMetricsRecorder:
+    """Thread-safe, in-process aggregator for per-route request metrics."""
+
+    def __init__(
+        self, flush_interval: Optional[float] = None, hash_key: str = STATS_HASH_KEY
+    ):
+        self.hash_key = hash_key
+        self.minute_key_prefix = f"{hash_key}:minute:"
+        self._lock = threading.Lock()
+        self._pending: Dict[SeriesKey, Dict[str, float]] = defaultdict(_empty_counters)
+        self._pending_minutes: Dict[int, int] = defaultdict(int)
+        self._flush_interval = flush_interval
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, "REQUEST_METRICS_ENABLED", True)
+
+    @property
+    def flush_interval(self) -> float:
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, "REQUEST_METRICS_FLUSH_INTERVAL", 5)
+
+    def record(
+        self,
+        route: str,
+        status: int,
+        elapsed_ms: float,
+        db_queries: int = 0,
+        db_ms: float = 0.0,
+    ) -> None:
+        """Record one request to ``route`` that returned ``status``."""
+        if not self.enabled:
+            return
+        bucket = bucket_field(elapsed_ms)
+        minute = int(time.time() // 60)
+        with self._lock:
+            counters = self._pending[(route, str(status))]
+            counters["count"] += 1
+            counters["sum_ms"] += elapsed_ms
+            counters[bucket] += 1
+            counters["db_queries"] += db_queries
+            counters["db_ms"] += db_ms
+            self._pending_minutes[minute] += 1
+        self._ensure_flusher()
+
+    @contextmanager
+    def track(self, route: str):
+        """Time the enclosed block as one call, labelled "ok" or "error"."""
+        start = time.perf_counter()
+        status = "error"
+        try:
+            yield
+            status = "ok"
+        finally:
+            self.record(route, status, (time.perf_counter() - start) * 1000)
+
+    def _flusher_running(self) -> bool:
+        # A thread started before a fork does not exist in the child
+        return (
+            self._thread is not None
+            and self._thread_pid == os.getpid()
+            and self._thread.is_alive()
+        )
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher_running():
+            return
+        with self._lock:
+            if self._flusher_running():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f"{self.hash_key}-flusher", daemon=True
+            )
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Request metrics flush failed")
+
+    def _drain(self):
+        with self._lock:
+            pending, minutes = self._pending, self._pending_minutes
+            self._pending = defaultdict(_empty_counters)
+            self._pending_minutes = defaultdict(int)
+        return pending, minutes
+
+    def _restore(self, pending, minutes) -> None:
+        with self._lock:
+            for series, counters in pending.items():
+                target = self._pending[series]
+                for field, value in counters.items():
+                    target[field] += value
+            for minute, count in minutes.items():
+                self._pending_minutes[minute] += count
+
+    def flush(self) -> bool:
+        """
+        Push pending deltas to Redis with HINCRBY/HINCRBYFLOAT.
+
+        Returns:
+            True if the deltas were written, False if they were kept locally.
+        """
+        pending, minutes = self._drain()
+        if not pending and not minutes:
+            return True
+
+        conn = get_redis_client()
+        if conn is None:
+            # No shared store (e.g. LocMemCache); keep counting in-process.
+            self._restore(pending, minutes)
+            return False
+
+        try:
+            pipe = conn.pipeline(transaction=False)
+            for (route, status), counters in pending.items():
+                for field, value in counters.items():
+                    if not value:
+                        continue
+                    name = FIELD_SEPARATOR.join((route, status, field))
+                    if field in FLOAT_FIELDS:
+                        pipe.hincrbyfloat(self.hash_key, name, value)
+                    else:
+                        pipe.hincrby(self.hash_key, name, int(value))
+            for minute, count in minutes.items():
+                pipe.incrby(f"{self.minute_key_prefix}{minute}", count)
+                pipe.expire(f"{self.minute_key_prefix}{minute}", MINUTE_KEY_TTL)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.debug(f"Request metrics flush failed: {e}")
+            self._restore(pending, minutes)
+            return False
+
+    def snapshot(self) -> Dict[SeriesKey, Dict[str, float]]:
+        """Merge flushed counters from Redis with this worker's pending deltas."""
+        merged: Dict[SeriesKey, Dict[str, float]] = defaultdict(_empty_counters)
+
+        conn = get_redis_client()
+        if conn is not None:
+            try:
+                for raw_name, raw_value in conn.hgetall(self.hash_key).items():
+                    name = (
+                        raw_name.decode() if isinstance(raw_name, bytes) else raw_name
+                    )
+                    route, status, field = name.rsplit(FIELD_SEPARATOR, 2)
+                    if field in COUNTER_FIELDS:
+                        merged[(route, status)][field] += float(raw_value)
+            except Exception as e:
+                logger.debug(f"Request metrics read failed: {e}")
+
+        with self._lock:
+            for series, counters in self._pending.items():
+                for field, value in counters.items():
+                    merged[series][field] += value
+
+        return merged
+
+    def requests_per_minute(self) -> int:
+        """Requests served by all workers during the last complete minute."""
+        minute = int(time.time() // 60) - 1
+        with self._lock:
+            count = self._pending_minutes.get(minute, 0)
+
+        conn = get_redis_client()
+        if conn is not None:
+            try:
+                count += int(conn.get(f"{self.minute_key_prefix}{minute}") or 0)
+            except Exception as e:
+                logger.debug(f"Request metrics read failed: {e}")
+        return count
+
+    def summary(self, limit: int = 10) -> Dict[str, Any]:
+        """
+        Totals across every route plus the busiest routes.
+
+        Args:
+            limit: Maximum number of per-route rows
+        """
+        snapshot = self.snapshot()
+        total = _empty_counters()
+        for counters in snapshot.values():
+            for field, value in counters.items():
+                total[field] += value
+
+        rows = [
+            summarize(route, status, counters)
+            for (route, status), counters in snapshot.items()
+        ]
+        rows.sort(key=lambda row: row["count"], reverse=True)
+
+        overall = summarize("*", "*", total)
+        return {
+            "total_requests": overall["count"],
+            "requests_per_minute": self.requests_per_minute(),
+            "average_response_time_ms": overall["avg_ms"],
+            "p95_response_time_ms": overall["p95_ms"],
+            "average_db_queries": (
+                round(total["db_queries"] / overall["count"], 2)
+                if overall["count"]
+                else 0.0
+            ),
+            "routes": rows[:limit],
+        }
+
+    def reset(self) -> None:
+        """Drop all pending and flushed counters."""
+        self._drain()
+        conn = get_redis_client()
+        if conn is not None:
+            try:
+                conn.delete(self.hash_key)
+            except Exception as e:
+                logger.debug(f"Request metrics reset failed: {e}")
+
+
+request_metrics = RequestMetricsRecorder()
+provider_metrics = RequestMetricsRecorder(hash_key=PROVIDER_HASH_KEY)
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    for recorder in (request_metrics, provider_metrics):
+        try:
+            recorder.flush()
+        except Exception:
+            logger.exception("Request metrics flush at shutdown failed")
+
+
+def route_name(request) -> str:
+    """Low-cardinality label for ``request``: its resolved view name."""
+    resolver = getattr(request, "resolver_match", None)
+    if resolver is not None:
+        return resolver.view_name or resolver.route or "unnamed"
+    return "unresolved"
@@ -0,0 +1,359 @@
+"""
+Server-Timing spans and response header helpers.
+
+ServerTimingMiddleware opens a per-request timing scope. Code anywhere in the
+stack adds to it with ``span()`` (context manager or decorator); spans with
+the same name accumulate. At the end of the request every span is emitted as
+a ``Server-Timing`` entry, which browsers show in the network panel's timing
+tab, and slow requests are logged with the same breakdown under their request
+id. Outside a request scope ``span()`` does nothing.
+
+Besides explicit spans, the middleware records:
+
+    mw-<Name>   time spent in each middleware itself (excluding inner layers)
+    view        view execution, excluding response rendering
+    render      DRF response rendering (Response.rendered_content)
+    serialize   DRF serializer ``.data``
+    db          database queries (connection.execute_wrapper)
+    cache       calls on the default cache backend
+    total       the whole request from this middleware inwards
+
+The view, db, cache and serialize spans overlap: db, cache and serialize time
+is part of view. See https://www.w3.org/TR/server-timing/.
+
+The breakdown reveals how a request is served, so only ``total`` is sent to
+ordinary clients. Active admins, requests carrying SERVER_TIMING_TOKEN in the
+``X-Server-Timing-Token`` header and DEBUG runs get every entry; the slow
+request log always has the full breakdown.
+"""
+
+import contextvars
+import functools
+import hmac
+import inspect
+import logging
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_METHODS = (
+    "get",
+    "set",
+    "add",
+    "delete",
+    "get_many",
+    "set_many",
+    "delete_many",
+    "get_or_set",
+    "has_key",
+    "incr",
+    "decr",
+    "touch",
+)
+
+_current: contextvars.ContextVar[Optional["RequestTimings"]] = contextvars.ContextVar(
+    "server_timing", default=None
+)
+_installed = False
+
+TOKEN_HEADER = "HTTP_X_SERVER_TIMING_TOKEN"
+
+
+def format_entry(
+    name: str, duration_ms: Optional[float] = None, description: Optional[str] = None
+) -> str:
+    """Format one ``name;dur=..;desc=".."`` Server-Timing entry."""
+    entry = name
+    if duration_ms is not None:
+        entry += f";dur={duration_ms:.2f}"
+    if description:
+        escaped = description.replace("\\", "\\\\").replace('"', '\\"')
+        entry += f';desc="{escaped}"'
+    return entry
+
+
+def append_server_timing(
+    response,
+    name: str,
+    duration_ms: Optional[float] = None,
+    description: Optional[str] = None,
+) -> None:
+    """Add an entry to ``response``'s Server-Timing header, keeping existing ones."""
+    entry = format_entry(name, duration_ms, description)
+    existing = response.get("Server-Timing")
+    response["Server-Timing"] = f"{existing}, {entry}" if existing else entry
+
+
+class RequestTimings:
+    """Accumulated span durations for one request."""
+
+    def __init__(self):
+        self.spans: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._open: set = set()
+
+    def add(self, name: str, duration_ms: float, count: int = 1) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + duration_ms
+        self.counts[name] = self.counts.get(name, 0) + count
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(value, 2) for name, value in self.spans.items()}
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """The timing scope of the current request, if ServerTimingMiddleware opened one."""
+    return _current.get()
+
+
+@contextmanager
+def _timed(name: str):
+    timings = _current.get()
+    # Nested spans of the same name (e.g. cache.get_or_set -> cache.get)
+    # would count the same time twice
+    if timings is None or name in timings._open:
+        yield
+        return
+    timings._open.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._open.discard(name)
+        timings.add(name, (time.perf_counter() - start) * 1000)
+
+
+def span(name_or_func=None):
+    """
+    Time a block or function as a named span of the current request.
+
+    Usage:
+        with span("pricing"):
+            ...
+
+        @span("pricing")
+        def compute_quote(...): ...
+
+        @span
+        def compute_quote(...): ...   # span named after the function
+    """
+    if callable(name_or_func):
+        return span(name_or_func.__name__)(name_or_func)
+
+    name = name_or_func
+
+    class _Span:
+        def __enter__(self):
+            self._context = _timed(name)
+            return self._context.__enter__()
+
+        def __exit__(self, *exc_info):
+            return self._context.__exit__(*exc_info)
+
+        def __call__(self, func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with _timed(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+    return _Span()
+
+
+def timing_details_allowed(request) -> bool:
+    """Whether ``request`` may see the per-span Server-Timing breakdown."""
+    if settings.DEBUG:
+        return True
+    token = getattr(settings, "SERVER_TIMING_TOKEN", "")
+    supplied = request.META.get(TOKEN_HEADER, "")
+    if token and supplied and hmac.compare_digest(supplied, token):
+        return True
+    # DRF copies the user it authenticates onto the underlying HttpRequest
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return False
+    from utils.permissions import is_active_admin
+
+    return is_active_admin(user)
+
+
+def _timed_property(prop: property, name: str) -> property:
+    @functools.wraps(prop.fget)
+    def getter(self):
+        with _timed(name):
+            return prop.fget(self)
+
+    return property(getter, prop.fset, prop.fdel, prop.__doc__)
+
+
+def _timed_method(method, name: str):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with _timed(name):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def install_instrumentation() -> None:
+    """
+    Add serialize, render and cache spans to DRF and the cache backend.
+
+    Patches class attributes once per process; the added cost outside a
+    request scope is one context variable lookup per call.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from django.core.cache import caches
+    from rest_framework import serializers
+    from rest_framework.response import Response
+
+    serializers.Serializer.data = _timed_property(
+        serializers.Serializer.data, "serialize"
+    )
+    serializers.ListSerializer.data = _timed_property(
+        serializers.ListSerializer.data, "serialize"
+    )
+    Response.rendered_content = _timed_property(Response.rendered_content, "render")
+
+    backend_class = type(caches["default"])
+    for method_name in CACHE_METHODS:
+        method = getattr(backend_class, method_name, None)
+        if method is not None:
+            setattr(backend_class, method_name, _timed_method(method, "cache"))
+
+
+def _span_name(middleware) -> str:
+    name = type(middleware).__name__.replace("Middleware", "") or "Middleware"
+    return "mw-" + re.sub(r"[^A-Za-z0-9_-]", "", name)
+
+
+class ServerTimingMiddleware:
+    """
+    Open a timing scope per request and emit it as Server-Timing.
+
+    Place it right after RequestIDMiddleware; every middleware below it is
+    timed individually.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.log_threshold_ms = getattr(settings, "SERVER_TIMING_LOG_MS", 500)
+        install_instrumentation()
+        self._time_inner_layers()
+
+    def _time_inner_layers(self) -> None:
+        """
+        Wrap the handler each inner middleware calls, so the time spent in
+        every layer can be told apart.
+
+        Django builds the chain as convert_exception_to_response(middleware)
+        closures; each wraps (``__wrapped__``) a middleware instance whose
+        ``get_response`` is the next closure. Anything that does not follow
+        that shape ends the walk, and is timed as part of the layer above it.
+        """
+        layer = self
+        handler = self.get_response
+        names = []
+        while True:
+            middleware = getattr(handler, "__wrapped__", None)
+            inner = getattr(middleware, "get_response", None)
+            if middleware is None or inner is None or inspect.ismethod(middleware):
+                break
+            names.append(_span_name(middleware))
+            layer.get_response = self._wrap(handler, names[-1])
+            layer, handler = middleware, inner
+        # The innermost handler resolves and runs the view and renders it
+        layer.get_response = self._wrap(handler, "view")
+        self._layer_names = names + ["view"]
+
+    @staticmethod
+    def _wrap(handler, name: str):
+        """Record inclusive time per layer under a private key."""
+        key = f"_inclusive:{name}"
+
+        if inspect.iscoroutinefunction(handler):
+
+            async def timed_async(request):
+                start = time.perf_counter()
+                try:
+                    return await handler(request)
+                finally:
+                    timings = _current.get()
+                    if timings is not None:
+                        timings.add(key, (time.perf_counter() - start) * 1000)
+
+            return timed_async
+
+        @functools.wraps(handler)
+        def timed(request):
+            start = time.perf_counter()
+            try:
+                return handler(request)
+            finally:
+                timings = _current.get()
+                if timings is not None:
+                    timings.add(key, (time.perf_counter() - start) * 1000)
+
+        return timed
+
+    def __call__(self, request):
+        from utils.query_logging import profile_queries
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with profile_queries() as queries:
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        self._finalize(timings, queries)
+        if timing_details_allowed(request):
+            for name, duration in timings.as_dict().items():
+                description = None
+                if name == "db":
+                    description = f"{queries.count} queries"
+                elif name in ("cache", "serialize"):
+                    description = f"{timings.counts[name]} calls"
+                append_server_timing(response, name, duration, description)
+        append_server_timing(response, "total", total_ms)
+
+        if total_ms >= self.log_threshold_ms:
+            logger.info(
+                f"Slow request {request.method} {request.path}: {total_ms:.1f}ms",
+                extra={
+                    "request_id": getattr(request, "id", None),
+                    "path": request.path,
+                    "method": request.method,
+                    "status_code": response.status_code,
+                    "total_ms": round(total_ms, 2),
+                    "timings": timings.as_dict(),
+                },
+            )
+        return response
+
+    def _finalize(self, timings: RequestTimings, queries) -> None:
+        """Turn inclusive layer times into per-layer (exclusive) spans."""
+        inclusive = [
+            timings.spans.pop(f"_inclusive:{name}", 0.0) for name in self._layer_names
+        ]
+        for index, name in enumerate(self._layer_names):
+            inner = inclusive[index + 1] if index + 1 < len(inclusive) else 0.0
+            own = inclusive[index] - inner
+            if name == "view":
+                # Rendering happens in the innermost handler; report it apart
+                own -= timings.spans.get("render", 0.0)
+            timings.spans[name] = max(own, 0.0)
+        if queries.count:
+            timings.add("db", queries.elapsed_ms, queries.count)
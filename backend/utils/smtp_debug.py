@@ -0,0 +1,114 @@
+"""
+Local SMTP stand-in for debugging and benchmarking mail delivery.
+
+DebugSMTPServer speaks enough SMTP for smtplib and Django's SMTP backend
+(EHLO/HELO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT) and accepts
+every message without delivering it. It counts connections and messages, can
+add a fixed per-message latency to imitate a remote provider, and can drop
+connections after a number of messages to exercise reconnect handling.
+STARTTLS is refused, so point the app at it with EMAIL_USE_TLS=False.
+
+Run it with ``manage.py smtp_debug_server``.
+"""
+
+import logging
+import socketserver
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    """Threaded SMTP sink; one handler thread per client connection."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        address,
+        latency_ms: float = 0,
+        drop_after: int = 0,
+        echo: bool = False,
+    ):
+        self.latency = latency_ms / 1000
+        self.drop_after = drop_after
+        self.echo = echo
+        self.connections = 0
+        self.messages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        super().__init__(address, _SMTPHandler)
+
+    def record(self, size: int) -> None:
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.connections = self.messages = self.bytes = 0
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    server: DebugSMTPServer
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        with self.server._lock:
+            self.server.connections += 1
+        self.reply("220 localhost debug SMTP ready")
+        sent = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250-8BITMIME")
+                self.reply("250-SMTPUTF8")
+                self.reply("250 AUTH PLAIN")
+            elif verb == "HELO":
+                self.reply("250 localhost")
+            elif verb == "AUTH":
+                self.reply("235 Authentication succeeded")
+            elif verb == "STARTTLS":
+                self.reply("454 TLS not available")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                size = self._read_data()
+                if self.server.latency:
+                    time.sleep(self.server.latency)
+                self.server.record(size)
+                self.reply("250 OK queued")
+                sent += 1
+                if self.server.drop_after and sent >= self.server.drop_after:
+                    # Imitate a provider closing the session
+                    return
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+    def _read_data(self) -> int:
+        size = 0
+        headers_done = False
+        while True:
+            line = self.rfile.readline()
+            if not line or line == b".\r\n":
+                return size
+            size += len(line)
+            if self.server.echo and not headers_done:
+                if line in (b"\r\n", b"\n"):
+                    headers_done = True
+                elif line[:1] not in (b" ", b"\t"):
+                    logger.info(line.decode("utf-8", "replace").rstrip())
@@ -0,0 +1,256 @@
+"""
+Pooled, persistent SMTP connections.
+
+Django's mail API opens a connection per send() unless the caller manages
+one, so every OTP or notification email paid for a TCP connect, STARTTLS
+handshake and login. SMTPConnectionPool keeps up to EMAIL_POOL_SIZE
+connections open per process and lends them out:
+
+- Connections are opened lazily and reused. One that has been idle longer
+  than EMAIL_POOL_IDLE_TIMEOUT, or has sent EMAIL_POOL_MAX_MESSAGES messages
+  (providers cap messages per session), is reopened before it is lent.
+- A send that fails because the server dropped the connection is retried
+  once on a fresh connection.
+- send_iter() dispatches a batch across all connections in parallel, so
+  throughput scales with the pool size until the provider's limits apply.
+- Sends to each provider (SMTP host) pass the shared Redis rate limiter
+  (utils.rate_limit), so the cap holds across every web and Celery process.
+  Rates are set per host by EMAIL_RATE_LIMITS / EMAIL_RATE_LIMIT.
+
+PooledEmailBackend exposes a pool through Django's email backend API, so
+existing code can pass it as ``connection=``. Pools are per process and are
+rebuilt after a fork. Any backend works underneath (EMAIL_BACKEND by
+default), so console and locmem backends keep working in development and
+tests.
+
+For local benchmarks, ``manage.py smtp_debug_server`` runs an SMTP stand-in
+(utils.smtp_debug).
+"""
+
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from utils.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a connection is assumed dead and the send is retried
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def get_rate_limiter(host: str) -> Optional[RateLimiter]:
+    """Limiter for one provider, from EMAIL_RATE_LIMITS or EMAIL_RATE_LIMIT."""
+    rate = _setting("EMAIL_RATE_LIMITS", {}).get(host) or _setting(
+        "EMAIL_RATE_LIMIT", ""
+    )
+    return RateLimiter.from_rate(rate) if rate else None
+
+
+class _PooledConnection:
+    def __init__(self, backend):
+        self.backend = backend
+        self.is_open = False
+        self.last_used = 0.0
+        self.sent = 0
+
+    def ensure_open(self, idle_timeout: float, max_messages: int) -> None:
+        if self.is_open and (
+            time.monotonic() - self.last_used > idle_timeout
+            or (max_messages and self.sent >= max_messages)
+        ):
+            self.close()
+        if not self.is_open:
+            self.backend.open()
+            self.is_open = True
+            self.sent = 0
+
+    def close(self) -> None:
+        try:
+            self.backend.close()
+        except Exception as e:
+            logger.debug(f"Closing pooled SMTP connection failed: {e}")
+        self.is_open = False
+
+
+class SMTPConnectionPool:
+    """A fixed number of persistent connections to one mail server."""
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        backend: Optional[str] = None,
+        **connection_kwargs,
+    ):
+        self.size = size or _setting("EMAIL_POOL_SIZE", 4)
+        self.backend_path = backend or settings.EMAIL_BACKEND
+        self.connection_kwargs = connection_kwargs
+        self.host = connection_kwargs.get("host") or settings.EMAIL_HOST
+        self.idle_timeout = _setting("EMAIL_POOL_IDLE_TIMEOUT", 60)
+        self.max_messages = _setting("EMAIL_POOL_MAX_MESSAGES", 100)
+        self.rate_limiter = get_rate_limiter(self.host)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _new_connection(self) -> _PooledConnection:
+        return _PooledConnection(
+            get_connection(
+                self.backend_path, fail_silently=False, **self.connection_kwargs
+            )
+        )
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Borrow an open connection; it is returned to the pool afterwards."""
+        pooled = None
+        try:
+            pooled = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    pooled = self._new_connection()
+                    self._created += 1
+            if pooled is None:
+                timeout = timeout or _setting("EMAIL_POOL_WAIT_TIMEOUT", 30)
+                try:
+                    pooled = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise RuntimeError(
+                        f"No SMTP connection to {self.host} free after {timeout}s "
+                        f"(pool size {self.size})"
+                    ) from None
+
+        try:
+            pooled.ensure_open(self.idle_timeout, self.max_messages)
+            yield pooled
+        except BaseException:
+            # Never hand a connection in an unknown state to the next caller
+            pooled.close()
+            raise
+        finally:
+            pooled.last_used = time.monotonic()
+            self._idle.put(pooled)
+
+    def _throttle(self) -> None:
+        """Block until the provider's rate limit allows another message."""
+        if self.rate_limiter is None:
+            return
+        while True:
+            result = self.rate_limiter.hit(f"smtp:{self.host}")
+            if result.allowed:
+                return
+            time.sleep(max(result.retry_after, 0.01))
+
+    def send(self, message) -> int:
+        """Send one EmailMessage over a pooled connection, reconnecting once if needed."""
+        self._throttle()
+        for attempt in (1, 2):
+            try:
+                with self.connection() as pooled:
+                    sent = pooled.backend.send_messages([message])
+                    pooled.sent += 1
+                    return sent
+            except RECONNECT_ERRORS as e:
+                if attempt == 2:
+                    raise
+                logger.info(f"SMTP connection to {self.host} dropped ({e}); retrying")
+        return 0
+
+    def send_iter(
+        self, messages: Iterable
+    ) -> Iterator[Tuple[object, Optional[Exception]]]:
+        """
+        Send ``messages`` in parallel across the pool's connections.
+
+        Yields (message, error) pairs in completion order, on the calling
+        thread, with ``error`` None for messages that were sent.
+        """
+        executor = self._get_executor()
+        futures = {executor.submit(self.send, message): message for message in messages}
+        for future in as_completed(futures):
+            yield futures[future], future.exception()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.size, thread_name_prefix="smtp-pool"
+                )
+            return self._executor
+
+    def warm(self) -> None:
+        """Open a connection now, raising if the server cannot be reached."""
+        with self.connection():
+            pass
+
+    def close(self) -> None:
+        """Close every idle connection and stop the dispatch threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            pooled.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools: Dict[tuple, SMTPConnectionPool] = {}
+_pools_pid: Optional[int] = None
+_pools_lock = threading.Lock()
+
+
+def get_pool(**connection_kwargs) -> SMTPConnectionPool:
+    """The process-wide pool for one set of connection settings."""
+    global _pools_pid
+    key = tuple(sorted(connection_kwargs.items()))
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Sockets inherited across a fork must not be shared
+            _pools.clear()
+            _pools_pid = os.getpid()
+        if key not in _pools:
+            _pools[key] = SMTPConnectionPool(**connection_kwargs)
+        return _pools[key]
+
+
+class PooledEmailBackend(BaseEmailBackend):
+    """Email backend that sends through a shared SMTPConnectionPool."""
+
+    def __init__(self, fail_silently: bool = False, pool=None, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.pool = pool or get_pool(**kwargs)
+
+    def __deepcopy__(self, memo):
+        # Messages keep their connection; copies (e.g. locmem's outbox) share it
+        return self
+
+    def send_messages(self, email_messages) -> int:
+        sent = 0
+        for message in email_messages:
+            try:
+                sent += self.pool.send(message)
+            except Exception:
+                if not self.fail_silently:
+                    raise
+        return sent
@@ -1,11 +1,10 @@
 import random
-from datetime import timedelta
 from typing import Optional, Tuple
 
 import requests
 from django.conf import settings
-from django.core.cache import cache
-from django.utils import timezone
+
+from utils.rate_limit import RateLimiter
 
 
 def generate_simple_captcha() -> Tuple[str, int]:
@@ -36,19 +35,9 @@ def check_rate_limit(
     """
     Simple rate limiter based on IP address and action type.
     Returns True if the limit is exceeded.
-    """
-    cache_key = f"rate_limit:{action_type}:{ip_address}"
-    now = timezone.now()
-    window_start = now - timedelta(minutes=window_minutes)
-
-    request_times = cache.get(cache_key, [])
-    request_times = [
-        timestamp for timestamp in request_times if timestamp > window_start
-    ]
 
-    if len(request_times) >= max_requests:
-        return True
-
-    request_times.append(now)
-    cache.set(cache_key, request_times, window_minutes * 60)
-    return False
+    Uses an atomic sliding-window counter (one Redis round trip per check).
+    """
+    limiter = RateLimiter(limit=max_requests, window=window_minutes * 60)
+    result = limiter.hit(f"rate_limit:{action_type}:{ip_address}")
+    return not result.allowed
@@ -1,43 +1,127 @@
 """
 Custom throttling classes for per-endpoint rate limiting.
+
+All throttles here count requests with utils.rate_limit (atomic Redis
+counters, constant-size state) instead of DRF's cached timestamp history, and
+all of a view's throttles are evaluated together in a single Redis call.
 """
 
+import logging
+
 from rest_framework.throttling import (
     AnonRateThrottle,
     SimpleRateThrottle,
     UserRateThrottle,
 )
 
+from utils.rate_limit import RateLimiter, hit_many
+
+logger = logging.getLogger(__name__)
+
+BATCH_RESULTS_ATTR = "_atomic_throttle_results"
+
+
+class AtomicRateThrottleMixin:
+    """
+    Replace SimpleRateThrottle's history list with an atomic rate limiter.
+
+    Mix in before a SimpleRateThrottle subclass; get_cache_key() and the
+    scope/rate configuration are used unchanged. The first atomic throttle
+    checked for a request evaluates every atomic throttle of the view in one
+    Redis call and leaves the results on the request for the others, so
+    throttling costs one round trip however many throttles apply.
+    """
+
+    algorithm = "sliding"
+
+    def get_limiter(self) -> RateLimiter:
+        return RateLimiter(self.num_requests, self.duration, self.algorithm)
+
+    def check_id(self):
+        return (self.key, self.num_requests, self.duration, self.algorithm)
 
-class AnonBurstRateThrottle(AnonRateThrottle):
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        results = getattr(request, BATCH_RESULTS_ATTR, None)
+        if results is None:
+            results = _evaluate_view_throttles(request, view)
+            setattr(request, BATCH_RESULTS_ATTR, results)
+
+        self.result = results.get(self.check_id())
+        if self.result is None:
+            # Not among the view's throttles (used standalone)
+            self.result = self.get_limiter().hit(self.key)
+        return self.result.allowed
+
+    def wait(self):
+        result = getattr(self, "result", None)
+        if result is None or result.allowed:
+            return None
+        return result.retry_after
+
+
+def _evaluate_view_throttles(request, view) -> dict:
+    """Run every atomic throttle configured on ``view`` in one Redis call."""
+    throttles = []
+    get_throttles = getattr(view, "get_throttles", None)
+    for throttle in get_throttles() if get_throttles else []:
+        if not isinstance(throttle, AtomicRateThrottleMixin) or throttle.rate is None:
+            continue
+        throttle.key = throttle.get_cache_key(request, view)
+        if throttle.key is not None:
+            throttles.append(throttle)
+
+    # De-duplicate identical checks so each is counted once
+    unique = {throttle.check_id(): throttle for throttle in throttles}
+    results = hit_many(
+        (throttle.get_limiter(), throttle.key) for throttle in unique.values()
+    )
+    return dict(zip(unique.keys(), results))
+
+
+class AtomicAnonRateThrottle(AtomicRateThrottleMixin, AnonRateThrottle):
+    """Default anonymous throttle ('anon' scope)."""
+
+
+class AtomicUserRateThrottle(AtomicRateThrottleMixin, UserRateThrottle):
+    """Default per-user throttle ('user' scope)."""
+
+
+class AnonBurstRateThrottle(AtomicAnonRateThrottle):
     """Throttle for anonymous users - burst requests."""
 
     scope = "anon_burst"
     rate = "20/minute"
 
 
-class AnonSustainedRateThrottle(AnonRateThrottle):
+class AnonSustainedRateThrottle(AtomicAnonRateThrottle):
     """Throttle for anonymous users - sustained requests."""
 
     scope = "anon_sustained"
     rate = "100/hour"
 
 
-class UserBurstRateThrottle(UserRateThrottle):
+class UserBurstRateThrottle(AtomicUserRateThrottle):
     """Throttle for authenticated users - burst requests."""
 
     scope = "user_burst"
     rate = "60/minute"
 
 
-class UserSustainedRateThrottle(UserRateThrottle):
+class UserSustainedRateThrottle(AtomicUserRateThrottle):
     """Throttle for authenticated users - sustained requests."""
 
     scope = "user_sustained"
     rate = "1000/hour"
 
 
-class ChatbotRateThrottle(SimpleRateThrottle):
+class ChatbotRateThrottle(AtomicRateThrottleMixin, SimpleRateThrottle):
     """Throttle for chatbot endpoint - stricter limits."""
 
     scope = "chatbot"
@@ -52,7 +136,7 @@ class ChatbotRateThrottle(SimpleRateThrottle):
         return self.cache_format % {"scope": self.scope, "ident": ident}
 
 
-class AuthRateThrottle(SimpleRateThrottle):
+class AuthRateThrottle(AtomicRateThrottleMixin, SimpleRateThrottle):
     """Throttle for authentication endpoints - prevent brute force."""
 
     scope = "auth"
@@ -64,7 +148,7 @@ class AuthRateThrottle(SimpleRateThrottle):
         return self.cache_format % {"scope": self.scope, "ident": ident}
 
 
-class ContactFormRateThrottle(SimpleRateThrottle):
+class ContactFormRateThrottle(AtomicRateThrottleMixin, SimpleRateThrottle):
     """Throttle for contact/inquiry forms - prevent spam."""
 
     scope = "contact"
@@ -76,19 +160,14 @@ class ContactFormRateThrottle(SimpleRateThrottle):
         return self.cache_format % {"scope": self.scope, "ident": ident}
 
 
-class AdminActionRateThrottle(UserRateThrottle):
+class AdminActionRateThrottle(AtomicUserRateThrottle):
     """Throttle for admin actions - moderate limits."""
 
     scope = "admin_action"
     rate = "100/minute"
 
 
-import logging
-
-logger = logging.getLogger(__name__)
-
-
-class SafeAnonRateThrottle(AnonRateThrottle):
+class SafeAnonRateThrottle(AtomicAnonRateThrottle):
     """
     AnonRateThrottle that allows requests if cache connection fails.
     """
@@ -101,7 +180,7 @@ class SafeAnonRateThrottle(AnonRateThrottle):
             return True
 
 
-class SafeUserRateThrottle(UserRateThrottle):
+class SafeUserRateThrottle(AtomicUserRateThrottle):
     """
     UserRateThrottle that allows requests if cache connection fails.
     """